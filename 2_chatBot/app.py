@@ -4,7 +4,8 @@ import pandas as pd
 from streamlit.components.v1 import html
 
 from dotenv import load_dotenv
-from functions.chat_handler import handle_question
+from functions.chat_handler import handle_question_stream
+from functions.run_query import schema_registry
 # run_query.py 내의 run_query 함수는 이미 두 DB의 fully qualified 이름을 사용하는 조인 쿼리를 실행하도록 구성되어 있음
 
 # env 로드 및 OPENAI API KEY 설정
@@ -16,6 +17,19 @@ openai.api_key = os.getenv("OPENAI_API_KEY")
 st.set_page_config(layout="wide")
 st.title('ADN DB - QnA with Run_Query Integration')
 
+
+# 테이블 스키마 / DB 커넥션 풀은 프로세스당 한 번만 준비 (입력 때마다 일어나는 rerun 에서는 다시 하지 않음)
+@st.cache_resource(show_spinner=False)
+def warm_up():
+    schema_registry.preload()
+    return True
+
+try:
+    warm_up()
+except Exception as e:
+    # 실패는 캐싱되지 않으므로 다음 rerun 에서 다시 시도
+    st.sidebar.warning(f"스키마 미리 불러오기 실패: {e}")
+
 # 대화 기록 저장 (세션 스테이트에 messages 리스트 사용)
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -27,29 +41,42 @@ if prompt:
     # 사용자가 입력한 질문을 세션 기록에 저장 (역할: user)
     st.session_state.messages.append({"role": "user", "content": prompt})
 
-    # handle_question 함수 호출:
-    # - 자연어 질문을 받아 SQL 쿼리로 변환 (nl_to_sql 함수 내부에서 run_query 함수도 호출됨)
-    # - 생성된 SQL 쿼리를 실행하여 결과 DataFrame과 해석을 반환함
-    try:
-        sql, df, explanation = handle_question(prompt, st.session_state.messages)
-        
-        # 결과가 DataFrame 형태로 존재하면, 실행된 SQL, 결과 테이블(마크다운 표시), 해석을 조합
-        if df is not None:
-            answer = (
-                f"**💡 실행된 SQL:**\n```sql\n{sql}\n```\n\n"
-                f"**📊 결과 테이블:**\n{df.to_markdown(index=False)}\n\n"
-                f"**🔍 해석:**\n{explanation}"
-            )
-        else:
-            answer = f"**🔍 답변:**\n{explanation}"
-        
-    except Exception as e:
-        # 예외 발생 시 오류 메시지 표시
-        answer = f"❌ 오류: {e}"
-
-    # 어시스턴트의 응답(실행 결과 및 해석)을 세션 기록에 저장 (역할: assistant)
-    st.session_state.messages.append({"role": "assistant", "content": answer})
-
 # 저장된 대화 기록을 순서대로 화면에 출력
 for msg in st.session_state.messages:
     st.chat_message(msg["role"]).write(msg["content"])
+
+if prompt:
+    # handle_question_stream 함수 호출:
+    # - 자연어 질문을 받아 SQL 쿼리로 변환하고 실행한 결과 DataFrame을 바로 반환
+    # - 일반 질문이면 답변을 생성되는 대로 스트리밍
+    with st.chat_message("assistant"):
+        try:
+            sql, df, stream = handle_question_stream(prompt, st.session_state.messages)
+            
+            # 결과가 DataFrame 형태로 존재하면, 실행된 SQL, 결과 테이블(마크다운 표시), 해석을 조합
+            if df is not None:
+                header = (
+                    f"**💡 실행된 SQL:**\n```sql\n{df.attrs.get('executed_sql', sql)}\n```\n\n"
+                    f"**📊 결과 테이블:**\n{df.to_markdown(index=False)}\n\n"
+                    + (
+                        f"⚠️ 결과가 {df.attrs['max_rows']:,}행을 넘어 앞부분만 표시합니다.\n\n"
+                        if df.attrs.get("truncated") else ""
+                    )
+                    + (
+                        f"🛡️ 쿼리 조정: {', '.join(df.attrs['guard_notes'])}\n\n"
+                        if df.attrs.get("guard_notes") else ""
+                    )
+                    + "**🔍 해석:**\n"
+                )
+            else:
+                header = "**🔍 답변:**\n"
+            st.markdown(header)
+            answer = header + st.write_stream(stream)
+            
+        except Exception as e:
+            # 예외 발생 시 오류 메시지 표시
+            answer = f"❌ 오류: {e}"
+            st.write(answer)
+
+    # 어시스턴트의 응답(실행 결과 및 해석)을 세션 기록에 저장 (역할: assistant)
+    st.session_state.messages.append({"role": "assistant", "content": answer})
@@ -6,11 +6,15 @@ import json
 from datetime import datetime
 from dotenv import load_dotenv
 
-from .run_query import run_query,get_table_schema, DB_NAME_ADS,DB_NAME_LOGS
+from .run_query import run_query_df, get_table_schema, get_column_collation, DB_NAME_ADS, DB_NAME_LOGS
 
 # env
 load_dotenv()
 openai.api_key = os.getenv('OPENAI_API_KEY')
+# 지정하면 clicks 쪽 조인 키에만 이 collation 을 적용 (예: utf8mb4_unicode_ci)
+JOIN_COLLATION = os.getenv('JOIN_COLLATION')
+# 두 조인 키의 collation 이 같은지 확인하기 전에 쓰는 기본 조인 조건
+DEFAULT_JOIN_CONDITION = "a.paper_code COLLATE utf8mb4_unicode_ci = p.paper_code COLLATE utf8mb4_unicode_ci"
 
 current_date = datetime.now().strftime("%Y-%m-%d")
 
@@ -54,33 +58,71 @@ def classify_question(nl_question: str, history: list = None) -> str:
     return res.choices[0].message.content.strip()
 
 
-# 일반 질문 처리 함수
-def handle_general_question(nl_question: str, history: list = None) -> str:
+def _general_messages(nl_question: str, history: list = None) -> list:
     messages = history.copy() if history is not None else []
     messages.append({
         'role': 'system',
         'content': '너는 거짓말을 하지 않고, 명확하고 유익한 답변을 제공할 수 있는 전문가야'
     })
     messages.append({'role': 'user', 'content': nl_question})
-    
+    return messages
+
+
+# 일반 질문 처리 함수
+def handle_general_question(nl_question: str, history: list = None) -> str:
     res = openai.chat.completions.create(
         model='gpt-4o',
-        messages=messages
+        messages=_general_messages(nl_question, history)
     )
     
     return res.choices[0].message.content
 
 
+# 일반 질문 스트리밍 처리 함수 (텍스트 조각 단위로 yield)
+def handle_general_question_stream(nl_question: str, history: list = None):
+    res = openai.chat.completions.create(
+        model='gpt-4o',
+        messages=_general_messages(nl_question, history),
+        stream=True
+    )
+    for chunk in res:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+_join_collations_match = None
+
+
+def _collations_match() -> bool:
+    # INFORMATION_SCHEMA 로 두 조인 키의 collation 이 같은지 확인 (확인되면 프로세스 동안 유지, 실패하면 다음에 다시 확인)
+    global _join_collations_match
+    if _join_collations_match is None:
+        try:
+            clicks = get_column_collation('adn_clicks_2025', 'paper_code', DB_NAME_LOGS)
+            paper = get_column_collation('adn_paper_info', 'paper_code', DB_NAME_ADS)
+        except Exception as e:
+            print("collation 조회 실패:", e)
+            return False
+        _join_collations_match = clicks is not None and clicks == paper
+    return _join_collations_match
+
+
+def _join_condition() -> str:
+    # JOIN_COLLATION 은 clicks 쪽에만 적용 (adn_paper_info.paper_code 인덱스 유지)
+    if JOIN_COLLATION:
+        return f"p.paper_code = a.paper_code COLLATE {JOIN_COLLATION}"
+    # collation 이 같다고 확인된 경우에만 COLLATE 없이 비교 (다르면 Illegal mix of collations)
+    if _collations_match():
+        return "p.paper_code = a.paper_code"
+    return DEFAULT_JOIN_CONDITION
+
+
 # 자연어 질문 -> SQL 쿼리 변환 함수
 def nl_to_sql(nl_question: str, history: list = None) -> str:
-    table = 'adn_clicks_2025'
-    table2 = 'adn_paper_info'
-    schema_info = get_table_schema(table)
-    
     # clicks 테이블 스키마 (logs DB)
-    schema_clicks = get_table_schema('adn_clicks_2025', source='logs')
+    schema_clicks = get_table_schema('adn_clicks_2025', DB_NAME_LOGS)
     # paper_info 테이블 스키마 (ads DB)
-    schema_paper  = get_table_schema('adn_paper_info', source='ads')
+    schema_paper  = get_table_schema('adn_paper_info', DB_NAME_ADS)
     
     system_prompt = f"""
         아래 두 테이블을 항상 조인해서 사용합니다.
@@ -95,13 +137,12 @@ def nl_to_sql(nl_question: str, history: list = None) -> str:
         기본 FROM 절은 다음과 같습니다:
         FROM {DB_NAME_LOGS}.adn_clicks_2025 AS a
         LEFT JOIN {DB_NAME_ADS}.adn_paper_info AS p
-        -- COLLATE를 이용해 두 컬럼의 collation을 통일합니다
-        ON a.paper_code COLLATE utf8mb4_unicode_ci
-            = p.paper_code COLLATE utf8mb4_unicode_ci
+        ON {_join_condition()}
 
         자연어 질문을 SQL로 변환할 때,
-        - **날짜 필터**는 `a.wdate_str BETWEEN '시작일' AND '종료일'` 으로,
-        - **JOIN 조건**에는 반드시 `COLLATE utf8mb4_unicode_ci`를 포함해 주세요.
+        - **날짜 필터**는 반드시 `a.wdate_str BETWEEN '시작일' AND '종료일'` 으로 걸고,
+        - **JOIN 조건**은 위와 똑같이 써 주세요. COLLATE나 함수를 임의로 더하거나 빼지 마세요.
+        - `SELECT *` 대신 질문에 필요한 컬럼만 조회해 주세요.
     """
     
     messages = history.copy() if history is not None else []
@@ -128,16 +169,36 @@ def handle_question(nl_question: str, history: list = None):
     
     if classification == "DB":
         sql = nl_to_sql(nl_question, history)
-        rows = run_query(sql)
-        df = pd.DataFrame(rows)  # DataFrame 변환
+        df = run_query_df(sql)  # DataFrame 변환 (최대 MAX_RESULT_ROWS 행)
 
-        explanation = (
-            f"💡 실행된 SQL:\n```sql\n{sql}\n```\n"
-            f"📊 총 {len(df)}개의 레코드가 반환되었습니다."
-        )
+        explanation = _record_summary(sql, df)
         
         return sql, df, explanation
     else:
         general_answer = handle_general_question(nl_question, history)
         return None, None, general_answer
 
+
+def _record_summary(sql: str, df: pd.DataFrame) -> str:
+    return (
+        f"💡 실행된 SQL:\n```sql\n{df.attrs.get('executed_sql', sql)}\n```\n"
+        f"📊 총 {len(df)}개의 레코드가 반환되었습니다."
+        + (f" (최대 {df.attrs['max_rows']:,}행까지만 조회되어 결과가 잘렸습니다)" if df.attrs.get("truncated") else "")
+        + (f" (쿼리 조정: {', '.join(df.attrs['guard_notes'])})" if df.attrs.get("guard_notes") else "")
+    )
+
+
+def handle_question_stream(nl_question: str, history: list = None):
+    """
+    handle_question과 같지만 답변을 문자열 대신 텍스트 조각 generator로 반환
+    (SQL 실행 결과 DataFrame은 반환 전에 준비되므로 UI에서 바로 보여줄 수 있음)
+    """
+    classification = classify_question(nl_question, history)
+    
+    if classification == "DB":
+        sql = nl_to_sql(nl_question, history)
+        df = run_query_df(sql)  # DataFrame 변환 (최대 MAX_RESULT_ROWS 행)
+        return sql, df, iter([_record_summary(sql, df)])
+    else:
+        return None, None, handle_general_question_stream(nl_question, history)
+
@@ -1,5 +1,9 @@
-import pymysql, os
+import pymysql, os, re, threading
+import pandas as pd
 from dotenv import load_dotenv
+from .db_pool import ConnectionPool
+from .schema_registry import SchemaRegistry
+from .query_guard import QueryGuard, strip_trailing_comments
 
 load_dotenv()
 DB_HOST = os.getenv('DB_HOST')
@@ -8,37 +12,178 @@ DB_PASSWORD = os.getenv('DB_PASSWORD')
 DB_NAME_LOGS = os.getenv('DB_NAME_LOGS')
 DB_NAME_ADS = os.getenv('DB_NAME_ADS')  # adn_paper_info(매체)
 
+# 커넥션 풀 설정
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '300'))
 
-# db 연결
-def run_query(query: str, db_name: str = DB_NAME_LOGS) -> list[dict]:
-    """
-    db_name 파라미터에 따라 log / ads DB에 연결
-    """
-    conn = pymysql.connect(
+# 결과 행 수 상한 / 스트리밍 fetch 단위
+MAX_RESULT_ROWS = int(os.getenv('MAX_RESULT_ROWS', '50000'))
+FETCH_CHUNK_SIZE = int(os.getenv('FETCH_CHUNK_SIZE', '5000'))
+
+# 실행 전 EXPLAIN 검사 (추정 스캔 행 수 상한 / 풀 스캔 시 기본 조회 기간 / 서버 실행 시간 제한)
+QUERY_GUARD_ENABLED = os.getenv('QUERY_GUARD_ENABLED', '1') == '1'
+QUERY_MAX_SCAN_ROWS = int(os.getenv('QUERY_MAX_SCAN_ROWS', '5000000'))
+QUERY_FULL_SCAN_ROWS = int(os.getenv('QUERY_FULL_SCAN_ROWS', '100000'))
+QUERY_MAX_EXECUTION_MS = int(os.getenv('QUERY_MAX_EXECUTION_MS', '30000'))
+QUERY_DEFAULT_DAYS = int(os.getenv('QUERY_DEFAULT_DAYS', '31'))
+
+# 스키마 캐시 설정 (SCHEMA_CACHE_PATH 지정 시 파일로도 저장)
+SCHEMA_CACHE_TTL = float(os.getenv('SCHEMA_CACHE_TTL', '3600'))
+SCHEMA_CACHE_PATH = os.getenv('SCHEMA_CACHE_PATH')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _connect(db_name: str):
+    return pymysql.connect(
         host=DB_HOST,
         user=DB_USER,
         password=DB_PASSWORD,
         db=db_name,
         charset="utf8",
-        cursorclass=pymysql.cursors.DictCursor
+        cursorclass=pymysql.cursors.DictCursor,
+        autocommit=True,  # 재사용되는 커넥션이 오래된 스냅샷을 읽지 않도록
     )
-    try:
+
+
+def get_pool(db_name: str = DB_NAME_LOGS) -> ConnectionPool:
+    """
+    db_name(log / ads) 별 커넥션 풀 반환 (없으면 생성)
+    """
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = ConnectionPool(
+                lambda: _connect(db_name),
+                max_size=DB_POOL_SIZE,
+                timeout=DB_POOL_TIMEOUT,
+                max_idle=DB_POOL_MAX_IDLE,
+            )
+            _pools[db_name] = pool
+        return pool
+
+
+def pool_stats() -> dict:
+    with _pools_lock:
+        return {db_name: pool.stats() for db_name, pool in _pools.items()}
+
+
+# db 연결
+def run_query(query: str, db_name: str = DB_NAME_LOGS, args: tuple = None) -> list[dict]:
+    """
+    db_name 파라미터에 따라 log / ads DB의 커넥션 풀에서 연결을 빌려 실행
+    args를 넘기면 query의 %s 자리에 바인딩
+    """
+    with get_pool(db_name).connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute(query)
+            cursor.execute(query, args)
             return cursor.fetchall()
+
+_SELECT_PATTERN = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+# LIMIT n / LIMIT offset, n / LIMIT n OFFSET m (쿼리 맨 끝에 있는 경우만)
+_LIMIT_PATTERN = re.compile(
+    r"\blimit\s+(?:(?P<offset>\d+)\s*,\s*)?(?P<count>\d+)(?P<tail>\s+offset\s+\d+)?\s*$",
+    re.IGNORECASE,
+)
+
+
+def apply_row_limit(query: str, max_rows: int) -> str:
+    """
+    SELECT 쿼리가 최대 max_rows 행만 반환하도록 LIMIT을 붙이거나 더 큰 LIMIT을 줄임
+    (끝에 붙은 주석은 LIMIT 인식을 막으므로 먼저 제거)
+    """
+    query = strip_trailing_comments(query)
+    if not _SELECT_PATTERN.match(query):
+        return query
+
+    match = _LIMIT_PATTERN.search(query)
+    if match is None:
+        return f"{query}\nLIMIT {max_rows}"
+    if int(match.group("count")) <= max_rows:
+        return query
+
+    offset = f"{match.group('offset')}, " if match.group("offset") else ""
+    return f"{query[:match.start()]}LIMIT {offset}{max_rows}{match.group('tail') or ''}"
+
+
+def run_query_df(query: str, db_name: str = DB_NAME_LOGS, max_rows: int = MAX_RESULT_ROWS) -> pd.DataFrame:
+    """
+    서버 사이드 커서(SSCursor)로 FETCH_CHUNK_SIZE 행씩 받아 DataFrame 생성.
+    행을 dict 대신 튜플로 받고, max_rows 를 넘으면 잘라낸 뒤 df.attrs['truncated'] = True 로 표시.
+    """
+    notes = []
+    if QUERY_GUARD_ENABLED:
+        query, notes = query_guard.prepare(query, db_name)
+    limited_query = apply_row_limit(query, max_rows + 1)  # 1행 더 받아서 잘림 여부 판단
+
+    pool = get_pool(db_name)
+    conn = pool.acquire()
+    broken = True  # 중간에 실패하면 읽다 만 결과가 남아있으므로 커넥션 폐기
+    try:
+        with conn.cursor(pymysql.cursors.SSCursor) as cursor:
+            cursor.execute(limited_query)
+            columns = [d[0] for d in cursor.description or []]
+
+            rows = []
+            while len(rows) <= max_rows:
+                chunk = cursor.fetchmany(min(FETCH_CHUNK_SIZE, max_rows + 1 - len(rows)))
+                if not chunk:
+                    break
+                rows.extend(chunk)
+        broken = False
     finally:
-        conn.close()
+        pool.release(conn, broken=broken)
+
+    truncated = len(rows) > max_rows
+    df = pd.DataFrame.from_records(rows[:max_rows], columns=columns)
+    df.attrs["truncated"] = truncated
+    df.attrs["max_rows"] = max_rows
+    df.attrs["guard_notes"] = notes
+    df.attrs["executed_sql"] = query
+    return df
+
+# 사용하는 테이블은 첫 조회 때 한 번의 쿼리로 같이 로드됨
+schema_registry = SchemaRegistry(
+    run_query,
+    tables=[
+        (DB_NAME_LOGS, 'adn_clicks_2025'),
+        (DB_NAME_ADS, 'adn_paper_info'),
+    ],
+    ttl=SCHEMA_CACHE_TTL,
+    cache_path=SCHEMA_CACHE_PATH,
+)
 
 def get_table_schema(table_name: str, db_name: str = DB_NAME_LOGS) -> str:
     """
-    INFORMATION_SCHEMA에서 table_name의 컬럼 스키마를 조회.
+    INFORMATION_SCHEMA에서 조회한 table_name의 컬럼 스키마를 반환 (schema_registry 캐시 사용).
     db_name 인자에 따라 스키마 조회 대상 DB 변경.
     """
-    sql = f"""
-        SELECT COLUMN_NAME, DATA_TYPE
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_SCHEMA = '{db_name}'
-        AND TABLE_NAME = '{table_name}';
+    return schema_registry.get(table_name, db_name)
+
+
+def get_column_collation(table_name: str, column_name: str, db_name: str = DB_NAME_LOGS) -> str | None:
+    """
+    INFORMATION_SCHEMA에서 조회한 컬럼의 collation (문자열 컬럼이 아니거나 없으면 None)
     """
-    cols = run_query(sql, db_name)
-    return ", ".join(f"{r['COLUMN_NAME']}({r['DATA_TYPE']})" for r in cols)
+    rows = run_query(
+        "SELECT COLLATION_NAME FROM INFORMATION_SCHEMA.COLUMNS "
+        "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        db_name, (db_name, table_name, column_name),
+    )
+    return rows[0]["COLLATION_NAME"] if rows else None
+
+
+def explain(query: str, db_name: str = DB_NAME_LOGS) -> list[dict]:
+    return run_query(f"EXPLAIN {query}", db_name)
+
+
+query_guard = QueryGuard(
+    explain,
+    columns=schema_registry.columns,
+    max_scan_rows=QUERY_MAX_SCAN_ROWS,
+    full_scan_rows=QUERY_FULL_SCAN_ROWS,
+    max_execution_ms=QUERY_MAX_EXECUTION_MS,
+    default_days=QUERY_DEFAULT_DAYS,
+)
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import threading
+
+
+# 테이블 스키마 캐시 (INFORMATION_SCHEMA 조회 결과를 프로세스 내에 보관)
+class SchemaRegistry:
+    """
+    등록된 (db_name, table_name) 들의 컬럼 스키마를 한 번의 INFORMATION_SCHEMA 조회로 읽어와 캐싱.
+    - ttl: 캐시 유지 시간(초), 지나면 다음 조회 시 다시 로드
+    - cache_path: 지정하면 로드 결과를 JSON 파일로 저장하고, 콜드 스타트 시 DB 대신 파일에서 읽음
+    """
+
+    def __init__(self, run_query, tables: list[tuple[str, str]], ttl: float = 3600.0, cache_path: str = None):
+        self._run_query = run_query
+        self._tables = list(tables)
+        self.ttl = ttl
+        self.cache_path = cache_path
+
+        self._schemas = {}  # (db_name, table_name) -> [(COLUMN_NAME, DATA_TYPE), ...]
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def register(self, table_name: str, db_name: str):
+        with self._lock:
+            if (db_name, table_name) not in self._tables:
+                self._tables.append((db_name, table_name))
+                self._loaded_at = 0.0  # 다음 조회 때 새 테이블까지 같이 로드
+
+    def invalidate(self, table_name: str = None, db_name: str = None):
+        """
+        인자가 없으면 전체 캐시를, 있으면 해당 테이블만 무효화 (파일 캐시도 함께 삭제)
+        """
+        with self._lock:
+            if table_name is None:
+                self._schemas.clear()
+            else:
+                self._schemas.pop((db_name, table_name), None)
+            self._loaded_at = 0.0
+            if self.cache_path and os.path.exists(self.cache_path):
+                os.remove(self.cache_path)
+
+    def preload(self):
+        """
+        앱 시작 시 호출하면 등록된 테이블 스키마를 미리 로드 (캐시가 유효하면 아무것도 안 함)
+        """
+        with self._lock:
+            if self._expired() or any(key not in self._schemas for key in self._tables):
+                self._load()
+
+    def get(self, table_name: str, db_name: str) -> str:
+        key = (db_name, table_name)
+        with self._lock:
+            if key not in self._tables:
+                self._tables.append(key)
+            if self._expired() or key not in self._schemas:
+                self._load()
+            cols = self._schemas.get(key, [])
+        return ", ".join(f"{name}({data_type})" for name, data_type in cols)
+
+    def columns(self, table_name: str, db_name: str) -> list[str]:
+        """
+        컬럼 이름 목록 (get 과 같은 캐시 사용)
+        """
+        self.get(table_name, db_name)
+        with self._lock:
+            return [name for name, _ in self._schemas.get((db_name, table_name), [])]
+
+    def _expired(self) -> bool:
+        return time.time() - self._loaded_at > self.ttl
+
+    def _load(self):
+        if not self._schemas and self._load_file():
+            if not self._expired() and all(key in self._schemas for key in self._tables):
+                return
+
+        # 등록된 모든 테이블을 한 번에 조회
+        conditions = " OR ".join(["(TABLE_SCHEMA = %s AND TABLE_NAME = %s)"] * len(self._tables))
+        args = tuple(v for key in self._tables for v in key)
+        sql = f"""
+            SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE {conditions}
+            ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION;
+        """
+        rows = self._run_query(sql, args=args)
+
+        schemas = {key: [] for key in self._tables}
+        for r in rows:
+            schemas.setdefault((r['TABLE_SCHEMA'], r['TABLE_NAME']), []).append((r['COLUMN_NAME'], r['DATA_TYPE']))
+        self._schemas = schemas
+        self._loaded_at = time.time()
+        self._save_file()
+
+    def _load_file(self) -> bool:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._schemas = {
+                tuple(key.split(".", 1)): [tuple(c) for c in cols]
+                for key, cols in data["tables"].items()
+            }
+            self._loaded_at = data["loaded_at"]
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def _save_file(self):
+        if not self.cache_path:
+            return
+        data = {
+            "loaded_at": self._loaded_at,
+            "tables": {f"{db}.{table}": cols for (db, table), cols in self._schemas.items()},
+        }
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
@@ -5,7 +5,9 @@ import openai
 
 
 from dotenv import load_dotenv
-from functions.chat_handler import handle_question
+from functions.chat_handler import handle_question_stream, handle_multi_table_question_stream
+from functions.run_query import schema_registry
+from functions.tracing import current_trace, span
 
 # env
 load_dotenv()
@@ -16,18 +18,34 @@ st.set_page_config(layout="wide")
 st.title('ADN DB - QnA')
 
 
+# 테이블 스키마 / DB 커넥션 풀은 프로세스당 한 번만 준비 (입력 때마다 일어나는 rerun 에서는 다시 하지 않음)
+@st.cache_resource(show_spinner=False)
+def warm_up():
+    schema_registry.preload()
+    return True
+
+try:
+    warm_up()
+except Exception as e:
+    # 실패는 캐싱되지 않으므로 다음 rerun 에서 다시 시도
+    st.sidebar.warning(f"스키마 미리 불러오기 실패: {e}")
+
+
 # 테이블 선택 탭
 st.sidebar.title("📊 테이블 선택")
 
-page = st.sidebar.radio(" ", ["통계 데이터", "소재 별 데이터"], label_visibility="hidden")
-
+# 전체 비교: 모든 테이블에 같은 질문을 동시에 조회해서 결과를 합쳐 비교
+COMPARE_PAGE = "전체 비교"
 
 table_mapping = {
     "통계 데이터": ("adn_daily_agency_statics_2025", os.getenv("DB_NAME_LOGS")),
     "소재 별 데이터": ("adn_daily_users_modes_report_statics_2025", os.getenv("DB_NAME_LOGS")),
 }
 
-selected_table, selected_db = table_mapping[page]
+page = st.sidebar.radio(" ", [*table_mapping, COMPARE_PAGE], label_visibility="hidden")
+
+# 디버그 패널: 답변마다 단계별 소요 시간 / 토큰 수 / 행 수 표시
+show_trace = st.sidebar.checkbox("🐞 단계별 소요 시간 보기")
 
 # 대화 기록 저장용
 
@@ -46,37 +64,53 @@ if prompt:
     # 사용자가 입력한 질문을 세션 메시지에 저장 (역할: user)
     st.session_state.messages[page].append({"role": "user", "content": prompt})
 
-    # 입력받은 질문 -> SQL, 결과, 해석 (대화 기록 전달)
-    try:
-        sql, df, explanation = handle_question(
-            prompt,
-            selected_table,
-            selected_db,
-            st.session_state.messages[page],
-        )
-        if df is not None:
-            answer = (
-                f"**💡 실행된 SQL:**\n```sql\n{sql}\n```\n\n"
-                f"**📊 결과 테이블:**\n{df.to_markdown(index=False)}\n\n"
-                f"**🔍 해석:**\n{explanation}"
-            )
-        else:
-            answer = f"**🔍 답변:**\n{explanation}"
-        
-    except Exception as e:
-        answer = f"❌ 오류: {e}"
+# 대화 기록 출력
+for msg in st.session_state.messages[page]:
+    st.chat_message(msg["role"]).write(msg["content"])
 
-    # 어시스턴트의 응답을 세션 메시지에 저장 (역할: assistant)
-    st.session_state.messages[page].append({
-        "role": "assistant",
-        "content": (
-            f"**💡 실행된 SQL:**\n```sql\n{sql}\n```\n\n"
-            + (df.to_markdown(index=False) if df is not None else "")
-            + f"\n\n**🔍 해석:**\n{explanation}"
-        )
-    })
+if prompt:
+    # 입력받은 질문 -> SQL, 결과는 바로 출력하고 해석은 생성되는 대로 스트리밍 (대화 기록 전달)
+    with st.chat_message("assistant"):
+        trace = None
+        try:
+            if page == COMPARE_PAGE:
+                sql, df, stream = handle_multi_table_question_stream(prompt, table_mapping, st.session_state.messages[page])
+            else:
+                selected_table, selected_db = table_mapping[page]
+                sql, df, stream = handle_question_stream(prompt, st.session_state.messages[page],
+                                                         table=selected_table, db_name=selected_db)
+            trace = current_trace()  # 해석 스트림이 끝날 때 같이 끝남
+            with span("markdown_render") as render_span:
+                if df is not None:
+                    header = (
+                        f"**💡 실행된 SQL:**\n```sql\n{df.attrs.get('executed_sql', sql)}\n```\n\n"
+                        f"**📊 결과 테이블:**\n{df.to_markdown(index=False)}\n\n"
+                        + (
+                            f"⚠️ 결과가 {df.attrs['max_rows']:,}행을 넘어 앞부분만 표시합니다.\n\n"
+                            if df.attrs.get("truncated") else ""
+                        )
+                        + (
+                            f"🛡️ 쿼리 조정: {', '.join(df.attrs['guard_notes'])}\n\n"
+                            if df.attrs.get("guard_notes") else ""
+                        )
+                        + "**🔍 해석:**\n"
+                    )
+                else:
+                    header = "**🔍 답변:**\n"
+                st.markdown(header)
+                render_span.set(chars=len(header))
+            explanation = st.write_stream(stream)
+            answer = header + explanation
+
+        except Exception as e:
+            if trace is not None:
+                trace.finish(e)
+            answer = f"❌ 오류: {e}"
+            st.write(answer)
+
+        if show_trace and trace is not None:
+            with st.expander(f"🐞 처리 단계 ({trace.root.duration_ms} ms)"):
+                st.dataframe(pd.DataFrame(trace.rows()), hide_index=True, use_container_width=True)
 
-# 대화 기록 출력
-if page in st.session_state.messages:
-    for msg in st.session_state.messages[page]:
-        st.chat_message(msg["role"]).write(msg["content"])
\ No newline at end of file
+    # 어시스턴트의 응답을 세션 메시지에 저장 (역할: assistant)
+    st.session_state.messages[page].append({"role": "assistant", "content": answer})
@@ -0,0 +1,86 @@
+"""
+common.py 의 add_performance_ratios / apply_comma_formatting 성능 비교
+(기존 행 단위 apply 구현 vs 현재 구현, 10k / 100k / 1M 행 합성 데이터)
+
+chatBot 디렉토리에서 실행:
+    python -m benchmarks.bench_common
+    python -m benchmarks.bench_common --rows 10000 100000
+"""
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from functions.common import add_performance_ratios, apply_comma_formatting
+
+
+# 기존 구현 (비교용)
+def legacy_add_performance_ratios(df: pd.DataFrame) -> pd.DataFrame:
+    if "노출수" in df.columns and "클릭수" in df.columns:
+        df["클릭률(%)"] = df.apply(
+            lambda row: round((row["클릭수"] / row["노출수"] * 100), 1) if row["노출수"] > 0 else 0, axis=1
+        )
+    if "클릭수" in df.columns and "전환수" in df.columns:
+        df["전환률(%)"] = df.apply(
+            lambda row: round((row["전환수"] / row["클릭수"] * 100), 1) if row["클릭수"] > 0 else 0, axis=1
+        )
+    return df
+
+def legacy_apply_comma_formatting(df: pd.DataFrame, exclude_columns: list = None) -> pd.DataFrame:
+    if exclude_columns is None:
+        exclude_columns = []
+    for col in df.columns:
+        if col in exclude_columns:
+            continue
+        if pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].apply(lambda x: f"{x:,}" if pd.notnull(x) else x)
+    return df
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    views = rng.integers(0, 100_000, rows)
+    clicks = rng.binomial(views, 0.01)
+    orders = rng.binomial(clicks, 0.05)
+    return pd.DataFrame({
+        "일자": pd.date_range("2025-01-01", periods=rows, freq="min").strftime("%Y-%m-%d"),
+        "대행사": rng.choice(["A", "B", "C", "D"], rows),
+        "노출수": views,
+        "클릭수": clicks,
+        "전환수": orders,
+        "비용": clicks * 120,
+    })
+
+
+def timed(fn, df: pd.DataFrame, *args) -> tuple[float, pd.DataFrame]:
+    start = time.perf_counter()
+    result = fn(df.copy(), *args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} | {'function':<24} | {'legacy':>9} | {'current':>9} | speedup")
+    for rows in args.rows:
+        df = make_frame(rows)
+
+        legacy_t, legacy_df = timed(legacy_add_performance_ratios, df)
+        current_t, current_df = timed(add_performance_ratios, df)
+        # 파이썬 round 와 numpy round 는 .x5 경계에서 드물게 0.1 차이가 날 수 있음
+        pd.testing.assert_series_equal(
+            legacy_df["클릭률(%)"].astype("float64"), current_df["클릭률(%)"], check_exact=False, atol=0.11
+        )
+        print(f"{rows:>9} | {'add_performance_ratios':<24} | {legacy_t:>8.3f}s | {current_t:>8.3f}s | x{legacy_t / current_t:.1f}")
+
+        legacy_t, legacy_df = timed(legacy_apply_comma_formatting, current_df, ["일자"])
+        current_t, current_df = timed(apply_comma_formatting, current_df, ["일자"])
+        pd.testing.assert_frame_equal(legacy_df.astype(object), current_df.astype(object))
+        print(f"{rows:>9} | {'apply_comma_formatting':<24} | {legacy_t:>8.3f}s | {current_t:>8.3f}s | x{legacy_t / current_t:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+여러 테이블 비교 질문 벤치마크: 테이블별 SQL 생성 + 실행을 순서대로(스레드 1개) 할 때와 동시에 할 때 비교
+- 질문별 전체 지연시간 p50, fanout 단계 p50, 결과 일치 여부
+
+chatBot 디렉토리에서 실행:
+    python -m benchmarks.bench_fanout
+    python -m benchmarks.bench_fanout --rows 300000 --db-latency 0.05 --repeat 10
+"""
+import os
+
+os.environ.setdefault("DB_NAME_LOGS", "adn_logs")
+os.environ.setdefault("DB_NAME_ADS", "adn_ads")
+
+import argparse
+import tempfile
+
+from functions import chat_handler, run_query, tracing
+
+from .fixtures import FakeOpenAI, SQLiteDatabase, AGENCY_TABLE
+from .bench_pipeline import install
+from .bench_rollup import timed
+
+# 같은 질문을 두 테이블에 던지는 비교 질문 (가짜 LLM 은 테이블과 상관없이 질문별로 정해진 SQL 을 줌)
+QUESTIONS = ["어제 대행사별 노출수 알려줘", "지난주 일별 전환수 추이"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000, help="adn_daily_agency_statics_2025 행 수")
+    parser.add_argument("--ttft", type=float, default=0.2, help="가짜 LLM 첫 토큰 지연 (초)")
+    parser.add_argument("--db-latency", type=float, default=0.02, help="쿼리당 네트워크 왕복 (초)")
+    parser.add_argument("--targets", type=int, default=2, help="동시에 조회할 테이블 수")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    targets = {f"테이블 {i + 1}": (AGENCY_TABLE, run_query.DB_NAME_LOGS) for i in range(args.targets)}
+    fanout_ms = []
+    tracing.add_exporter(lambda trace: fanout_ms.extend(s.duration_ms for s in trace.spans if s.name == "fanout"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = SQLiteDatabase(tmp, run_query.DB_NAME_LOGS, run_query.DB_NAME_ADS,
+                                  latency=args.db_latency, rows=args.rows)
+        install(FakeOpenAI(ttft=args.ttft), database, use_cache=False)
+        run_query.QUERY_GUARD_ENABLED = False  # SQLite EXPLAIN 은 MySQL 형식이 아님
+        run_query.ROLLUP_ENABLED = run_query.WAREHOUSE_ENABLED = False
+
+        print(f"{'question':<22} | {'순차 ms':>9} | {'동시 ms':>9} | {'fanout 순차':>11} | {'fanout 동시':>11} | 일치")
+        for question in QUESTIONS:
+            results = {}
+            for workers in (1, 0):
+                chat_handler.FANOUT_MAX_WORKERS = workers
+                fanout_ms.clear()
+                total, result = timed(lambda: chat_handler.handle_multi_table_question(question, targets), args.repeat)
+                results[workers] = (total, sorted(fanout_ms)[len(fanout_ms) // 2], result[1])
+            (seq, seq_fanout, seq_df), (par, par_fanout, par_df) = results[1], results[0]
+            print(f"{question:<22} | {seq:>9.0f} | {par:>9.0f} | {seq_fanout:>11.0f} | {par_fanout:>11.0f} | "
+                  f"{seq_df.equals(par_df)}")
+
+
+if __name__ == "__main__":
+    main()
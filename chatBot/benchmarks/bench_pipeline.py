@@ -0,0 +1,174 @@
+"""
+handle_question 전체 경로 오프라인 벤치마크 (OpenAI / MySQL 대신 fixtures 의 가짜 클라이언트 / SQLite 사용)
+- 단계별(span) / 전체 지연시간 p50 / p95
+- N개 세션 동시 처리 시 처리량 (질문 / 초)
+- 최대 메모리 (tracemalloc, 시간 측정과 별도 실행)
+
+chatBot 디렉토리에서 실행:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --rows 200000 --sessions 1 4 16 --ttft 0.3 --output-tps 80
+    python -m benchmarks.bench_pipeline --routing classic   # 분류 / SQL 생성을 따로 호출하는 이전 방식과 비교
+"""
+import os
+
+# functions 모듈을 불러오기 전에 벤치마크용 DB 이름 지정 (.env 에 있으면 그 값 사용)
+os.environ.setdefault("DB_NAME_LOGS", "adn_logs")
+os.environ.setdefault("DB_NAME_ADS", "adn_ads")
+
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from functions import chat_handler, run_query, tracing
+from functions.response_cache import ResponseCache
+from functions.result_cache import ResultCache
+
+from .fixtures import FakeOpenAI, SQLiteDatabase, QUESTIONS
+
+
+def install(fake: FakeOpenAI, database: SQLiteDatabase, use_cache: bool):
+    """
+    chat_handler / run_query 가 가짜 OpenAI 와 SQLite 를 쓰도록 교체
+    """
+    chat_handler.openai = fake
+    run_query._connect = database.connect
+    for pool in run_query._pools.values():
+        pool.close()
+    run_query._pools.clear()
+    run_query.schema_registry.invalidate()
+    if not use_cache:
+        # 캐시가 결과를 왜곡하지 않도록 항상 miss 나는 캐시로 교체
+        chat_handler.nl_cache = ResponseCache(max_items=0)
+        run_query.result_cache = ResultCache(max_bytes=0)
+
+
+def render(sql: str, df, explanation: str) -> str:
+    # app.py 가 대화 기록에 저장하는 답변과 같은 형태 (다음 질문의 history 로 쓰임)
+    if df is None:
+        return f"**🔍 답변:**\n{explanation}"
+    return (
+        f"**💡 실행된 SQL:**\n```sql\n{sql}\n```\n\n"
+        f"**📊 결과 테이블:**\n{df.to_markdown(index=False)}\n\n"
+        f"**🔍 해석:**\n{explanation}"
+    )
+
+
+def run_session(questions: list, collect: list, render_markdown: bool) -> list:
+    """
+    한 세션에서 질문들을 순서대로 처리 (대화 기록 누적). 질문별 전체 지연시간(초) 반환
+    """
+    history, latencies = [], []
+    for question in questions:
+        history.append({"role": "user", "content": question})
+        start = time.perf_counter()
+        sql, df, explanation = chat_handler.handle_question(question, history)
+        if render_markdown:
+            render_start = time.perf_counter()
+            answer = render(sql, df, explanation)
+            collect.append(("markdown_render", (time.perf_counter() - render_start) * 1000))
+        else:
+            answer = explanation
+        latencies.append(time.perf_counter() - start)
+        history.append({"role": "assistant", "content": answer})
+    return latencies
+
+
+def percentiles(values: list) -> tuple[float, float]:
+    return tuple(np.percentile(values, [50, 95])) if values else (float("nan"), float("nan"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000, help="adn_daily_agency_statics_2025 행 수")
+    parser.add_argument("--repeat", type=int, default=2, help="단계별 측정 반복 횟수")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16], help="동시 세션 수")
+    parser.add_argument("--ttft", type=float, default=0.2, help="가짜 LLM 첫 토큰 지연 (초)")
+    parser.add_argument("--prefill-tps", type=float, default=20000, help="가짜 LLM 입력 처리 속도 (토큰 / 초)")
+    parser.add_argument("--output-tps", type=float, default=100, help="가짜 LLM 생성 속도 (토큰 / 초)")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="쿼리당 가짜 네트워크 지연 (초)")
+    parser.add_argument("--cache", action="store_true", help="nl -> SQL / 결과 캐시 사용")
+    parser.add_argument("--no-render", action="store_true", help="결과 테이블 markdown 변환 생략")
+    parser.add_argument("--skip-memory", action="store_true")
+    parser.add_argument("--routing", choices=["single", "classic"], default=chat_handler.ROUTING_MODE,
+                        help="chat_handler.ROUTING_MODE")
+    args = parser.parse_args()
+    chat_handler.ROUTING_MODE = args.routing
+
+    questions = list(QUESTIONS)
+    fake = FakeOpenAI(ttft=args.ttft, prefill_tps=args.prefill_tps, output_tps=args.output_tps)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        database = SQLiteDatabase(tmp, run_query.DB_NAME_LOGS, run_query.DB_NAME_ADS,
+                                  latency=args.db_latency, rows=args.rows)
+        print(f"SQLite 생성: {args.rows:,}행, {time.perf_counter() - start:.1f}s, 라우팅: {args.routing}")
+        install(fake, database, args.cache)
+
+        stages = defaultdict(list)
+        lock = threading.Lock()
+
+        def collect_trace(trace):
+            with lock:
+                for span in trace.spans:
+                    stages[span.name].append(span.duration_ms)
+                    for key in ("prompt_tokens", "completion_tokens"):
+                        stages[f"{span.name}.{key}"].append(span.attributes.get(key, 0))
+
+        # 1) 단계별 지연시간 (세션 하나, 순차 처리)
+        render_times = []
+        tracing.add_exporter(collect_trace)
+        try:
+            for _ in range(args.repeat):
+                run_session(questions, render_times, not args.no_render)
+        finally:
+            tracing.remove_exporter(collect_trace)
+        for name, ms in render_times:
+            stages[name].append(ms)
+
+        print(f"\n[단계별] 질문 {len(questions)}개 x {args.repeat}회")
+        print(f"{'stage':<22} | {'n':>4} | {'p50 ms':>9} | {'p95 ms':>9} | {'mean ms':>9} | {'tokens/call':>11}")
+        for name in sorted(stages, key=lambda n: -statistics.mean(stages[n])):
+            if "." in name:
+                continue
+            tokens = statistics.mean(
+                p + c for p, c in zip(stages.get(f"{name}.prompt_tokens", []), stages.get(f"{name}.completion_tokens", []))
+            ) if stages.get(f"{name}.prompt_tokens") else 0
+            p50, p95 = percentiles(stages[name])
+            print(f"{name:<22} | {len(stages[name]):>4} | {p50:>9.1f} | {p95:>9.1f} | "
+                  f"{statistics.mean(stages[name]):>9.1f} | {tokens:>11.0f}")
+
+        # 2) 동시 세션 처리량
+        print("\n[동시 세션] 세션마다 전체 질문을 순서대로 처리")
+        print(f"{'sessions':>8} | {'questions':>9} | {'wall s':>7} | {'q/s':>6} | {'p50 s':>6} | {'p95 s':>6}")
+        for sessions in args.sessions:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=sessions) as executor:
+                results = list(executor.map(lambda _: run_session(questions, [], not args.no_render), range(sessions)))
+            wall = time.perf_counter() - start
+            latencies = [lat for session in results for lat in session]
+            p50, p95 = percentiles(latencies)
+            print(f"{sessions:>8} | {len(latencies):>9} | {wall:>7.2f} | {len(latencies) / wall:>6.2f} | "
+                  f"{p50:>6.2f} | {p95:>6.2f}")
+        print("DB 커넥션 풀:", run_query.pool_stats())
+
+        # 3) 최대 메모리
+        if not args.skip_memory:
+            tracemalloc.start()
+            run_session(questions, [], not args.no_render)
+            peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+            print(f"\n[메모리] 세션 하나 처리 중 최대 {peak:.1f} MB (tracemalloc)")
+
+        for pool in run_query._pools.values():
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+rollup(로컬 사전 집계) 라우팅 벤치마크: 같은 집계 SQL 을 원본 DB(SQLite 대체물) 와 rollup(DuckDB) 에서 실행해 비교
+- rollup 생성(전체 / 증분) 시간, 쿼리별 p50 지연시간, 결과 일치 여부
+
+chatBot 디렉토리에서 실행:
+    python -m benchmarks.bench_rollup
+    python -m benchmarks.bench_rollup --rows 5000000 --repeat 10
+"""
+import os
+
+os.environ.setdefault("DB_NAME_LOGS", "adn_logs")
+os.environ.setdefault("DB_NAME_ADS", "adn_ads")
+
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+import pandas as pd
+
+from functions import run_query
+from functions.rollup import RollupStore
+
+from .fixtures import SQLiteDatabase
+
+# 한 달치 통계 집계 질문에서 생성될 법한 SQL
+QUERIES = {
+    "일별 성과 (1개월)": (
+        "SELECT wdate_str, SUM(click_cnt) AS click_cnt, SUM(click_sales) AS click_sales FROM adn_daily_agency_statics_2025 "
+        "WHERE wdate_str BETWEEN '2025-02-01' AND '2025-02-28' GROUP BY wdate_str ORDER BY wdate_str"
+    ),
+    "광고주별 비용 상위 10 (1개월)": (
+        "SELECT id, SUM(click_sales) AS click_sales FROM adn_daily_agency_statics_2025 "
+        "WHERE wdate_str >= '2025-02-01' AND wdate_str <= '2025-02-28' GROUP BY id ORDER BY click_sales DESC LIMIT 10"
+    ),
+    "대행사별 성과 (1개월)": (
+        "SELECT agency, SUM(view_cnt) AS view_cnt, SUM(click_cnt) AS click_cnt, "
+        "ROUND(SUM(click_cnt) * 100.0 / SUM(view_cnt), 2) AS ctr FROM adn_daily_agency_statics_2025 "
+        "WHERE wdate_str BETWEEN '2025-02-01' AND '2025-02-28' GROUP BY agency ORDER BY click_cnt DESC"
+    ),
+}
+
+
+def timed(fn, repeat: int) -> tuple[float, object]:
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def same_result(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    for column in a.columns:
+        x, y = a[column].to_numpy(), b[column].to_numpy()
+        if pd.api.types.is_numeric_dtype(a[column]):
+            if not np.allclose(x.astype(float), y.astype(float)):
+                return False
+        elif not (x.astype(str) == y.astype(str)).all():
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000, help="adn_daily_agency_statics_2025 행 수")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        database = SQLiteDatabase(tmp, run_query.DB_NAME_LOGS, run_query.DB_NAME_ADS,
+                                  rows=args.rows)
+        print(f"SQLite 생성: 통계 {args.rows:,}행, {time.perf_counter() - start:.1f}s")
+        run_query._connect = database.connect
+        run_query.result_cache.max_bytes = 0
+        run_query.QUERY_GUARD_ENABLED = False  # SQLite EXPLAIN 은 MySQL 형식이 아님
+
+        store = RollupStore(run_query.run_query, os.path.join(tmp, "rollups"),
+                            table_rules=run_query.RESULT_CACHE_TABLE_RULES)
+        run_query.rollup_store = store
+        for name in store.rollups:
+            start = time.perf_counter()
+            result = store.refresh(name)
+            full = time.perf_counter() - start
+            start = time.perf_counter()
+            store.refresh(name)  # high water 일자만 다시 집계
+            incremental = time.perf_counter() - start
+            print(f"rollup {name}: {result['rows']:,}행 / {result['partitions']}개 일자, "
+                  f"전체 {full:.2f}s, 증분 {incremental * 1000:.0f}ms")
+
+        print(f"\n{'query':<22} | {'원본 ms':>9} | {'rollup ms':>9} | {'배속':>6} | 일치")
+        for label, sql in QUERIES.items():
+            run_query.ROLLUP_ENABLED = False
+            source_ms, source_df = timed(lambda: run_query.run_query_df(sql, use_cache=False), args.repeat)
+            run_query.ROLLUP_ENABLED = True
+            rollup_ms, rollup_df = timed(lambda: run_query.run_query_df(sql, use_cache=False), args.repeat)
+            routed = bool(rollup_df.attrs.get("guard_notes"))
+            print(f"{label:<22} | {source_ms:>9.1f} | {rollup_ms:>9.1f} | {source_ms / rollup_ms:>5.0f}x | "
+                  f"{same_result(source_df, rollup_df) if routed else 'rollup 미사용'}")
+        print("rollup:", store.stats())
+
+
+if __name__ == "__main__":
+    main()
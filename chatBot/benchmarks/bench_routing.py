@@ -0,0 +1,79 @@
+"""
+라우팅 방식(classic / single)별 handle_question 지연시간 측정 (p50 / p95)
+
+실제 OpenAI / DB를 호출하므로 .env 설정이 필요합니다 (--offline 이면 fixtures 의 가짜 OpenAI / SQLite 사용).
+chatBot 디렉토리에서 실행:
+    python -m benchmarks.bench_routing --repeat 5
+    python -m benchmarks.bench_routing --offline --repeat 5
+"""
+import os
+
+# --offline 에서 쓰는 DB 이름 (.env 에 있으면 그 값 사용)
+os.environ.setdefault("DB_NAME_LOGS", "adn_logs")
+os.environ.setdefault("DB_NAME_ADS", "adn_ads")
+
+import time
+import argparse
+import tempfile
+import statistics
+from contextlib import nullcontext
+
+from functions import chat_handler, run_query
+from functions.response_cache import ResponseCache
+
+
+QUESTIONS = [
+    "어제 대행사별 노출수 알려줘",
+    "이번 달 광고주별 클릭수 상위 10개",
+    "지난주 일별 전환수 추이",
+    "CTR이 뭐야?",
+    "광고 성과를 높이려면 어떻게 해야 할까?",
+    "안녕",
+]
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(mode: str, repeat: int) -> list[float]:
+    chat_handler.ROUTING_MODE = mode
+    # 캐시가 결과를 왜곡하지 않도록 항상 miss 나는 캐시로 교체
+    chat_handler.nl_cache = ResponseCache(max_items=0)
+
+    latencies = []
+    for _ in range(repeat):
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            chat_handler.handle_question(question)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", nargs="+", default=["classic", "single"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--offline", action="store_true", help="가짜 OpenAI / SQLite 로 측정")
+    parser.add_argument("--rows", type=int, default=20_000, help="--offline 의 adn_daily_agency_statics_2025 행 수")
+    args = parser.parse_args()
+
+    with (tempfile.TemporaryDirectory() if args.offline else nullcontext()) as tmp:
+        if args.offline:
+            from .fixtures import FakeOpenAI, SQLiteDatabase
+            from .bench_pipeline import install
+            install(FakeOpenAI(), SQLiteDatabase(tmp, run_query.DB_NAME_LOGS, run_query.DB_NAME_ADS, rows=args.rows),
+                    use_cache=False)
+        for mode in args.modes:
+            latencies = run(mode, args.repeat)
+            print(
+                f"{mode:>8} | n={len(latencies)} "
+                f"p50={percentile(latencies, 50):.2f}s p95={percentile(latencies, 95):.2f}s "
+                f"mean={statistics.mean(latencies):.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+로그 테이블 로컬 동기화 벤치마크: 같은 SQL 을 원본 DB(SQLite 대체물) 와 로컬 Parquet(DuckDB) 에서 실행해 비교
+- 전체 / 증분 동기화 시간, 쿼리별 p50 지연시간, 결과 일치 여부
+
+chatBot 디렉토리에서 실행:
+    python -m benchmarks.bench_warehouse
+    python -m benchmarks.bench_warehouse --rows 5000000 --repeat 10
+"""
+import os
+
+os.environ.setdefault("DB_NAME_LOGS", "adn_logs")
+os.environ.setdefault("DB_NAME_ADS", "adn_ads")
+
+import time
+import argparse
+import tempfile
+
+from functions import run_query
+from functions.warehouse import LocalWarehouse
+
+from .fixtures import SQLiteDatabase
+from .bench_rollup import timed, same_result
+
+LAST_DAY = "2025-03-07"  # fixtures 의 기본 66일 마지막 일자
+
+# 원본 행을 읽어야 해서 rollup 으로는 답할 수 없는 SQL
+QUERIES = {
+    "대행사별 광고주 수 (1개월)": (
+        "SELECT agency, COUNT(DISTINCT id) AS advertisers, SUM(click_cnt) AS click_cnt "
+        "FROM adn_logs.adn_daily_agency_statics_2025 "
+        "WHERE wdate_str BETWEEN '2025-02-01' AND '2025-02-28' GROUP BY agency ORDER BY click_cnt DESC"
+    ),
+    "일별 광고주 수 (1개월)": (
+        "SELECT wdate_str, COUNT(DISTINCT id) AS advertisers, SUM(order_cnt) AS order_cnt "
+        "FROM adn_daily_agency_statics_2025 "
+        "WHERE wdate_str >= '2025-02-01' AND wdate_str <= '2025-02-28' GROUP BY wdate_str ORDER BY wdate_str"
+    ),
+    "하루치 원본 행": (
+        "SELECT * FROM adn_daily_agency_statics_2025 WHERE wdate_str = '2025-03-06' "
+        "ORDER BY view_cnt, click_sales, order_price, bonus_click_sales"
+    ),
+    "연도 구분 없는 이름 (로컬 전용)": (
+        "SELECT SUBSTR(wdate_str, 1, 7) AS month, SUM(click_sales) AS click_sales FROM adn_daily_agency_statics "
+        f"WHERE wdate_str <= '{LAST_DAY}' GROUP BY month ORDER BY month"
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000, help="adn_daily_agency_statics_2025 행 수")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        database = SQLiteDatabase(tmp, run_query.DB_NAME_LOGS, run_query.DB_NAME_ADS,
+                                  rows=args.rows)
+        print(f"SQLite 생성: 통계 {args.rows:,}행, {time.perf_counter() - start:.1f}s")
+        run_query._connect = database.connect
+        run_query.result_cache.max_bytes = 0
+        run_query.QUERY_GUARD_ENABLED = False  # SQLite EXPLAIN 은 MySQL 형식이 아님
+        run_query.ROLLUP_ENABLED = False
+
+        warehouse = LocalWarehouse(run_query.get_pool, os.path.join(tmp, "warehouse"),
+                                   tables=run_query.WAREHOUSE_TABLES, snapshots=run_query.WAREHOUSE_SNAPSHOTS,
+                                   table_rules=run_query.RESULT_CACHE_TABLE_RULES)
+        run_query.warehouse = warehouse
+        for name in [*warehouse.tables, *warehouse.snapshots]:
+            start = time.perf_counter()
+            result = warehouse.sync(name, until=LAST_DAY)
+            full = time.perf_counter() - start
+            start = time.perf_counter()
+            warehouse.sync(name, until=LAST_DAY)  # high water 일자만 다시 받음
+            incremental = time.perf_counter() - start
+            print(f"동기화 {name}: {result['rows']:,}행 / {result['days']}일, "
+                  f"전체 {full:.2f}s, 증분 {incremental * 1000:.0f}ms")
+
+        print(f"\n{'query':<26} | {'원본 ms':>9} | {'로컬 ms':>9} | {'배속':>6} | 일치")
+        for label, sql in QUERIES.items():
+            run_query.WAREHOUSE_ENABLED = True
+            local_ms, local_df = timed(lambda: run_query.run_query_df(sql, use_cache=False), args.repeat)
+            run_query.WAREHOUSE_ENABLED = False
+            try:
+                source_ms, source_df = timed(lambda: run_query.run_query_df(sql, use_cache=False), args.repeat)
+            except Exception as e:
+                print(f"{label:<26} | {'-':>9} | {local_ms:>9.1f} | {'-':>6} | 원본 실행 불가 ({type(e).__name__})")
+                continue
+            routed = bool(local_df.attrs.get("guard_notes"))
+            print(f"{label:<26} | {source_ms:>9.1f} | {local_ms:>9.1f} | {source_ms / local_ms:>5.0f}x | "
+                  f"{same_result(source_df, local_df) if routed else '로컬 미사용'}")
+        print("로컬 실행:", warehouse.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+벤치마크용 로컬 대체물 (OpenAI / MySQL 호출 없이 handle_question 전체 경로 실행)
+- FakeOpenAI: 질문 -> SQL 표를 보고 정해진 답을 주는 가짜 OpenAI 모듈. 지연시간 = 첫 토큰 지연 + 입력 토큰 / prefill 속도 + 출력 토큰 / 생성 속도
+- SQLiteDatabase: 합성 adn_daily_agency_statics_2025 / adn_clicks_2025 / adn_paper_info 데이터를 담은 SQLite 파일과
+  pymysql 커넥션처럼 쓸 수 있는 래퍼 (%s 파라미터, DictCursor / SSCursor, INFORMATION_SCHEMA.COLUMNS)
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+from types import SimpleNamespace
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pymysql
+
+from functions.df_summary import count_tokens
+
+
+AGENCY_TABLE = "adn_daily_agency_statics_2025"
+AGENCY_COLUMNS = {
+    "wdate_str": "varchar", "agency": "varchar", "id": "varchar", "manage_id": "varchar", "teams_id": "int",
+    "adtypes": "int", "view_cnt": "int", "click_cnt": "int", "click_sales": "int", "order_cnt": "int",
+    "order_price": "int", "bonus_click_sales": "int",
+}
+CLICKS_COLUMNS = {"wdate_str": "varchar", "paper_code": "varchar", "ad_id": "varchar", "click_cnt": "int", "click_sales": "int"}
+PAPER_COLUMNS = {"paper_code": "varchar", "paper_name": "varchar", "category": "varchar"}
+
+# 벤치마크 질문 -> 가짜 LLM 이 생성할 SQL (SQLite 에서도 실행되는 문법). None 이면 일반 질문
+QUESTIONS = {
+    "어제 대행사별 노출수 알려줘": f"SELECT * FROM {AGENCY_TABLE} WHERE wdate_str = '2025-03-06'",
+    "이번 달 광고주별 클릭수 상위 10개": f"SELECT * FROM {AGENCY_TABLE} WHERE wdate_str >= '2025-03-01' ORDER BY click_cnt DESC LIMIT 10",
+    "지난주 일별 전환수 추이": f"SELECT * FROM {AGENCY_TABLE} WHERE wdate_str BETWEEN '2025-02-24' AND '2025-03-02'",
+    "올해 전체 성과 데이터 보여줘": f"SELECT * FROM {AGENCY_TABLE}",
+    "CTR이 뭐야?": None,
+    "광고 성과를 높이려면 어떻게 해야 할까?": None,
+}
+
+
+# ---------------------------------------------------------------- OpenAI
+
+class FakeOpenAI:
+    """
+    chat_handler 모듈의 openai 대신 넣어서 쓰는 가짜 모듈 (chat.completions.create / embeddings.create)
+    """
+
+    def __init__(self, questions: dict = QUESTIONS, ttft: float = 0.2, prefill_tps: float = 20000,
+                 output_tps: float = 100, answer_tokens: int = 150, chunk_tokens: int = 5):
+        self.questions = questions
+        self.ttft = ttft
+        self.prefill_tps = prefill_tps
+        self.output_tps = output_tps
+        self.answer_tokens = answer_tokens
+        self.chunk_tokens = chunk_tokens
+        self.api_key = "fake"
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.embeddings = SimpleNamespace(create=self.embed)
+
+    def _question(self, messages: list):
+        text = "\n".join(m["content"] for m in messages if m["role"] == "user")
+        matched = [q for q in self.questions if q in text]
+        # 여러 개가 보이면 (대화 기록 포함) 마지막 user 메시지 기준
+        last = messages[-1]["content"] if messages else ""
+        for q in matched:
+            if q in last:
+                return q
+        return matched[-1] if matched else None
+
+    def _wait(self, prompt_tokens: int, completion_tokens: int):
+        time.sleep(self.ttft + prompt_tokens / self.prefill_tps + completion_tokens / self.output_tps)
+
+    def create(self, model: str, messages: list, functions: list = None, function_call=None,
+               stream: bool = False, stream_options: dict = None, **kwargs):
+        prompt_tokens = sum(count_tokens(m["content"]) for m in messages)
+        question = self._question(messages)
+        sql = self.questions.get(question)
+        system = " ".join(m["content"] for m in messages if m["role"] == "system")
+
+        if functions and (function_call != "auto" or sql is not None):
+            content, call = None, SimpleNamespace(
+                name="run_query", arguments=json.dumps({"query": sql or f"SELECT * FROM {AGENCY_TABLE} LIMIT 10"})
+            )
+            completion_tokens = count_tokens(call.arguments)
+        elif "질문 분류만 해줘" in system:
+            content, call, completion_tokens = ("DB" if sql else "일반"), None, 1
+        else:
+            content = ("광고 성과 분석 결과입니다. " * self.answer_tokens)[:self.answer_tokens * 3]
+            call, completion_tokens = None, self.answer_tokens
+
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        if stream:
+            return self._stream(content or "", prompt_tokens, completion_tokens, usage)
+
+        self._wait(prompt_tokens, completion_tokens)
+        message = SimpleNamespace(content=content, function_call=call)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    def _stream(self, content: str, prompt_tokens: int, completion_tokens: int, usage):
+        time.sleep(self.ttft + prompt_tokens / self.prefill_tps)
+        pieces = max(1, completion_tokens // self.chunk_tokens)
+        size = max(1, len(content) // pieces)
+        for i in range(0, len(content), size):
+            time.sleep(self.chunk_tokens / self.output_tps)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + size]))], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+    def embed(self, model: str, input: str, **kwargs):
+        rng = np.random.default_rng(abs(hash(input)) % (2 ** 32))
+        time.sleep(self.ttft / 4)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=rng.normal(size=256).tolist())])
+
+
+# ---------------------------------------------------------------- MySQL
+
+def _create_table(db: sqlite3.Connection, name: str, columns: dict):
+    types = {"varchar": "TEXT", "int": "INTEGER"}
+    db.execute(f"CREATE TABLE {name} ({', '.join(f'{c} {types[t]}' for c, t in columns.items())})")
+
+
+def seed_database(path: str, db_logs: str, db_ads: str, rows: int = 100_000, days: int = 66,
+                  clicks_rows: int = 100_000, papers: int = 500, seed: int = 0):
+    """
+    합성 데이터로 SQLite 파일 생성 (2025-01-01 부터 days 일)
+    """
+    rng = np.random.default_rng(seed)
+    start = date(2025, 1, 1)
+    dates = np.array([(start + timedelta(days=i)).isoformat() for i in range(days)])
+
+    db = sqlite3.connect(path)
+    _create_table(db, AGENCY_TABLE, AGENCY_COLUMNS)
+    view = rng.integers(0, 200_000, rows)
+    click = (view * rng.uniform(0, 0.03, rows)).astype(int)
+    order = (click * rng.uniform(0, 0.1, rows)).astype(int)
+    agency = pd.DataFrame({
+        "wdate_str": np.sort(rng.choice(dates, rows)),
+        "agency": np.char.add("agency_", rng.integers(0, 50, rows).astype(str)),
+        "id": np.char.add("advertiser_", rng.integers(0, 3000, rows).astype(str)),
+        "manage_id": np.char.add("manager_", rng.integers(0, 100, rows).astype(str)),
+        "teams_id": rng.integers(1, 10, rows),
+        "adtypes": rng.integers(1, 5, rows),
+        "view_cnt": view,
+        "click_cnt": click,
+        "click_sales": click * rng.integers(50, 500, rows),
+        "order_cnt": order,
+        "order_price": order * rng.integers(10_000, 100_000, rows),
+        "bonus_click_sales": rng.integers(0, 1000, rows),
+    })
+    agency.to_sql(AGENCY_TABLE, db, if_exists="append", index=False)
+    db.execute(f"CREATE INDEX idx_agency_wdate ON {AGENCY_TABLE} (wdate_str)")
+
+    _create_table(db, "adn_clicks_2025", CLICKS_COLUMNS)
+    pd.DataFrame({
+        "wdate_str": rng.choice(dates, clicks_rows),
+        "paper_code": np.char.add("P", rng.integers(0, papers, clicks_rows).astype(str)),
+        "ad_id": np.char.add("rb-adn-1-", rng.integers(0, 10 ** 6, clicks_rows).astype(str)),
+        "click_cnt": rng.integers(1, 5, clicks_rows),
+        "click_sales": rng.integers(50, 2000, clicks_rows),
+    }).to_sql("adn_clicks_2025", db, if_exists="append", index=False)
+    db.execute("CREATE INDEX idx_clicks_wdate ON adn_clicks_2025 (wdate_str)")
+
+    _create_table(db, "adn_paper_info", PAPER_COLUMNS)
+    pd.DataFrame({
+        "paper_code": [f"P{i}" for i in range(papers)],
+        "paper_name": [f"매체 {i}" for i in range(papers)],
+        "category": rng.choice(["뉴스", "커뮤니티", "쇼핑", "블로그"], papers),
+    }).to_sql("adn_paper_info", db, if_exists="append", index=False)
+
+    # MySQL INFORMATION_SCHEMA.COLUMNS 대신 (ATTACH 해서 같은 이름으로 조회)
+    db.execute("CREATE TABLE information_schema_columns "
+               "(TABLE_SCHEMA TEXT, TABLE_NAME TEXT, COLUMN_NAME TEXT, DATA_TYPE TEXT, ORDINAL_POSITION INTEGER)")
+    for schema, table, columns in ((db_logs, AGENCY_TABLE, AGENCY_COLUMNS), (db_logs, "adn_clicks_2025", CLICKS_COLUMNS),
+                                   (db_ads, "adn_paper_info", PAPER_COLUMNS)):
+        db.executemany(
+            "INSERT INTO information_schema_columns VALUES (?, ?, ?, ?, ?)",
+            [(schema, table, col, data_type, i) for i, (col, data_type) in enumerate(columns.items(), start=1)],
+        )
+    db.commit()
+    db.close()
+
+
+_COLLATE_PATTERN = re.compile(r"\s+collate\s+\w+", re.IGNORECASE)
+
+
+def to_sqlite(query: str) -> str:
+    # %s 파라미터, COLLATE utf8mb4_* 처럼 SQLite 에 없는 MySQL 문법만 바꿈
+    return _COLLATE_PATTERN.sub("", query).replace("%s", "?")
+
+
+class SQLiteCursor:
+    def __init__(self, conn: "SQLiteConnection", dict_rows: bool):
+        self._conn = conn
+        self._dict_rows = dict_rows
+        self._cursor = conn.db.cursor()
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def execute(self, query: str, args: tuple = None):
+        if self._conn.latency:
+            time.sleep(self._conn.latency)  # 네트워크 왕복
+        self._cursor.execute(to_sqlite(query), args or ())
+        self.description = self._cursor.description
+        return -1
+
+    def _convert(self, rows: list) -> list:
+        if not self._dict_rows:
+            return rows
+        columns = [d[0] for d in self.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def fetchmany(self, size: int) -> list:
+        return self._convert(self._cursor.fetchmany(size))
+
+    def fetchall(self) -> list:
+        return self._convert(self._cursor.fetchall())
+
+
+class SQLiteConnection:
+    """
+    pymysql 커넥션 대신 쓰는 래퍼. db_logs / db_ads / INFORMATION_SCHEMA 를 ATTACH 해서
+    'db.table' 형태의 쿼리도 그대로 실행됨
+    """
+
+    def __init__(self, path: str, db_logs: str, db_ads: str, latency: float = 0.0):
+        self.latency = latency
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        for schema in {db_logs, db_ads}:
+            self.db.execute("ATTACH DATABASE ? AS ?", (path, schema))
+        self.db.execute("ATTACH DATABASE ':memory:' AS INFORMATION_SCHEMA")
+        self.db.execute("CREATE TABLE INFORMATION_SCHEMA.COLUMNS AS SELECT * FROM main.information_schema_columns")
+
+    def cursor(self, cursorclass=None) -> SQLiteCursor:
+        return SQLiteCursor(self, dict_rows=cursorclass is not pymysql.cursors.SSCursor)
+
+    def ping(self, reconnect: bool = False):
+        pass
+
+    def close(self):
+        self.db.close()
+
+
+class SQLiteDatabase:
+    def __init__(self, directory: str, db_logs: str, db_ads: str, latency: float = 0.0, **seed_options):
+        self.path = os.path.join(directory, "adn_bench.sqlite")
+        self.db_logs = db_logs
+        self.db_ads = db_ads
+        self.latency = latency
+        seed_database(self.path, db_logs, db_ads, **seed_options)
+
+    def connect(self, db_name: str = None) -> SQLiteConnection:
+        return SQLiteConnection(self.path, self.db_logs, self.db_ads, self.latency)
@@ -0,0 +1,81 @@
+import asyncio
+import openai
+import pandas as pd
+
+from .run_query import run_query_df, DB_NAME_LOGS
+from .common import prepare_display_df
+from .tracing import begin_trace, span, record_usage
+from .chat_handler import resolve_question, history_manager, _explain_messages, _general_messages, DEFAULT_TABLE
+
+
+# asyncio 기반 질문 핸들러
+# - OpenAI 호출은 AsyncOpenAI 클라이언트로, 블로킹 작업(pymysql / pandas)은 스레드 풀에서 실행
+# - 이벤트 루프마다 클라이언트가 달라야 하므로 handle_question_async 호출 단위로 클라이언트 생성
+# - Streamlit 앱은 스크립트가 동기로 실행되므로 handle_question_stream 을 쓰고, 이 모듈은 이벤트 루프를 가진 곳에서 사용
+#   (예: ASGI 서버의 async 핸들러에서 await handle_question_async(...),
+#    배치 / 스크립트에서 asyncio.run(handle_questions_async([(질문, 대화 기록), ...])))
+
+async def _complete(client: openai.AsyncOpenAI, messages: list) -> str:
+    res = await client.chat.completions.create(
+        model='gpt-4o',
+        messages=messages
+    )
+    record_usage(res)
+    return res.choices[0].message.content
+
+async def explain_df_async(client: openai.AsyncOpenAI, df: pd.DataFrame, history: list = None) -> str:
+    # 결과 요약(pandas / markdown 변환)이 이벤트 루프를 막지 않도록 스레드에서 실행
+    messages = await asyncio.to_thread(_explain_messages, df, history)
+    with span("explain_df"):
+        return await _complete(client, messages)
+
+async def handle_general_question_async(client: openai.AsyncOpenAI, nl_question: str, history: list = None) -> str:
+    return await _complete(client, _general_messages(nl_question, history))
+
+
+async def handle_question_async(nl_question: str, history: list = None, table: str = DEFAULT_TABLE,
+                                db_name: str = DB_NAME_LOGS):
+    """
+    handle_question의 asyncio 버전.
+    SQL 실행 후 해석 생성(LLM)과 표시용 DataFrame 준비(pandas)를 동시에 진행합니다.
+
+    Returns:
+        tuple: (sql, df, explanation) - handle_question과 동일
+    """
+    # asyncio 태스크마다 context 가 따로라서 동시에 처리되는 질문의 trace 가 섞이지 않음
+    trace = begin_trace("handle_question_async", question=nl_question, table=table)
+    try:
+        async with openai.AsyncOpenAI(api_key=openai.api_key) as client:
+            # 이전 대화 요약이 필요하면 LLM 호출이 있으므로 스레드에서 실행
+            history = await asyncio.to_thread(history_manager.window, history, nl_question)
+
+            # 분류 / SQL 생성은 이후 단계의 선행 조건이므로 스레드에서 그대로 실행
+            sql, answer = await asyncio.to_thread(resolve_question, nl_question, history, table, db_name)
+
+            if sql is not None:
+                original_df = await asyncio.to_thread(run_query_df, sql, db_name)  # 원본 데이터
+
+                explanation, display_df = await asyncio.gather(
+                    explain_df_async(client, original_df, history),
+                    asyncio.to_thread(prepare_display_df, original_df),
+                )
+                return sql, display_df, explanation
+
+            if answer is None:
+                answer = await handle_general_question_async(client, nl_question, history)
+            return None, None, answer
+    except Exception as e:
+        trace.finish(e)
+        raise
+    finally:
+        trace.finish()
+
+
+async def handle_questions_async(questions: list[tuple[str, list]]) -> list:
+    """
+    여러 세션의 (질문, 대화 기록)을 한 이벤트 루프에서 동시에 처리
+    """
+    return await asyncio.gather(
+        *(handle_question_async(nl_question, history) for nl_question, history in questions),
+        return_exceptions=True,
+    )
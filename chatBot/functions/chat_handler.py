@@ -1,11 +1,17 @@
 import os
 import openai
 import pandas as pd
+import re
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from .run_query import run_query, get_table_schema
+from .run_query import run_query_df, get_table_schema, DB_NAME_LOGS
 from datetime import datetime
 from .common import prepare_display_df
+from .response_cache import ResponseCache
+from .df_summary import summarize_df, count_tokens
+from .history import HistoryManager
+from .tracing import begin_trace, span, traced_stream, record_usage, submit_in_context
 
 
 # env
@@ -14,6 +20,63 @@ openai.api_key = os.getenv('OPENAI_API_KEY')
 
 current_date = datetime.now().strftime("%Y-%m-%d")
 
+# nl_to_sql 응답 캐시 설정
+NL_CACHE_SIZE = int(os.getenv('NL_CACHE_SIZE', '256'))
+NL_CACHE_PATH = os.getenv('NL_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nl_to_sql_cache.sqlite'))
+NL_CACHE_SEMANTIC = os.getenv('NL_CACHE_SEMANTIC', '0') == '1'  # 유사 질문 조회 (임베딩 API 호출 발생)
+NL_CACHE_THRESHOLD = float(os.getenv('NL_CACHE_THRESHOLD', '0.95'))
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
+
+# explain_df에 보내는 결과 요약의 최대 토큰 수
+EXPLAIN_TOKEN_BUDGET = int(os.getenv('EXPLAIN_TOKEN_BUDGET', '6000'))
+
+
+def _embed_question(text: str) -> list[float]:
+    res = openai.embeddings.create(model=EMBEDDING_MODEL, input=text)
+    return res.data[0].embedding
+
+
+nl_cache = ResponseCache(
+    max_items=NL_CACHE_SIZE,
+    db_path=NL_CACHE_PATH or None,
+    embed=_embed_question if NL_CACHE_SEMANTIC else None,
+    similarity_threshold=NL_CACHE_THRESHOLD,
+)
+
+# LLM 호출에 넘기는 대화 기록 설정 (최근 N턴은 그대로, 이전 대화는 요약)
+HISTORY_KEEP_TURNS = int(os.getenv('HISTORY_KEEP_TURNS', '3'))
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', '2000'))
+HISTORY_SUMMARY_TOKENS = int(os.getenv('HISTORY_SUMMARY_TOKENS', '400'))
+
+
+def _summarize_history(summary: str, messages: list) -> str:
+    conversation = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    res = openai.chat.completions.create(
+        model='gpt-4o',
+        messages=[
+            {'role': 'system', 'content': f'''
+            기존 대화 요약에 새 대화 내용을 합쳐서 {HISTORY_SUMMARY_TOKENS} 토큰 이내의 한국어 요약으로 다시 작성해줘.
+            사용자가 물어본 내용, 실행된 SQL의 조건(기간, 광고주, 지표 등), 주요 결론은 빠뜨리지 말아줘.
+            '''},
+            {'role': 'user', 'content': f"기존 요약:\n{summary or '(없음)'}\n\n새 대화:\n{conversation}"}
+        ]
+    )
+    record_usage(res)
+    return res.choices[0].message.content.strip()
+
+
+history_manager = HistoryManager(
+    keep_turns=HISTORY_KEEP_TURNS,
+    token_budget=HISTORY_TOKEN_BUDGET,
+    summary_tokens=HISTORY_SUMMARY_TOKENS,
+    summarize=_summarize_history,
+)
+
+# 테이블을 지정하지 않았을 때 조회할 테이블
+DEFAULT_TABLE = 'adn_daily_agency_statics_2025'
+# 여러 테이블 동시 조회 시 스레드 수 (0 이면 테이블 수만큼)
+FANOUT_MAX_WORKERS = int(os.getenv('FANOUT_MAX_WORKERS', '0'))
+
 # Function Calling 스펙
 SQL_FUNCTION = {
     'name': 'run_query',
@@ -30,6 +93,43 @@ SQL_FUNCTION = {
     }
 }
 
+# 질문 라우팅 방식
+# - single: 함수 호출 한 번으로 SQL 생성 / 일반 답변을 같이 결정
+# - classic: classify_question -> nl_to_sql 순서로 두 번 호출
+ROUTING_MODE = os.getenv('ROUTING_MODE', 'single')
+
+# 로컬 사전 분류 (API 호출 없이 명확한 질문만 분류, 0 이면 항상 LLM 라우팅)
+PRE_CLASSIFY_ENABLED = os.getenv('PRE_CLASSIFY_ENABLED', '1') == '1'
+_METRIC_PATTERN = re.compile(r"노출|클릭|전환|비용|매출|광고비|ctr|cvr|view_cnt|click_cnt|order_cnt", re.IGNORECASE)
+# 구체적인 기간 / 집계 단위 ('총', '평균', '몇', 'top' 같은 일반적인 단어는 개념 질문에도 쓰여서 제외)
+_SCOPE_PATTERN = re.compile(
+    r"어제|오늘|그저께|(?:지난|이번|다음)\s*(?:주|달|월|해)|최근\s*\d+\s*(?:일|주|개월|달)|\d{1,2}월|\d{4}-\d{2}|"
+    r"\d+일|(?:일|주|월|요일|시간|대행사|광고주|매체|캠페인|키워드|지면)별",
+    re.IGNORECASE,
+)
+_GENERAL_PATTERN = re.compile(r"^(안녕|고마워|감사|hi|hello|thanks)|뭐야|무엇인가|무슨 뜻|의미가|정의", re.IGNORECASE)
+# 조언 / 방법을 묻는 표현 (지표와 기간이 있어도 조회가 아닐 수 있음)
+_ADVICE_PATTERN = re.compile(r"방법|어떻게|추천|왜|좋아\?|좋을까|보통|팁", re.IGNORECASE)
+
+
+def pre_classify(nl_question: str) -> str | None:
+    """
+    키워드 규칙으로 명확한 경우만 'DB' / '일반'을 반환하고, 애매하면 None (LLM 라우팅으로 넘김)
+    - DB: 지표와 구체적인 기간 / 집계 단위가 모두 있고, 일반 / 조언 표현이 없을 때
+    - 일반: 인사 / 정의 질문이면서 기간 / 집계 단위가 없을 때 (있으면 LLM 에 맡김)
+    """
+    if not PRE_CLASSIFY_ENABLED:
+        return None
+    has_metric = _METRIC_PATTERN.search(nl_question) is not None
+    has_scope = _SCOPE_PATTERN.search(nl_question) is not None
+    if _GENERAL_PATTERN.search(nl_question):
+        return None if has_scope else "일반"
+    if _ADVICE_PATTERN.search(nl_question):
+        return None
+    if has_metric and has_scope:
+        return "DB"
+    return None
+
 # DB / 일반 질문 분류 함수
 def classify_question(nl_question: str, history: list = None) -> str:
     classification_prompt = f'''
@@ -49,62 +149,140 @@ def classify_question(nl_question: str, history: list = None) -> str:
         model='gpt-4o',
         messages=messages
     )
+    record_usage(res)
     
     return res.choices[0].message.content.strip()
 
-# 일반 질문 처리 함수
-def handle_general_question(nl_question: str, history: list = None) -> str:
+# 스트리밍 응답을 텍스트 조각 단위로 yield (st.write_stream 에 바로 넘길 수 있음)
+def _stream_completion(messages: list):
+    res = openai.chat.completions.create(
+        model='gpt-4o',
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True}  # 마지막 조각에 토큰 사용량 포함
+    )
+    for chunk in res:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        elif not chunk.choices:
+            record_usage(chunk)
+
+def _general_messages(nl_question: str, history: list = None) -> list:
     messages = history.copy() if history is not None else []
     messages.append({
         'role': 'system',
         'content': '너는 거짓말을 하지 않고, 명확하고 유익한 답변을 제공할 수 있는 전문가야'
     })
     messages.append({'role': 'user', 'content': nl_question})
-    
-    res = openai.chat.completions.create(
-        model='gpt-4o',
-        messages=messages
-    )
+    return messages
+
+# 일반 질문 처리 함수
+def handle_general_question(nl_question: str, history: list = None) -> str:
+    with span("general_answer"):
+        res = openai.chat.completions.create(
+            model='gpt-4o',
+            messages=_general_messages(nl_question, history)
+        )
+        record_usage(res)
     
     return res.choices[0].message.content
 
-# 자연어 질문 -> SQL 쿼리 변환 함수
-def nl_to_sql(nl_question: str, history: list = None) -> str:
-    table = 'adn_daily_agency_statics_2025'
-    schema_info = get_table_schema(table)
-    
-    system_prompt = f'''
+def handle_general_question_stream(nl_question: str, history: list = None):
+    return _stream_completion(_general_messages(nl_question, history))
+
+def _sql_system_prompt(table: str, schema_info: str) -> str:
+    return f'''
     너는 SQL 전문가야.
     다음 테이블 스키마 참고해서 사용자의 질문을 가장 적절한 SQL로 작성해줘
     
     - id: 광고주의 ID (광고주마다 유니크한 식별자)
     - manage_id: 내부 운영용 매니저 ID (대행사 혹은 내부식별자)
 
-    **단, 반드시 SELECT * FROM {table}를 사용해야 해.**
+    **단, 반드시 {table} 테이블만 사용하고, 날짜 조건은 wdate_str 컬럼('YYYY-MM-DD')으로 걸어줘.**
+    - 질문에 필요한 컬럼만 조회하고, 합계 / 순위처럼 집계가 필요하면 GROUP BY 로 DB에서 집계해줘.
+    - 집계한 컬럼의 별칭은 원래 컬럼 이름을 그대로 써줘. (예: SUM(click_cnt) AS click_cnt)
 
     테이블: {table}
     스키마: {schema_info}
     '''
+
+# 자연어 질문 -> SQL 쿼리 변환 함수
+def nl_to_sql(nl_question: str, history: list = None, table: str = DEFAULT_TABLE, db_name: str = DB_NAME_LOGS) -> str:
+    with span("schema_fetch", table=table):
+        schema_info = get_table_schema(table, db_name)
+    
+    cached_sql = nl_cache.get(nl_question, table, schema_info, history=history)
+    if cached_sql is not None:
+        with span("nl_to_sql", table=table, cache_hit=True, cache_hit_rate=nl_cache.stats()["hit_rate"]):
+            return cached_sql
     
     messages = history.copy() if history is not None else []
-    messages.append({'role': 'system', 'content': system_prompt})
+    messages.append({'role': 'system', 'content': _sql_system_prompt(table, schema_info)})
     messages.append({'role': 'user', 'content': nl_question})
     
-    res = openai.chat.completions.create(
-        model="gpt-4o",
-        messages=messages,
-        functions=[SQL_FUNCTION],
-        function_call={"name": "run_query"}
-    )
+    with span("nl_to_sql", table=table, cache_hit=False):
+        res = openai.chat.completions.create(
+            model="gpt-4o",
+            messages=messages,
+            functions=[SQL_FUNCTION],
+            function_call={"name": "run_query"}
+        )
+        record_usage(res)
     
     print("GPT Function Call === nl -> SQL")
     print(res.choices[0].message.function_call)  # 쿼리 확인용
     
     ans = json.loads(res.choices[0].message.function_call.arguments)
+    nl_cache.put(nl_question, table, schema_info, ans['query'], history=history)
     return ans['query']
 
+# 질문 분류 + SQL 생성을 한 번의 호출로 처리하는 함수
+def route_question(nl_question: str, history: list = None, table: str = DEFAULT_TABLE,
+                   db_name: str = DB_NAME_LOGS) -> tuple[str, str]:
+    """
+    Returns:
+        tuple: (분류, 내용)
+            - ('DB', 생성된 SQL)
+            - ('일반', 일반 답변)
+    """
+    with span("schema_fetch", table=table):
+        schema_info = get_table_schema(table, db_name)
+    
+    cached_sql = nl_cache.get(nl_question, table, schema_info, history=history)
+    if cached_sql is not None:
+        with span("nl_to_sql", table=table, cache_hit=True, cache_hit_rate=nl_cache.stats()["hit_rate"]):
+            return "DB", cached_sql
+    
+    routing_prompt = _sql_system_prompt(table, schema_info) + '''
+    질문이 DB로부터 특정 값을 조회하거나 집계, 통계, 지표(예: 노출수, CTR, 전환수 등)가 필요하면 run_query 함수를 호출해줘.
+    그 외의 질문이면 함수를 호출하지 말고, 거짓말을 하지 않고 명확하고 유익하게 바로 답변해줘.
+    '''
+    messages = history.copy() if history is not None else []
+    messages.append({'role': 'system', 'content': routing_prompt})
+    messages.append({'role': 'user', 'content': nl_question})
+    
+    with span("route_question", table=table, cache_hit=False):
+        res = openai.chat.completions.create(
+            model="gpt-4o",
+            messages=messages,
+            functions=[SQL_FUNCTION],
+            function_call="auto"
+        )
+        record_usage(res)
+    
+    message = res.choices[0].message
+    if message.function_call is None:
+        return "일반", message.content
+    
+    print("GPT Function Call === nl -> SQL (routed)")
+    print(message.function_call)  # 쿼리 확인용
+    
+    ans = json.loads(message.function_call.arguments)
+    nl_cache.put(nl_question, table, schema_info, ans['query'], history=history)
+    return "DB", ans['query']
+
 # DataFrame 해석 함수
-def explain_df(df: pd.DataFrame, history: list = None) -> str:
+def _explain_messages(df: pd.DataFrame, history: list = None) -> list:
     system_prompt = """
         너는 데이터 분석 전문가이자 광고 성과 평가 전문가야.
         
@@ -130,44 +308,257 @@ def explain_df(df: pd.DataFrame, history: list = None) -> str:
         - 현재 데이터를 바탕으로 광고 성과를 향상시키기 위한 구체적인 개선 방안(예: 타겟 세분화, 랜딩페이지 개선, 예산 재배분 등)을 제시해줘.
         - 미래의 광고 전략 수립에 도움이 될 만한 인사이트도 포함해줘.
         
+        데이터가 많으면 전체 표 대신 기본 통계, 일자별 / 대행사별 집계, 이상치, 샘플 행으로 요약되어 전달돼.
+        여러 테이블의 결과를 합친 경우 '구분' 컬럼에 어느 테이블 결과인지 표시되어 있으니, 구분별로 비교해줘.
+        
         분석 결과는 간결하지만 심도 있게, 한국어로 작성해줘.
     """
-    md_table = df.to_markdown(index=False)
+    # 결과가 크면 통계 / 집계 / 샘플로 요약해서 토큰 예산 안으로 맞춤
+    with span("summarize_df", rows=len(df)) as s:
+        md_table = summarize_df(df, token_budget=EXPLAIN_TOKEN_BUDGET)
+        s.set(tokens=count_tokens(md_table))
     messages = history.copy() if history is not None else []
     messages.append({"role": "system", "content": system_prompt})
     messages.append({"role": "user", "content": md_table})
-    
-    res = openai.chat.completions.create(
-        model='gpt-4o',
-        messages=messages
-    )
+    return messages
+
+def explain_df(df: pd.DataFrame, history: list = None) -> str:
+    with span("explain_df"):
+        res = openai.chat.completions.create(
+            model='gpt-4o',
+            messages=_explain_messages(df, history)
+        )
+        record_usage(res)
     
     return res.choices[0].message.content
 
+def explain_df_stream(df: pd.DataFrame, history: list = None):
+    return _stream_completion(_explain_messages(df, history))
+
+
+# 질문 분류 (로컬 사전 분류 -> 라우팅 방식에 따라 LLM 호출)
+def _classify(nl_question: str, history: list, table: str, db_name: str) -> tuple[str, str | None]:
+    """
+    Returns:
+        tuple: (classification, content)
+            - single 라우팅이면 content 는 같은 호출에서 받은 SQL(DB) 또는 일반 답변
+            - 그 외에는 content 가 None (SQL 은 nl_to_sql 로 따로 생성)
+    """
+    with span("classification", routing_mode=ROUTING_MODE) as s:
+        classification = pre_classify(nl_question)
+        s.set(pre_classified=classification is not None)
+        content = None
+        
+        if classification is None and ROUTING_MODE == "single":
+            # 분류와 SQL 생성이 한 번의 호출 (route_question span에 포함)
+            classification, content = route_question(nl_question, history, table, db_name)
+        elif classification is None:
+            classification = classify_question(nl_question, history)
+        s.set(result=classification)
+    return classification, content
+
+# 질문 분류 + SQL 생성
+def resolve_question(nl_question: str, history: list = None, table: str = DEFAULT_TABLE,
+                     db_name: str = DB_NAME_LOGS) -> tuple[str | None, str | None]:
+    """
+    Returns:
+        tuple: (sql, answer)
+            - DB 관련 질문: (생성된 SQL, None)
+            - 일반 질문: (None, 일반 답변) - 답변이 아직 없으면 answer도 None
+    """
+    classification, content = _classify(nl_question, history, table, db_name)
+    if classification != "DB":
+        return None, content
+    if content is None:
+        content = nl_to_sql(nl_question, history, table, db_name)
+    return content, None
 
 # 메인 질문 핸들러 함수
-def handle_question(nl_question: str, history: list = None):
+def handle_question(nl_question: str, history: list = None, table: str = DEFAULT_TABLE, db_name: str = DB_NAME_LOGS):
     """
     사용자가 입력한 질문을 분류하여, DB 관련 질문인 경우 자연어를 SQL 쿼리로 변환한 후 실행한 결과와 해석을 반환합니다.
-    일반 질문인 경우 일반 답변을 리턴
+    일반 질문인 경우 일반 답변을 리턴. table / db_name 은 SQL 을 만들고 실행할 테이블
     
     Returns:
         tuple: (sql, df, explanation)
             - DB 관련 질문: 생성된 SQL, 실행 결과 표시용 DataFrame, 해석 결과
             - 일반 질문: sql, df는 None, 해석에 일반 답변 포함
     """
-    classification = classify_question(nl_question, history)
+    trace = begin_trace("handle_question", question=nl_question, table=table)
+    try:
+        with span("history_window"):
+            history = history_manager.window(history, nl_question)  # 최근 N턴 + 이전 대화 요약
+        sql, answer = resolve_question(nl_question, history, table, db_name)
+        
+        if sql is not None:
+            original_df = run_query_df(sql, db_name)  # 원본 데이터 (최대 MAX_RESULT_ROWS 행)
+            explanation = explain_df(original_df, history)  # 원본 데이터 해석
+            
+            # 표시용 DataFrame 준비 (+ 데이터 전처리)
+            with span("prepare_display_df", rows=len(original_df)):
+                display_df = prepare_display_df(original_df)
+            
+            result = sql, display_df, explanation
+        else:
+            general_answer = answer if answer is not None else handle_general_question(nl_question, history)
+            result = None, None, general_answer
+    except Exception as e:
+        trace.finish(e)
+        raise
+    trace.finish()
+    return result
+
+
+# 스트리밍 질문 핸들러 함수
+def handle_question_stream(nl_question: str, history: list = None, table: str = DEFAULT_TABLE,
+                           db_name: str = DB_NAME_LOGS):
+    """
+    handle_question과 같지만 해석/답변을 문자열 대신 텍스트 조각 generator로 반환합니다.
+    SQL 실행과 표시용 DataFrame 준비는 반환 전에 끝나므로 UI에서 먼저 보여줄 수 있습니다.
     
-    if classification == "DB":
-        sql = nl_to_sql(nl_question, history)
-        rows = run_query(sql)
-        original_df = pd.DataFrame(rows)  # 원본 데이터
-        explanation = explain_df(original_df, history)  # 원본 데이터 해석
+    Returns:
+        tuple: (sql, df, stream)
+            - DB 관련 질문: 생성된 SQL, 실행 결과 표시용 DataFrame, 해석 generator
+            - 일반 질문: sql, df는 None, 일반 답변 generator
+    """
+    # trace 는 반환된 스트림이 끝날 때 같이 끝남 (그 사이 UI 단계도 같은 trace 에 기록 가능)
+    trace = begin_trace("handle_question", question=nl_question, table=table, stream=True)
+    try:
+        with span("history_window"):
+            history = history_manager.window(history, nl_question)  # 최근 N턴 + 이전 대화 요약
+        sql, answer = resolve_question(nl_question, history, table, db_name)
+        
+        if sql is not None:
+            original_df = run_query_df(sql, db_name)  # 원본 데이터 (최대 MAX_RESULT_ROWS 행)
+            with span("prepare_display_df", rows=len(original_df)):
+                display_df = prepare_display_df(original_df)
+            stream = explain_df_stream(original_df, history)
+            return sql, display_df, traced_stream(stream, "explain_df", trace, finish_trace=True)
+        
+        if answer is not None:
+            return None, None, traced_stream(iter([answer]), "general_answer", trace, finish_trace=True)
+        stream = handle_general_question_stream(nl_question, history)
+        return None, None, traced_stream(stream, "general_answer", trace, finish_trace=True)
+    except Exception as e:
+        trace.finish(e)
+        raise
+
+
+# 테이블 하나에 대한 SQL 생성 + 실행 (스레드 풀에서 테이블마다 동시에 실행)
+def _resolve_target(nl_question: str, history: list, label: str, table: str, db_name: str, sql: str = None):
+    with span("fanout_target", label=label, table=table) as s:
+        if sql is None:
+            sql = nl_to_sql(nl_question, history, table, db_name)
+        df = run_query_df(sql, db_name)
+        s.set(rows=len(df))
+        return label, sql, df
+
+
+def _merge_results(results: list) -> tuple[str, pd.DataFrame, pd.DataFrame]:
+    """
+    테이블별 (label, sql, df) 를 '구분' 컬럼을 붙여 하나로 합침
+    Returns:
+        tuple: (SQL 모음, 원본 DataFrame, 표시용 DataFrame)
+    """
+    sqls, executed, originals, displays, notes = [], [], [], [], []
+    for label, sql, df in results:
+        sqls.append(f"-- {label}\n{sql}")
+        executed.append(f"-- {label}\n{df.attrs.get('executed_sql', sql)}")
+        notes.extend(f"{label}: {note}" for note in df.attrs.get("guard_notes", []))
+        originals.append(df.assign(**{"구분": label})[["구분", *df.columns]])
+        display_df = prepare_display_df(df)
+        displays.append(display_df.assign(**{"구분": label})[["구분", *display_df.columns]])
+    
+    original_df = pd.concat(originals, ignore_index=True)
+    display_df = pd.concat(displays, ignore_index=True).fillna("")
+    original_df.attrs = {
+        "executed_sql": "\n\n".join(executed),
+        "truncated": any(df.attrs.get("truncated") for _, _, df in results),
+        "max_rows": max(df.attrs.get("max_rows", 0) for _, _, df in results),
+        "guard_notes": notes,
+    }
+    display_df.attrs.update(original_df.attrs)
+    return "\n\n".join(sqls), original_df, display_df
+
+
+def _fan_out(nl_question: str, history: list, targets: dict):
+    """
+    targets: {구분: (table, db_name)}. 분류는 첫 번째 테이블 기준으로 한 번만 하고,
+    DB 관련 질문일 때만 테이블마다 SQL 생성 + 실행을 동시에 해서 가장 느린 테이블만큼만 걸림
+    Returns:
+        tuple: (sql, original_df, display_df, answer)
+            - DB 관련 질문이면 테이블별 결과를 합친 (sql, 원본, 표시용, None)
+            - 일반 질문이면 (None, None, None, 일반 답변 또는 None)
+    """
+    first_label, (first_table, first_db) = next(iter(targets.items()))
+    classification, content = _classify(nl_question, history, first_table, first_db)
+    if classification != "DB":
+        return None, None, None, content
+    
+    with span("fanout", targets=len(targets)):
+        with ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS or len(targets)) as executor:
+            futures = [
+                # single 라우팅에서 첫 번째 테이블 SQL 은 분류 호출에서 이미 받음
+                submit_in_context(executor, _resolve_target, nl_question, history, label, table, db_name,
+                                  content if label == first_label else None)
+                for label, (table, db_name) in targets.items()
+            ]
+            results = [future.result() for future in futures]
+    
+    with span("merge_results", tables=len(results)):
+        sql, original_df, display_df = _merge_results(results)
+    return sql, original_df, display_df, None
+
+
+# 여러 테이블 비교 질문 핸들러 함수
+def handle_multi_table_question(nl_question: str, targets: dict, history: list = None):
+    """
+    handle_question과 같지만 targets({구분: (table, db_name)}) 의 테이블마다 SQL을 만들어 동시에 실행하고,
+    결과를 '구분' 컬럼으로 합쳐서 한 번에 해석합니다.
+    
+    Returns:
+        tuple: (sql, df, explanation) - sql은 테이블별 SQL을 '-- 구분' 주석으로 이어 붙인 문자열
+    """
+    trace = begin_trace("handle_multi_table_question", question=nl_question, targets=len(targets))
+    try:
+        with span("history_window"):
+            history = history_manager.window(history, nl_question)  # 최근 N턴 + 이전 대화 요약
+        sql, original_df, display_df, answer = _fan_out(nl_question, history, targets)
+        
+        if sql is not None:
+            result = sql, display_df, explain_df(original_df, history)
+        else:
+            general_answer = answer if answer is not None else handle_general_question(nl_question, history)
+            result = None, None, general_answer
+    except Exception as e:
+        trace.finish(e)
+        raise
+    trace.finish()
+    return result
+
+
+# 여러 테이블 비교 스트리밍 질문 핸들러 함수
+def handle_multi_table_question_stream(nl_question: str, targets: dict, history: list = None):
+    """
+    handle_multi_table_question과 같지만 해석/답변을 텍스트 조각 generator로 반환합니다.
+    
+    Returns:
+        tuple: (sql, df, stream)
+    """
+    trace = begin_trace("handle_multi_table_question", question=nl_question, targets=len(targets), stream=True)
+    try:
+        with span("history_window"):
+            history = history_manager.window(history, nl_question)  # 최근 N턴 + 이전 대화 요약
+        sql, original_df, display_df, answer = _fan_out(nl_question, history, targets)
         
-        # 표시용 DataFrame 준비 (+ 데이터 전처리)
-        display_df = prepare_display_df(original_df)
+        if sql is not None:
+            stream = explain_df_stream(original_df, history)
+            return sql, display_df, traced_stream(stream, "explain_df", trace, finish_trace=True)
         
-        return sql, display_df, explanation
-    else:
-        general_answer = handle_general_question(nl_question, history)
-        return None, None, general_answer
+        if answer is not None:
+            return None, None, traced_stream(iter([answer]), "general_answer", trace, finish_trace=True)
+        stream = handle_general_question_stream(nl_question, history)
+        return None, None, traced_stream(stream, "general_answer", trace, finish_trace=True)
+    except Exception as e:
+        trace.finish(e)
+        raise
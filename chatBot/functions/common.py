@@ -1,17 +1,29 @@
+import numpy as np
 import pandas as pd
 
+# 안전한 비율 계산 (분모가 0 이하이면 0)
+def _safe_ratio(numerator: pd.Series, denominator: pd.Series) -> np.ndarray:
+    num = numerator.to_numpy(dtype="float64", na_value=np.nan)
+    den = denominator.to_numpy(dtype="float64", na_value=np.nan)
+    ratio = np.zeros(len(num), dtype="float64")
+    np.divide(num, den, out=ratio, where=den > 0)
+    return (ratio * 100).round(1)
+
 # 노출/전환 비율
 def add_performance_ratios(df: pd.DataFrame) -> pd.DataFrame:
     if "노출수" in df.columns and "클릭수" in df.columns:
-        df["클릭률(%)"] = df.apply(
-            lambda row: round((row["클릭수"] / row["노출수"] * 100), 1) if row["노출수"] > 0 else 0, axis=1
-        )
+        df["클릭률(%)"] = _safe_ratio(df["클릭수"], df["노출수"])
     if "클릭수" in df.columns and "전환수" in df.columns:
-        df["전환률(%)"] = df.apply(
-            lambda row: round((row["전환수"] / row["클릭수"] * 100), 1) if row["클릭수"] > 0 else 0, axis=1
-        )
+        df["전환률(%)"] = _safe_ratio(df["전환수"], df["클릭수"])
     return df
 
+# 고유값만 포맷팅한 뒤 코드로 펼침 (건수 / 비율 컬럼은 고유값이 적어 행 단위 포맷팅보다 훨씬 빠름)
+def _format_with_commas(series: pd.Series) -> pd.Series:
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    # 마지막 자리는 NaN 용 (factorize가 결측값에 -1 코드를 줌)
+    labels = np.array([f"{x:,}" for x in uniques.tolist()] + [np.nan], dtype=object)
+    return pd.Series(labels[codes], index=series.index)
+
 # 컬럼 제외 / 숫자 포맷팅
 def apply_comma_formatting(df: pd.DataFrame, exclude_columns: list = None) -> pd.DataFrame:
     if exclude_columns is None:
@@ -20,7 +32,7 @@ def apply_comma_formatting(df: pd.DataFrame, exclude_columns: list = None) -> pd
         if col in exclude_columns:
             continue
         if pd.api.types.is_numeric_dtype(df[col]):
-            df[col] = df[col].apply(lambda x: f"{x:,}" if pd.notnull(x) else x)
+            df[col] = _format_with_commas(df[col])
     return df
 
 #  합계 계산 / 추가
@@ -77,4 +89,7 @@ def prepare_display_df(original_df: pd.DataFrame) -> pd.DataFrame:
     # 4. 지정된 4개 컬럼(클릭수, 전환수, 전환금액, 비용)의 총합 행 추가
     display_df = append_totals_row(display_df, df_dropped, target_columns_mapping, label_column="대행사", label_value="합계")
     
+    # 잘림 여부(truncated) 등 원본 메타데이터 유지
+    display_df.attrs.update(original_df.attrs)
+    
     return display_df
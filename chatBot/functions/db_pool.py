@@ -0,0 +1,147 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+# 커넥션 풀 (db_name 별로 하나씩 생성해서 사용)
+class ConnectionPool:
+    """
+    스레드 안전한 고정 크기 커넥션 풀.
+    - max_size: 동시에 열 수 있는 최대 커넥션 수
+    - timeout: 커넥션을 기다리는 최대 시간(초), 초과하면 TimeoutError
+    - max_idle: 이 시간(초) 이상 놀고 있던 커넥션은 닫고 새로 연결
+    - ping_after: 이 시간(초) 이상 쉬었던 커넥션은 꺼낼 때 ping으로 상태 확인
+    """
+
+    def __init__(self, connect, max_size: int = 5, timeout: float = 10.0,
+                 max_idle: float = 300.0, ping_after: float = 30.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+
+        self._idle = deque()  # (conn, 마지막 반납 시각)
+        self._size = 0        # 현재 열려있는 커넥션 수 (사용 중 + 대기 중)
+        self._cond = threading.Condition()
+
+        # 지표
+        self._created = 0
+        self._closed = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._timeouts = 0
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._closed += 1
+
+    def _is_alive(self, conn) -> bool:
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle(self, now: float):
+        # 오래된 커넥션은 deque 왼쪽에 쌓여있음
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._discard(conn)
+
+    def acquire(self):
+        start = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._evict_idle(now)
+
+                if self._idle:
+                    # 최근에 반납된 커넥션부터 재사용
+                    conn, released_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, released_at = None, None
+                    break
+
+                remaining = self.timeout - (now - start)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise TimeoutError(f"커넥션 풀 대기 시간 초과 ({self.timeout}초)")
+                waited = True
+                self._cond.wait(remaining)
+
+            if waited:
+                wait_time = time.monotonic() - start
+                self._waits += 1
+                self._wait_time += wait_time
+                self._max_wait = max(self._max_wait, wait_time)
+
+        # 네트워크 작업(ping / connect)은 락 밖에서 수행
+        if conn is not None:
+            if time.monotonic() - released_at < self.ping_after or self._is_alive(conn):
+                return conn
+            with self._cond:
+                self._discard(conn)
+
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def release(self, conn, broken: bool = False):
+        with self._cond:
+            if broken:
+                self._size -= 1
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            # 쿼리 에러(ProgrammingError 등)는 커넥션 자체는 멀쩡하므로 재사용
+            self.release(conn, broken=not self._is_alive(conn))
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._size -= 1
+                self._discard(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+                "created": self._created,
+                "closed": self._closed,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(self._wait_time / self._waits * 1000, 1) if self._waits else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 1),
+            }
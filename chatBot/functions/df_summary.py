@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+# 합계 / 집계 대상 지표 컬럼 (원본 컬럼명 기준)
+METRIC_COLUMNS = ["view_cnt", "click_cnt", "click_sales", "order_cnt", "order_price", "bonus_click_sales"]
+# 숫자형이지만 지표가 아닌 식별자 컬럼
+ID_COLUMNS = ["id", "manage_id", "teams_id", "adtypes"]
+
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")  # gpt-4o 토크나이저
+        except Exception:
+            # 인코딩 파일을 받을 수 없는 환경 (오프라인 등)
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """
+    gpt-4o 기준 토큰 수 (tiktoken을 쓸 수 없으면 UTF-8 바이트 수 / 2 로 보수적으로 추정.
+    한글은 한 글자가 3바이트라 글자 수만 세면 적게 잡힘)
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(len(text), (len(text.encode("utf-8")) + 1) // 2)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _metric_columns(df: pd.DataFrame) -> list:
+    known = [c for c in METRIC_COLUMNS if c in df.columns]
+    if known:
+        return known
+    return [
+        c for c in df.columns
+        if c not in ID_COLUMNS and pd.api.types.is_numeric_dtype(df[c])
+    ]
+
+
+def _fit_table(title: str, table: pd.DataFrame, budget: int) -> str | None:
+    """
+    budget 안에 들어가도록 행 수를 줄여가며 마크다운 표를 만듦 (한 행도 안 들어가면 None)
+    """
+    rows = len(table)
+    while rows > 0:
+        shown = table.head(rows)
+        suffix = f"\n(총 {len(table)}행 중 {rows}행 표시)" if rows < len(table) else ""
+        text = f"### {title}\n{shown.to_markdown()}{suffix}"
+        if count_tokens(text) <= budget:
+            return text
+        rows = rows // 2 if rows > 1 else 0
+    return None
+
+
+def summarize_df(df: pd.DataFrame, token_budget: int = 6000, top_n: int = 10, seed: int = 0) -> str:
+    """
+    explain_df에 보낼 DataFrame 요약을 token_budget 토큰 이내로 생성.
+    전체 표가 예산 안에 들어가면 그대로 보내고, 아니면 아래 항목을 우선순위대로 채움:
+    개요 -> 기본 통계(describe) -> 일자별 합계 -> 대행사별 / 광고주별 상위 N -> 이상치 -> 샘플 행
+    """
+    full_table = df.to_markdown(index=False) if len(df) <= 2000 else None
+    if full_table is not None and count_tokens(full_table) <= token_budget:
+        return full_table
+
+    metrics = _metric_columns(df)
+    # DECIMAL 컬럼(pymysql -> Decimal 객체)도 집계되도록 숫자형으로 변환
+    df = df.assign(**{c: pd.to_numeric(df[c], errors="coerce") for c in metrics})
+    overview = f"### 개요\n총 {len(df):,}행, 컬럼: {', '.join(map(str, df.columns))}"
+    if df.attrs.get("truncated"):
+        overview += f" (조회 결과가 {df.attrs['max_rows']:,}행을 넘어 앞부분만 포함)"
+    if df.attrs.get("guard_notes"):
+        overview += f" (쿼리 조정: {', '.join(df.attrs['guard_notes'])})"
+    if "wdate_str" in df.columns and len(df):
+        overview += f"\n기간: {df['wdate_str'].min()} ~ {df['wdate_str'].max()}"
+    if metrics:
+        totals = df[metrics].sum(numeric_only=True)
+        overview += "\n합계: " + ", ".join(f"{c}={v:,.0f}" for c, v in totals.items())
+
+    sections = [overview]
+    remaining = token_budget - count_tokens(overview)
+
+    candidates = []
+    if metrics:
+        candidates.append(("기본 통계", df[metrics].describe().round(2).T))
+    if "wdate_str" in df.columns and metrics:
+        candidates.append(("일자별 합계", df.groupby("wdate_str")[metrics].sum().sort_index()))
+    sort_metric = "click_sales" if "click_sales" in metrics else (metrics[0] if metrics else None)
+    for key, label in (("agency", "대행사별"), ("id", "광고주별")):
+        if key in df.columns and sort_metric:
+            grouped = df.groupby(key)[metrics].sum().sort_values(sort_metric, ascending=False)
+            candidates.append((f"{label} 상위 {top_n} ({sort_metric} 기준)", grouped.head(top_n)))
+    if metrics and len(df) > 1:
+        values = df[metrics].astype("float64")
+        z = (values - values.mean()) / values.std(ddof=0).replace(0, np.nan)
+        outliers = df.loc[(z.abs() > 3).any(axis=1)]
+        if len(outliers):
+            candidates.append((f"이상치 (|z| > 3, {len(outliers)}행)", outliers.head(top_n)))
+    sample = df.sample(n=min(len(df), 200), random_state=seed).sort_index()
+    candidates.append((f"무작위 샘플 ({len(sample)}행)", sample))
+
+    for title, table in candidates:
+        if remaining <= 0:
+            break
+        text = _fit_table(title, table, remaining)
+        if text is not None:
+            sections.append(text)
+            remaining -= count_tokens(text) + 1
+
+    return "\n\n".join(sections)
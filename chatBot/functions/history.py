@@ -0,0 +1,124 @@
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .df_summary import count_tokens
+
+
+# app.py 가 저장하는 어시스턴트 답변의 결과 테이블 부분 (다음 섹션 또는 끝까지)
+_RESULT_TABLE_PATTERN = re.compile(r"(\*\*📊 결과 테이블:\*\*)\n(.*?)(?=\n\n(?:⚠️|🛡️|\*\*🔍)|\Z)", re.DOTALL)
+
+
+def strip_result_tables(content: str) -> str:
+    """
+    결과 테이블(마크다운 표)을 '(N행, 생략)' 으로 바꿈. 실행된 SQL과 해석은 그대로 둠
+    """
+    def replace(m):
+        rows = sum(1 for line in m.group(2).splitlines() if line.startswith("|"))
+        return f"{m.group(1)} ({max(rows - 2, 0)}행, 생략)"
+    return _RESULT_TABLE_PATTERN.sub(replace, content)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    # 토큰 수에 비례해서 글자 수를 줄임
+    keep = max(1, int(len(text) * max_tokens / tokens))
+    return text[:keep] + " …(생략)"
+
+
+def _chain_hash(previous: str, message: dict) -> str:
+    return hashlib.sha1(f"{previous}\x1f{message['role']}\x1f{message['content']}".encode("utf-8")).hexdigest()
+
+
+# LLM 호출에 넘기는 대화 기록 관리 (최근 N턴 + 이전 대화 요약)
+class HistoryManager:
+    """
+    세션 전체 대화 기록에서 LLM 호출용 메시지를 만듦.
+    - 최근 keep_turns 턴(user + assistant)은 그대로 두되 결과 테이블은 '(N행, 생략)' 으로 줄임
+    - 그보다 오래된 턴은 summarize(이전 요약, 메시지 목록) -> 요약문 으로 누적 요약 (새로 밀려난 턴만 요약에 추가)
+    - 전체가 token_budget 을 넘으면 최근 턴도 오래된 것부터 요약으로 넘기고, 그래도 넘으면 메시지를 자름
+    - summarize 가 없거나 실패하면 이전 질문 목록으로 대신함
+    """
+
+    def __init__(self, keep_turns: int = 3, token_budget: int = 2000, summary_tokens: int = 400,
+                 summarize=None, max_items: int = 256):
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize
+        self.max_items = max_items
+
+        self._summaries = OrderedDict()  # 요약된 메시지들의 chain hash -> 요약문
+        self._lock = threading.Lock()
+
+    def _summary(self, messages: list) -> str:
+        if not messages:
+            return ""
+        hashes = []
+        previous = ""
+        for message in messages:
+            previous = _chain_hash(previous, message)
+            hashes.append(previous)
+
+        # 이미 요약해 둔 가장 긴 앞부분을 찾아서 그 뒤의 메시지만 추가로 요약
+        with self._lock:
+            start, summary = 0, ""
+            for i in range(len(hashes) - 1, -1, -1):
+                if hashes[i] in self._summaries:
+                    start, summary = i + 1, self._summaries[hashes[i]]
+                    self._summaries.move_to_end(hashes[i])
+                    break
+        if start == len(messages):
+            return summary
+
+        new_messages = messages[start:]
+        try:
+            if self.summarize is None:
+                raise RuntimeError("summarize 함수 없음")
+            summary = self.summarize(summary, new_messages)
+        except Exception:
+            questions = [m["content"] for m in new_messages if m["role"] == "user"]
+            summary = "\n".join(filter(None, [summary, *(f"- 이전 질문: {q}" for q in questions)]))
+        summary = _truncate(summary, self.summary_tokens)
+
+        with self._lock:
+            self._summaries[hashes[-1]] = summary
+            while len(self._summaries) > self.max_items:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def window(self, history: list, nl_question: str = None) -> list:
+        """
+        Returns:
+            list: [이전 대화 요약(system)] + 최근 메시지들
+        """
+        messages = [
+            {"role": m["role"], "content": strip_result_tables(m["content"]) if m["role"] == "assistant" else m["content"]}
+            for m in history or []
+        ]
+        # app.py 는 현재 질문을 기록에 먼저 추가한 뒤 호출하므로 마지막 user 메시지는 중복
+        if nl_question is not None and messages and messages[-1] == {"role": "user", "content": nl_question}:
+            messages.pop()
+
+        # 턴 = user 메시지부터 다음 user 메시지 전까지
+        turn_starts = sorted({0} | {i for i, m in enumerate(messages) if m["role"] == "user"})
+        j = max(0, len(turn_starts) - max(1, self.keep_turns))
+        while True:
+            split = turn_starts[j] if messages else 0
+            summary = self._summary(messages[:split])
+            result = [{"role": "system", "content": f"이전 대화 요약:\n{summary}"}] if summary else []
+            result += messages[split:]
+            used = sum(count_tokens(m["content"]) for m in result)
+            if used <= self.token_budget or j >= len(turn_starts) - 1:
+                break
+            # 예산을 넘으면 가장 오래된 최근 턴을 요약으로 넘김 (마지막 턴은 남김)
+            j += 1
+
+        if used > self.token_budget and result:
+            # 마지막 턴만 남았는데도 넘으면 메시지별로 자름
+            per_message = max(1, self.token_budget // len(result))
+            result = [{"role": m["role"], "content": _truncate(m["content"], per_message)} for m in result]
+        return result
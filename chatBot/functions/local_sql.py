@@ -0,0 +1,170 @@
+import os
+import re
+import threading
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+
+# 문자열 / 식별자 리터럴과 주석
+_TOKEN_PATTERN = re.compile(
+    r"(?P<single>'(?:[^'\\]|\\.|'')*')|(?P<double>\"(?:[^\"\\]|\\.)*\")|(?P<backtick>`[^`]*`)"
+    r"|(?P<comment>--[^\n]*|#[^\n]*|/\*.*?\*/)",
+    re.DOTALL,
+)
+_LIMIT_PATTERN = re.compile(r"\blimit\s+(\d+)\s*,\s*(\d+)", re.IGNORECASE)
+_COLLATE_PATTERN = re.compile(r"\s+collate\s+\w+", re.IGNORECASE)
+_DATE_BOUND_PATTERN = re.compile(
+    r"\bwdate_str\s*(?P<op>>=|<=|>|<|=)\s*'(?P<value>\d{4}-\d{2}-\d{2})'"
+    r"|\bwdate_str\s+between\s+'(?P<low>\d{4}-\d{2}-\d{2})'\s+and\s+'(?P<high>\d{4}-\d{2}-\d{2})'",
+    re.IGNORECASE,
+)
+
+# 비교 연산자 / 키워드 (문자열 컬럼에 쓰이면 collation 에 따라 결과가 달라짐)
+_COMPARISON_PATTERN = r"(?:<=>|<>|!=|>=|<=|=|<|>)"
+_COMPARISON_KEYWORD_PATTERN = r"(?:not\s+)?(?:like|in|between|regexp|rlike)\b"
+
+_conn = None
+_conn_lock = threading.Lock()
+
+
+def mask_literals(query: str) -> str:
+    """
+    문자열 리터럴 / 주석을 같은 길이의 공백으로 가림 (위치는 그대로라 원문과 같은 인덱스로 자를 수 있음)
+    """
+    return _TOKEN_PATTERN.sub(
+        lambda m: m.group(0) if m.group("backtick") else " " * len(m.group(0)), query
+    )
+
+
+def to_duckdb_sql(query: str) -> str:
+    """
+    MySQL 문법 중 DuckDB 와 다른 부분만 바꿈
+    - 주석 / 옵티마이저 힌트 제거, `식별자` -> "식별자", "문자열" -> '문자열'
+    - LIMIT offset, n -> LIMIT n OFFSET offset, COLLATE 제거
+    """
+    parts = []
+    pos = 0
+    for m in _TOKEN_PATTERN.finditer(query):
+        parts.append(_rewrite(query[pos:m.start()]))
+        if m.group("single"):
+            parts.append(m.group("single"))
+        elif m.group("double"):
+            parts.append("'" + m.group("double")[1:-1].replace('\\"', '"').replace("'", "''") + "'")
+        elif m.group("backtick"):
+            parts.append('"' + m.group("backtick")[1:-1] + '"')
+        else:
+            parts.append(" ")
+        pos = m.end()
+    parts.append(_rewrite(query[pos:]))
+    return "".join(parts).strip().rstrip(";")
+
+
+def _rewrite(text: str) -> str:
+    text = _COLLATE_PATTERN.sub("", text)
+    return _LIMIT_PATTERN.sub(lambda m: f"LIMIT {m.group(2)} OFFSET {m.group(1)}", text)
+
+
+def collation_sensitive(query: str, text_columns, exempt=("wdate_str",)) -> bool:
+    """
+    MySQL(_ci collation: 대소문자 / 끝 공백 무시) 과 DuckDB(바이너리 비교) 에서 결과가 달라질 수 있는 쿼리인지
+    - 문자(영문 / 한글 등)나 앞뒤 공백이 들어간 문자열 리터럴 (=, IN, LIKE 등의 비교 대상)
+    - text_columns 의 비교(=, <>, LIKE, IN, BETWEEN, JOIN ON 등)나 ORDER BY (정렬 순서)
+    exempt 컬럼(YYYY-MM-DD 일자)은 두 DB 의 결과가 같으므로 제외. GROUP BY 는 원본에 대소문자만 다른 값이 없다고 보고 허용
+    """
+    for m in _TOKEN_PATTERN.finditer(query):
+        literal = m.group("single") or m.group("double")
+        if literal:
+            value = literal[1:-1]
+            if re.search(r"[^\W\d_]", value) or value != value.strip():
+                return True
+
+    exempt = {c.lower() for c in exempt}
+    columns = [c for c in text_columns if c.lower() not in exempt]
+    if not columns:
+        return False
+    masked = mask_literals(query)
+    column = rf"(?<![\w$])(?:\w+\.)?`?(?:{'|'.join(re.escape(c) for c in columns)})`?(?![\w$])"
+    if (re.search(rf"{column}\s*(?:{_COMPARISON_PATTERN}|{_COMPARISON_KEYWORD_PATTERN})", masked, re.IGNORECASE)
+            or re.search(rf"{_COMPARISON_PATTERN}\s*{column}", masked, re.IGNORECASE)):
+        return True
+    order = re.search(r"\border\s+by\b(.*?)(?=\blimit\b|$)", masked, re.IGNORECASE | re.DOTALL)
+    return bool(order and re.search(column, order.group(1), re.IGNORECASE))
+
+
+def date_range(query: str) -> tuple[str | None, str | None]:
+    """
+    WHERE 의 wdate_str 조건에서 (시작일, 종료일). 조건이 없거나 알 수 없으면 해당 쪽은 None
+    """
+    masked = mask_literals(query)
+    # OR / UNION / 서브쿼리가 있으면 조건이 어느 범위에 걸리는지 알 수 없음
+    if re.search(r"\b(or|union)\b", masked, re.IGNORECASE) or len(re.findall(r"\bselect\b", masked, re.IGNORECASE)) > 1:
+        return None, None
+    lows, highs = [], []
+    for m in _DATE_BOUND_PATTERN.finditer(query):
+        if m.group("low"):
+            lows.append(m.group("low"))
+            highs.append(m.group("high"))
+            continue
+        if m.group("op") in (">=", ">", "="):
+            lows.append(m.group("value"))
+        if m.group("op") in ("<=", "<", "="):
+            highs.append(m.group("value"))
+    # AND 로 묶인 조건이므로 가장 좁은 범위
+    return (max(lows) if lows else None), (min(highs) if highs else None)
+
+
+def day_files(directory: str, low: str = None, high: str = None, prefix: str = "") -> list[str]:
+    """
+    directory/<YYYY-MM-DD>.parquet 중 [low, high] 기간(prefix 로 시작하는 일자)의 파일 목록
+    """
+    if not os.path.isdir(directory):
+        return []
+    files = []
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(".parquet"):
+            continue
+        day = file_name[:-len(".parquet")]
+        if day.startswith(prefix) and (low is None or day >= low) and (high is None or day <= high):
+            files.append(os.path.join(directory, file_name))
+    return files
+
+
+def replace_tables(query: str, names: dict) -> str:
+    """
+    리터럴 밖의 [db.]테이블 참조를 names[테이블] 로 바꿈 (DuckDB view 이름)
+    """
+    masked = mask_literals(query)
+    lookup = {k.lower(): v for k, v in names.items()}
+    pattern = re.compile(
+        rf"(?<![\w.`])(?:`?\w+`?\.)?`?({'|'.join(re.escape(k) for k in names)})`?(?![\w`])", re.IGNORECASE
+    )
+    parts = []
+    pos = 0
+    for m in pattern.finditer(masked):
+        parts.append(query[pos:m.start()])
+        parts.append(lookup[m.group(1).lower()])
+        pos = m.end()
+    parts.append(query[pos:])
+    return "".join(parts)
+
+
+def run_local(query: str, views: dict):
+    """
+    views: {view 이름: Parquet 파일 목록}. MySQL 문법 query 를 DuckDB 로 실행해서 DataFrame 반환.
+    커넥션은 프로세스에서 공유하고 쿼리마다 cursor(별도 세션)에 임시 view 를 만듦
+    """
+    global _conn
+    with _conn_lock:
+        if _conn is None:
+            _conn = duckdb.connect()
+        cursor = _conn.cursor()
+    try:
+        for name, files in views.items():
+            file_list = ", ".join("'" + f.replace("'", "''") + "'" for f in files)
+            cursor.execute(f"CREATE TEMP VIEW {name} AS SELECT * FROM read_parquet([{file_list}], union_by_name = true)")
+        return cursor.execute(to_duckdb_sql(query)).fetchdf()
+    finally:
+        cursor.close()
@@ -0,0 +1,181 @@
+import re
+from datetime import date, timedelta
+
+from .tracing import span, current_span
+from .result_cache import strip_trailing_comments
+
+
+# 문자열 리터럴과 주석 (위치를 유지한 채 가려서 키워드 검색이 리터럴 안을 보지 않도록)
+_LITERAL_PATTERN = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|--[^\n]*|#[^\n]*|/\*.*?\*/", re.DOTALL)
+# SELECT <컬럼> FROM <테이블> [별칭] <나머지> (조인 키워드는 별칭으로 보지 않음)
+_SINGLE_TABLE_PATTERN = re.compile(
+    r"^\s*select\s+(?P<columns>.+?)\s+from\s+(?P<table>[`\w.]+)(?!\s*,)"
+    r"(?:\s+(?:as\s+)?(?!(?:where|group|order|having|limit|join|inner|left|right|cross|straight_join|natural|on|using)\b)"
+    r"(?P<alias>\w+))?(?P<rest>.*)$",
+    re.IGNORECASE | re.DOTALL,
+)
+# FROM 절이 끝나는 위치
+_FROM_END_PATTERN = re.compile(r"\b(where|group\s+by|having|order\s+by|limit)\b", re.IGNORECASE)
+_CLAUSE_END_PATTERN = re.compile(r"\b(group\s+by|having|order\s+by|limit)\b", re.IGNORECASE)
+_HINT_PATTERN = re.compile(r"^\s*select\b", re.IGNORECASE)
+
+
+class QueryRejected(Exception):
+    """
+    EXPLAIN 추정 스캔 행 수가 상한을 넘어 실행하지 않은 쿼리
+    """
+
+
+def _mask(query: str) -> str:
+    return _LITERAL_PATTERN.sub(lambda m: " " * len(m.group(0)), query)
+
+
+def estimate_scan(plan: list[dict]) -> tuple[int | None, bool]:
+    """
+    EXPLAIN 결과에서 (추정 스캔 행 수, 풀 스캔 여부) 계산.
+    조인은 테이블별 rows * filtered 를 곱해서 근사 (rows 컬럼이 없으면 None)
+    """
+    if not plan or not any(r.get("rows") is not None for r in plan):
+        return None, False
+
+    scanned, fanout = 0, 1.0
+    full_scan = False
+    for r in plan:
+        rows = r.get("rows")
+        if rows is None:
+            continue
+        # 조인된 테이블은 앞 테이블에서 넘어온 행마다 rows 만큼 읽음
+        scanned += fanout * int(rows)
+        fanout *= max(int(rows) * float(r.get("filtered") or 100) / 100, 1)
+        if str(r.get("type", "")).upper() == "ALL":
+            full_scan = True
+    return int(scanned), full_scan
+
+
+# LLM 이 만든 SELECT 를 실행 전에 EXPLAIN 으로 검사하고 고쳐 쓰는 단계
+class QueryGuard:
+    """
+    - projections: {테이블: 제외할 컬럼 목록}. 단일 테이블 SELECT * 를 필요한 컬럼만 읽도록 바꿈 (columns(table) 로 컬럼 조회)
+    - 추정 스캔 행 수가 max_scan_rows 를 넘거나 full_scan_rows 행 넘게 풀 스캔하면, 날짜 조건이 없는 단일 테이블 쿼리에 최근 default_days 일 wdate_str 조건을 추가
+    - 그래도 max_scan_rows 를 넘으면 QueryRejected
+    - max_execution_ms 가 있으면 MAX_EXECUTION_TIME 힌트를 붙여 서버에서 실행 시간을 제한
+    explain(query, db_name) 이 실패하거나 rows 정보가 없으면 검사 없이 힌트만 붙임 (실패는 조정 내역에 남김)
+    """
+
+    def __init__(self, explain, columns=None, max_scan_rows: int = 5_000_000, full_scan_rows: int = 100_000,
+                 max_execution_ms: int = 30_000, default_days: int = 31, date_column: str = "wdate_str", projections: dict = None):
+        self._explain = explain
+        self._columns = columns
+        self.max_scan_rows = max_scan_rows
+        self.full_scan_rows = full_scan_rows
+        self.max_execution_ms = max_execution_ms
+        self.default_days = default_days
+        self.date_column = date_column
+        self.projections = projections or {}
+
+    def prepare(self, query: str, db_name: str) -> tuple[str, list[str]]:
+        """
+        Returns:
+            tuple: (실행할 쿼리, 사용자에게 보여줄 조정 내역 목록)
+        """
+        # 끝에 붙은 주석 뒤로 조건이 붙으면 주석 처리되므로 먼저 제거
+        query = strip_trailing_comments(query)
+        notes = []
+        with span("query_guard") as s:
+            projected = self._project(query, db_name)
+            if projected != query:
+                query = projected
+                notes.append("필요한 컬럼만 조회")
+
+            scanned, full_scan = self._estimate(query, db_name, notes)
+            s.set(estimated_rows=scanned, full_scan=full_scan)
+            if scanned is not None and (scanned > self.max_scan_rows or (full_scan and scanned > self.full_scan_rows)):
+                limited = self._add_date_range(query, db_name)
+                if limited != query:
+                    query = limited
+                    notes.append(f"날짜 조건이 없어 최근 {self.default_days}일만 조회")
+                    scanned, full_scan = self._estimate(query, db_name, notes)
+                    s.set(rewritten_rows=scanned)
+                if scanned is not None and scanned > self.max_scan_rows:
+                    raise QueryRejected(
+                        f"예상 스캔 행 수({scanned:,})가 허용치({self.max_scan_rows:,})를 넘습니다. "
+                        "기간이나 조건을 좁혀서 다시 질문해 주세요."
+                    )
+
+            query = self._add_hint(query)
+            s.set(rewrites=len(notes))
+        return query, notes
+
+    def _estimate(self, query: str, db_name: str, notes: list) -> tuple[int | None, bool]:
+        try:
+            plan = self._explain(query, db_name)
+        except Exception as e:
+            # EXPLAIN 을 지원하지 않는 쿼리 / DB 는 검사 생략 (생략했다는 사실은 남김)
+            current_span().set(explain_error=f"{type(e).__name__}: {e}")
+            notes.append("EXPLAIN 실패로 스캔 검사 생략")
+            return None, False
+        return estimate_scan(plan)
+
+    def _single_table(self, query: str):
+        masked = _mask(query)
+        m = _SINGLE_TABLE_PATTERN.match(masked)
+        if m is None:
+            return None, masked
+        rest = m.group("rest")
+        # 서브쿼리 / 조인 / UNION 은 건드리지 않음 (FROM 절의 쉼표 조인 포함)
+        from_end = _FROM_END_PATTERN.search(rest)
+        if (re.search(r"\b(select|join|straight_join|union)\b", rest, re.IGNORECASE)
+                or "," in rest[:from_end.start() if from_end else len(rest)]):
+            return None, masked
+        return m, masked
+
+    def _project(self, query: str, db_name: str) -> str:
+        m, _ = self._single_table(query)
+        if m is None or m.group("columns").strip() != "*" or self._columns is None:
+            return query
+        table = m.group("table").replace("`", "").split(".")[-1]
+        excluded = set(self.projections.get(table, ()))
+        if not excluded:
+            return query
+        try:
+            columns = self._columns(table, db_name)
+        except Exception:
+            return query
+        kept = [c for c in columns if c not in excluded]
+        if not kept or len(kept) == len(columns):
+            return query
+        return f"{query[:m.start('columns')]}{', '.join(f'`{c}`' for c in kept)}{query[m.end('columns'):]}"
+
+    def _add_date_range(self, query: str, db_name: str) -> str:
+        m, masked = self._single_table(query)
+        if m is None or re.search(rf"\b{self.date_column}\b", m.group("rest"), re.IGNORECASE):
+            return query
+        if self._columns is not None:
+            table = m.group("table").replace("`", "").split(".")[-1]
+            try:
+                if self.date_column not in self._columns(table, db_name):
+                    return query
+            except Exception:
+                return query
+
+        since = (date.today() - timedelta(days=self.default_days)).isoformat()
+        column = f"{m.group('alias')}.{self.date_column}" if m.group("alias") else self.date_column
+        condition = f"{column} >= '{since}'"
+
+        rest_start = m.start("rest")
+        end = _CLAUSE_END_PATTERN.search(masked, rest_start)
+        end = end.start() if end else len(query)
+        # 중간에 -- / # 주석이 있으면 뒤에 붙이는 조건 / 괄호가 주석에 묻히지 않도록 줄을 바꿈
+        line_comment = any(m.group(0).startswith(("--", "#")) for m in _LITERAL_PATTERN.finditer(query))
+        sep = "\n" if line_comment else " "
+        where = re.search(r"\bwhere\b", masked[rest_start:end], re.IGNORECASE)
+        if where is None:
+            return f"{query[:end].rstrip()}{sep}WHERE {condition} {query[end:]}".rstrip()
+        where_end = rest_start + where.end()
+        return (f"{query[:where_end]} {condition} AND ({query[where_end:end].strip()}{sep.strip(' ')}) "
+                f"{query[end:]}").rstrip()
+
+    def _add_hint(self, query: str) -> str:
+        if not self.max_execution_ms or "MAX_EXECUTION_TIME" in query.upper():
+            return query
+        return _HINT_PATTERN.sub(f"SELECT /*+ MAX_EXECUTION_TIME({int(self.max_execution_ms)}) */", query, count=1)
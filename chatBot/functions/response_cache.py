@@ -0,0 +1,177 @@
+import re
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+
+
+# 질문 정규화 (공백 / 대소문자 / 끝 문장부호 차이는 같은 질문으로 취급)
+def normalize_question(question: str) -> str:
+    text = unicodedata.normalize("NFKC", question).lower().strip()
+    text = re.sub(r"\s+", " ", text)
+    return text.rstrip(" ?!.~")
+
+
+# app.py 가 어시스턴트 답변에 남기는 실행된 SQL 블록
+_SQL_BLOCK_PATTERN = re.compile(r"```sql\n(.*?)\n```", re.DOTALL)
+
+
+def previous_sql(history: list = None) -> str | None:
+    """
+    대화 기록에서 마지막으로 실행된 SQL (공백 정리). 없으면 None
+    """
+    for m in reversed(history or []):
+        if m["role"] == "assistant":
+            blocks = _SQL_BLOCK_PATTERN.findall(m["content"])
+            if blocks:
+                return " ".join(blocks[-1].split())
+    return None
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+# nl_to_sql 응답 캐시 (메모리 LRU + SQLite 디스크)
+class ResponseCache:
+    """
+    (정규화된 질문, 테이블, 스키마 해시, 오늘 날짜, 직전에 실행된 SQL 해시) 를 키로 생성된 SQL을 캐싱.
+    '어제', '이번 달' 같은 상대 날짜가 있으므로 날짜가 바뀌면 자동으로 다른 키가 됨.
+    '그럼 어제는?' 같은 후속 질문은 앞에서 실행한 SQL에 따라 달라지므로 history 의 마지막 SQL 이 같을 때만 재사용
+    (답변 문장처럼 매번 달라지는 내용은 키에 넣지 않음)
+    - max_items: 메모리 LRU 크기
+    - db_path: SQLite 파일 경로 (None이면 메모리 캐시만 사용)
+    - embed: 텍스트 -> 벡터 함수. 지정하면 정확히 일치하는 질문이 없을 때 유사 질문을 찾아봄
+    - similarity_threshold: 유사 질문으로 인정할 코사인 유사도 하한
+    """
+
+    def __init__(self, max_items: int = 256, db_path: str = None, embed=None, similarity_threshold: float = 0.95):
+        self.max_items = max_items
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "semantic_hits": 0, "misses": 0}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS nl_to_sql_cache (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    sql TEXT NOT NULL,
+                    embedding BLOB,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_nl_to_sql_cache_scope ON nl_to_sql_cache (scope)")
+            self._db.commit()
+
+    @staticmethod
+    def _scope(table: str, schema_info: str, date: str, history: list = None) -> str:
+        schema_hash = hashlib.sha256(schema_info.encode("utf-8")).hexdigest()[:16]
+        scope = f"{table}|{schema_hash}|{date}"
+        sql = previous_sql(history)
+        if sql is not None:
+            # 유사 질문 조회도 scope 안에서만 하므로 직전 SQL 이 다르면 재사용되지 않음
+            scope += "|" + hashlib.sha256(sql.encode("utf-8")).hexdigest()[:16]
+        return scope
+
+    @staticmethod
+    def _key(question: str, scope: str) -> str:
+        return hashlib.sha256(f"{normalize_question(question)}|{scope}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, sql: str):
+        self._memory[key] = sql
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get(self, question: str, table: str, schema_info: str, date: str = None, history: list = None):
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        scope = self._scope(table, schema_info, date, history)
+        key = self._key(question, scope)
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT sql FROM nl_to_sql_cache WHERE key = ?", (key,)).fetchone()
+                if row:
+                    self._remember(key, row[0])
+                    self._counters["disk_hits"] += 1
+                    return row[0]
+
+        if self.embed is not None and self._db is not None:
+            sql = self._semantic_lookup(question, scope)
+            if sql is not None:
+                with self._lock:
+                    self._remember(key, sql)
+                    self._counters["semantic_hits"] += 1
+                return sql
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def _semantic_lookup(self, question: str, scope: str):
+        vector = self.embed(normalize_question(question))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT sql, embedding FROM nl_to_sql_cache WHERE scope = ? AND embedding IS NOT NULL", (scope,)
+            ).fetchall()
+
+        best_sql, best_score = None, self.similarity_threshold
+        for sql, blob in rows:
+            score = _cosine(vector, array("f", blob))
+            if score >= best_score:
+                best_sql, best_score = sql, score
+        return best_sql
+
+    def put(self, question: str, table: str, schema_info: str, sql: str, date: str = None, history: list = None):
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        scope = self._scope(table, schema_info, date, history)
+        key = self._key(question, scope)
+
+        embedding = None
+        if self.embed is not None and self._db is not None:
+            embedding = array("f", self.embed(normalize_question(question))).tobytes()
+
+        with self._lock:
+            self._remember(key, sql)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO nl_to_sql_cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, scope, normalize_question(question), sql, embedding, time.time()),
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM nl_to_sql_cache")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["semantic_hits"]
+            total = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / total, 3) if total else 0.0,
+                "memory_items": len(self._memory),
+            }
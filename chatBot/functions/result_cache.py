@@ -0,0 +1,263 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (DataFrame.to_parquet 엔진)
+except ImportError:
+    pyarrow = None
+
+
+# 문자열 / 식별자 리터럴과 주석
+_TOKEN_PATTERN = re.compile(
+    r"(?P<literal>'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`)"
+    r"|(?P<comment>--[^\n]*|#[^\n]*|/\*(?!\+).*?\*/)",
+    re.DOTALL,
+)
+_TABLE_PATTERN = re.compile(r"\b(?:from|join)\s+([`\w.]+)", re.IGNORECASE)
+# 결과가 날짜에 따라 달라지는 함수
+_VOLATILE_PATTERN = re.compile(r"\b(curdate|current_date|now|sysdate|current_timestamp|utc_date)\b")
+
+
+def sql_fingerprint(query: str) -> str:
+    """
+    주석 제거, 공백 정리, 리터럴 밖의 대소문자 통일로 같은 쿼리를 같은 문자열로 정규화
+    (리터럴 안의 공백 / 쉼표는 값이므로 그대로 둠)
+    """
+    parts = []
+    code = []  # 리터럴 사이의 SQL 조각 (주석은 공백으로)
+    pos = 0
+    for m in _TOKEN_PATTERN.finditer(query):
+        code.append(query[pos:m.start()])
+        if m.group("literal"):
+            parts.append(_normalize_code("".join(code)))
+            parts.append(m.group("literal"))
+            code = []
+        else:
+            code.append(" ")
+        pos = m.end()
+    code.append(query[pos:])
+    parts.append(_normalize_code("".join(code)))
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def strip_trailing_comments(query: str) -> str:
+    """
+    쿼리 끝의 주석과 세미콜론을 제거 (리터럴 안의 -- 나 옵티마이저 힌트는 그대로 둠)
+    """
+    end = len(query)
+    for m in reversed(list(_TOKEN_PATTERN.finditer(query))):
+        if m.group("literal") or query[m.end():end].strip(" \t\r\n;"):
+            break
+        end = m.start()
+    return query[:end].strip().rstrip(";").rstrip()
+
+
+def _normalize_code(text: str) -> str:
+    text = re.sub(r"\s+", " ", text.lower())
+    return re.sub(r"\s*([(),=<>])\s*", r"\1", text)
+
+
+def referenced_tables(query: str) -> set:
+    return {m.group(1).replace("`", "").split(".")[-1].lower() for m in _TABLE_PATTERN.finditer(query)}
+
+
+def rule_expires_at(rule, now: datetime) -> float:
+    """
+    now 에 읽은 데이터의 만료 시각. rule 은 TTL(초) 또는 ('daily', 적재 시각(시))
+    """
+    if isinstance(rule, tuple) and rule[0] == "daily":
+        load_at = now.replace(hour=rule[1], minute=0, second=0, microsecond=0)
+        if load_at <= now:
+            load_at += timedelta(days=1)
+        return load_at.timestamp()
+    return now.timestamp() + float(rule)
+
+
+# 실행된 SQL 결과 캐시 (메모리 LRU(바이트 기준) + Parquet 디스크)
+class ResultCache:
+    """
+    (정규화된 SQL, db_name, 행 상한) 을 키로 조회 결과 DataFrame을 캐싱.
+    만료 시각은 쿼리가 참조하는 테이블별 규칙 중 가장 빠른 것으로 정함.
+    - table_rules: {테이블명: TTL(초) 또는 ('daily', 적재 시각(시))}
+      'daily'는 하루 한 번 적재되는 테이블로, 다음 적재 시각까지 유지
+    - default_ttl: 규칙이 없는 테이블의 TTL(초)
+    - max_bytes: 메모리 캐시 최대 크기
+    - cache_dir: Parquet 저장 경로 (None이거나 pyarrow가 없으면 메모리 캐시만 사용)
+    - max_disk_bytes: 디스크 캐시 최대 크기. 넘으면 가장 오래 읽히지 않은(mtime) 결과부터 삭제
+    """
+
+    def __init__(self, table_rules: dict = None, default_ttl: float = 300.0,
+                 max_bytes: int = 256 * 1024 * 1024, cache_dir: str = None,
+                 max_disk_bytes: int = 1024 * 1024 * 1024):
+        self.table_rules = {k.lower(): v for k, v in (table_rules or {}).items()}
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.cache_dir = cache_dir if pyarrow is not None else None
+
+        self._memory = OrderedDict()  # key -> (df, expires_at, tables, nbytes)
+        self._bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._evict_disk()
+
+    @staticmethod
+    def key(query: str, db_name: str, max_rows: int = None) -> str:
+        raw = f"{db_name}|{max_rows}|{sql_fingerprint(query)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def expires_at(self, query: str, now: datetime = None) -> float:
+        now = now or datetime.now()
+        candidates = []
+        for table in referenced_tables(query) or {""}:
+            candidates.append(rule_expires_at(self.table_rules.get(table, self.default_ttl), now))
+        if _VOLATILE_PATTERN.search(sql_fingerprint(query)):
+            # CURDATE() 등은 날짜가 바뀌면 결과가 달라짐
+            midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            candidates.append(midnight.timestamp())
+        return min(candidates)
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        return os.path.join(self.cache_dir, f"{key}.parquet"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key: str, df: pd.DataFrame, expires_at: float, tables: list):
+        nbytes = int(df.memory_usage(deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+        if key in self._memory:
+            self._bytes -= self._memory.pop(key)[3]
+        self._memory[key] = (df, expires_at, tables, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes:
+            _, (_, _, _, evicted) = self._memory.popitem(last=False)
+            self._bytes -= evicted
+            self._counters["evictions"] += 1
+
+    def get(self, query: str, db_name: str, max_rows: int = None):
+        key = self.key(query, db_name, max_rows)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return entry[0].copy()
+                self._bytes -= self._memory.pop(key)[3]
+
+            if self.cache_dir:
+                df = self._read_disk(key, now)
+                if df is not None:
+                    self._counters["disk_hits"] += 1
+                    return df.copy()
+
+            self._counters["misses"] += 1
+            return None
+
+    def _read_disk(self, key: str, now: float):
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["expires_at"] <= now:
+                self._remove_disk(key)
+                return None
+            df = pd.read_parquet(data_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        df.attrs.update(meta.get("attrs", {}))
+        self._remember(key, df, meta["expires_at"], meta["tables"])
+        try:
+            os.utime(data_path)  # 디스크 LRU 순서 (mtime = 마지막으로 읽은 시각)
+        except OSError:
+            pass
+        return df
+
+    def _remove_disk(self, key: str):
+        for path in self._paths(key):
+            if os.path.exists(path):
+                self._disk_bytes -= os.path.getsize(path)
+                os.remove(path)
+
+    def _evict_disk(self):
+        """
+        디스크 사용량을 다시 계산하고 max_disk_bytes 를 넘으면 mtime 이 오래된 결과부터 삭제
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-len(".json")]
+            try:
+                stats = [os.stat(path) for path in self._paths(key) if os.path.exists(path)]
+            except OSError:
+                continue
+            if not stats:
+                continue
+            entries.append((max(st.st_mtime for st in stats), key, sum(st.st_size for st in stats)))
+        self._disk_bytes = sum(size for _, _, size in entries)
+        for _, key, _ in sorted(entries):
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            self._remove_disk(key)
+            self._counters["disk_evictions"] += 1
+
+    def put(self, query: str, db_name: str, df: pd.DataFrame, max_rows: int = None):
+        key = self.key(query, db_name, max_rows)
+        expires_at = self.expires_at(query)
+        tables = sorted(referenced_tables(query))
+        cached = df.copy()
+        with self._lock:
+            self._remember(key, cached, expires_at, tables)
+            if self.cache_dir:
+                data_path, meta_path = self._paths(key)
+                replaced = sum(os.path.getsize(path) for path in (data_path, meta_path) if os.path.exists(path))
+                try:
+                    cached.to_parquet(data_path, index=False)
+                except Exception:
+                    # 타입이 섞인 object 컬럼 등 Parquet로 못 쓰는 결과는 메모리에만 보관
+                    return
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"expires_at": expires_at, "tables": tables, "attrs": cached.attrs}, f)
+                self._disk_bytes += os.path.getsize(data_path) + os.path.getsize(meta_path) - replaced
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+
+    def invalidate(self, table: str = None):
+        """
+        table을 참조하는 결과만 (없으면 전체) 삭제
+        """
+        table = table.lower() if table else None
+        with self._lock:
+            for key in list(self._memory):
+                if table is None or table in self._memory[key][2]:
+                    self._bytes -= self._memory.pop(key)[3]
+            if not self.cache_dir:
+                return
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".json"):
+                    continue
+                key = name[:-len(".json")]
+                try:
+                    with open(os.path.join(self.cache_dir, name), encoding="utf-8") as f:
+                        tables = json.load(f)["tables"]
+                except (OSError, ValueError, KeyError):
+                    tables = []
+                if table is None or table in tables:
+                    self._remove_disk(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "memory_items": len(self._memory), "memory_bytes": self._bytes,
+                    "disk_bytes": self._disk_bytes}
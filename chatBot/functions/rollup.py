@@ -0,0 +1,289 @@
+"""
+로컬 사전 집계(rollup) 테이블
+- ROLLUPS 의 원본 테이블을 (차원 컬럼) 단위로 SUM 해서 wdate_str 일자별 Parquet 파일로 저장
+- 마지막으로 받은 일자(high water)부터 다시 받아 증분 갱신
+- 생성된 SQL 이 rollup 으로 답할 수 있는 집계(차원 컬럼 + SUM(지표))면 DuckDB 로 로컬에서 실행
+- 처음 만들기는 CLI 로 하고, 이후 만료되면 조회 시 백그라운드에서 증분 갱신 (auto_refresh)
+
+chatBot 디렉토리에서 갱신:
+    python -m functions.rollup
+    python -m functions.rollup --name agency_daily --since 2025-01-01
+"""
+import os
+import re
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, date, timedelta
+
+import pandas as pd
+
+from .local_sql import duckdb, mask_literals, collation_sensitive, date_range, day_files, replace_tables, run_local
+from .result_cache import referenced_tables, rule_expires_at
+from .tracing import current_span
+
+try:
+    import pyarrow  # noqa: F401  (DataFrame.to_parquet 엔진)
+except ImportError:
+    pyarrow = None
+
+
+# rollup 이름 -> 원본 테이블 / 차원 컬럼 / 합계 지표 컬럼
+ROLLUPS = {
+    "agency_daily": {
+        "table": "adn_daily_agency_statics_2025",
+        "dimensions": ["wdate_str", "agency", "id"],
+        "measures": ["view_cnt", "click_cnt", "click_sales", "order_cnt", "order_price"],
+    },
+}
+
+# rollup 위에서 그대로 실행해도 결과가 같은 함수 (지표는 SUM 안에서만 허용)
+_ALLOWED_FUNCTIONS = {
+    "sum", "round", "coalesce", "ifnull", "nullif", "substr", "substring", "left", "right", "concat",
+    "lower", "upper", "abs",
+}
+_KEYWORDS = {
+    "select", "from", "where", "and", "or", "not", "between", "in", "like", "group", "by", "order", "asc", "desc",
+    "limit", "offset", "as", "having", "is", "null", "distinct", "case", "when", "then", "else", "end",
+    "true", "false",
+}
+_IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][\w$]*")
+
+
+class RollupStore:
+    """
+    - run_query(sql, args=...) -> list[dict] 로 원본 DB 에서 집계해서 가져옴
+    - root/<이름>/<YYYY-MM-DD>.parquet 에 일자별로 저장, root/<이름>/_state.json 에 high water / 갱신 시각 기록
+    - table_rules: {테이블명: TTL(초) 또는 ('daily', 적재 시각(시))}. 마지막 갱신 후 이 규칙으로 만료되면 라우팅하지 않음
+    - backfill_days: 처음 만들 때 받을 기간 (0 이면 전체)
+    - auto_refresh: 한 번 이상 만든 rollup 이 만료되면 조회 시 백그라운드 스레드에서 증분 갱신 (그 동안의 쿼리는 원본 DB 로)
+    문자열 비교 / 정렬 결과가 MySQL collation 과 달라질 수 있는 쿼리(local_sql.collation_sensitive)는 원본 DB 로 넘김.
+    duckdb / pyarrow 가 없으면 항상 원본 DB 로 넘김
+    """
+
+    def __init__(self, run_query, root: str, rollups: dict = ROLLUPS, table_rules: dict = None,
+                 default_ttl: float = 300.0, backfill_days: int = 0, auto_refresh: bool = False):
+        self._run_query = run_query
+        self.root = root
+        self.rollups = rollups
+        self.table_rules = {k.lower(): v for k, v in (table_rules or {}).items()}
+        self.default_ttl = default_ttl
+        self.backfill_days = backfill_days
+        self.auto_refresh = auto_refresh
+        self.available = duckdb is not None and pyarrow is not None
+
+        self._states = {}
+        self._refreshing = set()
+        self._refresh_errors = {}  # 이름 -> 마지막 자동 갱신 오류
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "errors": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def _dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def state(self, name: str) -> dict | None:
+        with self._lock:
+            if name not in self._states:
+                try:
+                    with open(os.path.join(self._dir(name), "_state.json"), encoding="utf-8") as f:
+                        self._states[name] = json.load(f)
+                except (OSError, ValueError):
+                    return None
+            return self._states[name]
+
+    def _save_state(self, name: str, state: dict):
+        path = os.path.join(self._dir(name), "_state.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(f"{path}.tmp", path)
+        with self._lock:
+            self._states[name] = state
+
+    def refresh(self, name: str, since: str = None) -> dict:
+        """
+        since(없으면 high water, 처음이면 backfill_days 전) 부터의 일자를 원본에서 다시 집계해서 덮어씀.
+        high water 일자도 다시 받음 (적재 중이던 날의 나머지 반영)
+        """
+        if not self.available:
+            raise RuntimeError("rollup 에는 duckdb 와 pyarrow 가 필요합니다")
+        spec = self.rollups[name]
+        state = self.state(name) or {}
+        if since is None:
+            since = state.get("high_water")
+        if since is None and self.backfill_days:
+            since = (date.today() - timedelta(days=self.backfill_days)).isoformat()
+
+        dimensions = ", ".join(spec["dimensions"])
+        measures = ", ".join(f"SUM({m}) AS {m}" for m in spec["measures"])
+        where = "WHERE wdate_str >= %s" if since else ""
+        started = time.time()
+        rows = self._run_query(
+            f"SELECT {dimensions}, {measures} FROM {spec['table']} {where} GROUP BY {dimensions}",
+            args=(since,) if since else None,
+        )
+
+        df = pd.DataFrame.from_records(rows, columns=spec["dimensions"] + spec["measures"])
+        # MySQL SUM 결과(Decimal)를 숫자형으로
+        df = df.assign(**{m: pd.to_numeric(df[m], errors="coerce") for m in spec["measures"]})
+        os.makedirs(self._dir(name), exist_ok=True)
+        for day, part in df.groupby("wdate_str", sort=True):
+            path = os.path.join(self._dir(name), f"{day}.parquet")
+            part.to_parquet(f"{path}.tmp", index=False)
+            os.replace(f"{path}.tmp", path)
+
+        days = sorted(df["wdate_str"].unique()) if len(df) else []
+        low_water = state.get("low_water") if state else since
+        if state and (since is None or (low_water and since < low_water)):
+            low_water = since  # 전체 / 더 이전부터 다시 받은 경우
+        new_state = {
+            "table": spec["table"],
+            "low_water": low_water,
+            "high_water": max([*days, state.get("high_water") or ""]) or None,
+            "refreshed_at": started,
+        }
+        self._save_state(name, new_state)
+        return {"name": name, "rows": len(df), "partitions": len(days), **new_state}
+
+    def fresh(self, name: str, now: float = None) -> bool:
+        state = self.state(name)
+        if not state or not state.get("refreshed_at"):
+            return False
+        rule = self.table_rules.get(self.rollups[name]["table"].lower(), self.default_ttl)
+        return rule_expires_at(rule, datetime.fromtimestamp(state["refreshed_at"])) > (now or time.time())
+
+    def refresh_in_background(self, name: str) -> bool:
+        """
+        name 을 백그라운드 스레드에서 증분 갱신 (이미 진행 중이면 False)
+        """
+        with self._lock:
+            if name in self._refreshing:
+                return False
+            self._refreshing.add(name)
+        threading.Thread(target=self._refresh, args=(name,), daemon=True).start()
+        return True
+
+    def _refresh(self, name: str):
+        try:
+            self.refresh(name)
+            counter = "refreshes"
+        except Exception as e:
+            counter = "refresh_errors"
+            with self._lock:
+                self._refresh_errors[name] = f"{type(e).__name__}: {e}"
+        with self._lock:
+            self._counters[counter] += 1
+            self._refreshing.discard(name)
+
+    def match(self, query: str) -> str | None:
+        """
+        query 를 rollup 으로 답할 수 있으면 rollup 이름, 아니면 None
+        """
+        masked = mask_literals(query)
+        tables = referenced_tables(masked)
+        if len(tables) != 1 or len(re.findall(r"\bselect\b", masked, re.IGNORECASE)) != 1:
+            return None
+        if re.search(r"\b(join|union)\b|\bselect\s+(distinct\s+)?\*|\.\*", masked, re.IGNORECASE):
+            return None
+        table = next(iter(tables))
+        name = next((n for n, spec in self.rollups.items() if spec["table"].lower() == table), None)
+        if name is None:
+            return None
+        spec = self.rollups[name]
+
+        # FROM [db.]table [별칭] 은 검사 대상에서 뺌
+        source = re.search(r"\bfrom\s+([`\w.]+)(?:\s+(?:as\s+)?(\w+))?", masked, re.IGNORECASE)
+        allowed = {c.lower() for c in spec["dimensions"]} | _KEYWORDS | _ALLOWED_FUNCTIONS
+        allowed |= {a.lower() for a in re.findall(r"\bas\s+([A-Za-z_]\w*)", masked, re.IGNORECASE)}
+        if source.group(2) and source.group(2).lower() not in _KEYWORDS:
+            allowed.add(source.group(2).lower())
+        text = masked[:source.start(1)] + " " * len(source.group(1)) + masked[source.end(1):]
+
+        # 지표는 SUM(지표) 로만 쓸 수 있음 (일자 / 차원 단위 합계라 COUNT, AVG, 행 단위 조건은 결과가 달라짐)
+        measures = "|".join(re.escape(m) for m in spec["measures"])
+        text, sums = re.subn(rf"\bsum\s*\(\s*(?:[`\w]+\.)?`?(?:{measures})`?\s*\)", " ", text, flags=re.IGNORECASE)
+        if not sums and not re.search(r"\bgroup\s+by\b|\bselect\s+distinct\b", text, re.IGNORECASE):
+            return None  # 집계 없이 행을 그대로 읽으면 행 수가 달라짐
+        text = text.replace("`", " ")
+        for token in _IDENTIFIER_PATTERN.findall(text):
+            if token.lower() not in allowed:
+                return None
+        # WHERE 의 이름은 SELECT 별칭이 아니라 원본 컬럼이므로 차원 컬럼만 허용
+        where = re.search(r"\bwhere\b(.*?)(?=\bgroup\s+by\b|\bhaving\b|\border\s+by\b|\blimit\b|$)",
+                          text, re.IGNORECASE | re.DOTALL)
+        if where:
+            dimensions = {c.lower() for c in spec["dimensions"]} | _KEYWORDS | _ALLOWED_FUNCTIONS
+            if source.group(2):
+                dimensions.add(source.group(2).lower())
+            if any(t.lower() not in dimensions for t in _IDENTIFIER_PATTERN.findall(where.group(1))):
+                return None
+
+        # 차원 컬럼(문자열) 비교 / 정렬은 MySQL collation 과 결과가 달라질 수 있음
+        if collation_sensitive(query, spec["dimensions"]):
+            return None
+
+        # rollup 에 없는 과거 일자를 조회하면 안 됨
+        state = self.state(name)
+        low_water = state.get("low_water") if state else None
+        if low_water:
+            low, _ = date_range(query)
+            if low is None or low < low_water:
+                return None
+        return name
+
+    def query(self, query: str) -> tuple[str, pd.DataFrame] | None:
+        """
+        rollup 으로 실행 가능하고 최신이면 (rollup 이름, 결과), 아니면 None
+        """
+        if not self.available:
+            return None
+        name = self.match(query)
+        if name is not None and not self.fresh(name):
+            if self.auto_refresh and self.state(name):
+                self.refresh_in_background(name)
+            name = None
+        if name is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+
+        spec = self.rollups[name]
+        files = day_files(self._dir(name), *date_range(query))
+        if not files:
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+        try:
+            df = run_local(replace_tables(query, {spec["table"]: spec["table"]}), {spec["table"]: files})
+        except Exception as e:
+            # DuckDB 와 문법이 다른 쿼리 등은 원본 DB 로 (실패 내역은 현재 span 에 기록)
+            current_span().set(local_error=f"{type(e).__name__}: {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+            return None
+        with self._lock:
+            self._counters["hits"] += 1
+        return name, df
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, **({"last_refresh_errors": dict(self._refresh_errors)} if self._refresh_errors else {})}
+
+
+def main():
+    from .run_query import rollup_store
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--name", nargs="+", default=list(rollup_store.rollups), help="갱신할 rollup")
+    parser.add_argument("--since", help="이 일자(YYYY-MM-DD)부터 다시 집계 (기본: high water)")
+    args = parser.parse_args()
+
+    for name in args.name:
+        start = time.perf_counter()
+        result = rollup_store.refresh(name, since=args.since)
+        print(f"{name}: {result['rows']:,}행, {result['partitions']}개 일자, "
+              f"{result['low_water'] or '전체'} ~ {result['high_water']}, {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
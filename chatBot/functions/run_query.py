@@ -1,5 +1,13 @@
-import pymysql, os
+import pymysql, os, re, tempfile, threading
+import pandas as pd
 from dotenv import load_dotenv
+from .db_pool import ConnectionPool
+from .schema_registry import SchemaRegistry
+from .result_cache import ResultCache, strip_trailing_comments
+from .query_guard import QueryGuard
+from .rollup import RollupStore
+from .warehouse import LocalWarehouse
+from .tracing import span
 
 load_dotenv()
 DB_HOST = os.getenv('DB_HOST')
@@ -8,37 +16,290 @@ DB_PASSWORD = os.getenv('DB_PASSWORD')
 DB_NAME_LOGS = os.getenv('DB_NAME_LOGS')
 DB_NAME_ADS = os.getenv('DB_NAME_ADS')  # adn_paper_info(매체)
 
+# 커넥션 풀 설정
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '300'))
 
-# db 연결
-def run_query(query: str, db_name: str = DB_NAME_LOGS) -> list[dict]:
-    """
-    db_name 파라미터에 따라 log / ads DB에 연결
-    """
-    conn = pymysql.connect(
+# 결과 행 수 상한 / 스트리밍 fetch 단위
+MAX_RESULT_ROWS = int(os.getenv('MAX_RESULT_ROWS', '50000'))
+FETCH_CHUNK_SIZE = int(os.getenv('FETCH_CHUNK_SIZE', '5000'))
+
+# 조회 결과 캐시 설정 (RESULT_CACHE_DIR 에 Parquet 로 저장, 빈 값이면 메모리만 사용)
+# 기본 경로는 소스 트리 밖의 임시 디렉토리, 디스크 사용량은 RESULT_CACHE_DISK_MAX_MB 이내로 유지
+RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', '1') == '1'
+RESULT_CACHE_DIR = os.getenv('RESULT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'chatBot_result_cache'))
+RESULT_CACHE_MAX_MB = int(os.getenv('RESULT_CACHE_MAX_MB', '256'))
+RESULT_CACHE_DISK_MAX_MB = int(os.getenv('RESULT_CACHE_DISK_MAX_MB', '1024'))
+RESULT_CACHE_DEFAULT_TTL = float(os.getenv('RESULT_CACHE_DEFAULT_TTL', '300'))
+DAILY_LOAD_HOUR = int(os.getenv('DAILY_LOAD_HOUR', '6'))  # 일별 통계 테이블 적재 시각
+
+# 테이블별 캐시 만료 규칙: 일별 통계는 다음 적재 시각까지, 실시간 로그는 짧은 TTL(초)
+RESULT_CACHE_TABLE_RULES = {
+    'adn_daily_agency_statics_2025': ('daily', DAILY_LOAD_HOUR),
+    'adn_daily_users_modes_report_statics_2025': ('daily', DAILY_LOAD_HOUR),
+    'adn_clicks_2025': 300,
+}
+
+# 로컬 사전 집계(rollup) 설정 (python -m functions.rollup 으로 처음 생성, 이후 RESULT_CACHE_TABLE_RULES 기준으로 만료되면
+# ROLLUP_AUTO_REFRESH 이면 조회 시 백그라운드에서 증분 갱신)
+ROLLUP_ENABLED = os.getenv('ROLLUP_ENABLED', '1') == '1'
+ROLLUP_AUTO_REFRESH = os.getenv('ROLLUP_AUTO_REFRESH', '1') == '1'
+ROLLUP_DIR = os.getenv('ROLLUP_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rollups'))
+ROLLUP_BACKFILL_DAYS = int(os.getenv('ROLLUP_BACKFILL_DAYS', '0'))  # 0 이면 전체 기간
+
+# 로그 테이블 로컬 동기화 설정 (python -m functions.warehouse 로 처음 동기화, 이후 RESULT_CACHE_TABLE_RULES 기준으로 만료되면
+# WAREHOUSE_AUTO_REFRESH 이면 조회 시 백그라운드에서 증분 동기화)
+WAREHOUSE_ENABLED = os.getenv('WAREHOUSE_ENABLED', '1') == '1'
+WAREHOUSE_AUTO_REFRESH = os.getenv('WAREHOUSE_AUTO_REFRESH', '1') == '1'
+WAREHOUSE_DIR = os.getenv('WAREHOUSE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'warehouse'))
+WAREHOUSE_BACKFILL_DAYS = int(os.getenv('WAREHOUSE_BACKFILL_DAYS', '0'))  # 0 이면 가장 오래된 일자부터
+
+# 연도 접미사(_YYYY)를 뺀 기준 이름 -> DB. 이 앱이 조회하는 일별 통계 테이블만 받음
+# (adn_clicks 는 2_chatBot 에서만 adn_paper_info 와 문자열 키로 조인하는데, 이 조인은 collation 차이로 로컬 실행 불가)
+WAREHOUSE_TABLES = {
+    'adn_daily_agency_statics': DB_NAME_LOGS,
+    'adn_daily_users_modes_report_statics': DB_NAME_LOGS,
+}
+WAREHOUSE_SNAPSHOTS = {}  # 작은 기준 정보 테이블은 통째로 받음 ({테이블명: db_name})
+
+# 실행 전 EXPLAIN 검사 (추정 스캔 행 수 상한 / 풀 스캔 시 기본 조회 기간 / 서버 실행 시간 제한)
+QUERY_GUARD_ENABLED = os.getenv('QUERY_GUARD_ENABLED', '1') == '1'
+QUERY_MAX_SCAN_ROWS = int(os.getenv('QUERY_MAX_SCAN_ROWS', '5000000'))
+QUERY_FULL_SCAN_ROWS = int(os.getenv('QUERY_FULL_SCAN_ROWS', '100000'))
+QUERY_MAX_EXECUTION_MS = int(os.getenv('QUERY_MAX_EXECUTION_MS', '30000'))
+QUERY_DEFAULT_DAYS = int(os.getenv('QUERY_DEFAULT_DAYS', '31'))
+
+# SELECT * 일 때 읽지 않을 컬럼 (화면 / 요약에서 쓰지 않는 컬럼)
+QUERY_PROJECTIONS = {
+    'adn_daily_agency_statics_2025': ['adtypes', 'teams_id', 'manage_id'],
+    'adn_daily_users_modes_report_statics_2025': ['adtypes', 'teams_id', 'manage_id'],
+}
+
+# 스키마 캐시 설정 (SCHEMA_CACHE_PATH 지정 시 파일로도 저장)
+SCHEMA_CACHE_TTL = float(os.getenv('SCHEMA_CACHE_TTL', '3600'))
+SCHEMA_CACHE_PATH = os.getenv('SCHEMA_CACHE_PATH')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _connect(db_name: str):
+    return pymysql.connect(
         host=DB_HOST,
         user=DB_USER,
         password=DB_PASSWORD,
         db=db_name,
         charset="utf8",
-        cursorclass=pymysql.cursors.DictCursor
+        cursorclass=pymysql.cursors.DictCursor,
+        autocommit=True,  # 재사용되는 커넥션이 오래된 스냅샷을 읽지 않도록
     )
-    try:
+
+
+def get_pool(db_name: str = DB_NAME_LOGS) -> ConnectionPool:
+    """
+    db_name(log / ads) 별 커넥션 풀 반환 (없으면 생성)
+    """
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = ConnectionPool(
+                lambda: _connect(db_name),
+                max_size=DB_POOL_SIZE,
+                timeout=DB_POOL_TIMEOUT,
+                max_idle=DB_POOL_MAX_IDLE,
+            )
+            _pools[db_name] = pool
+        return pool
+
+
+def pool_stats() -> dict:
+    with _pools_lock:
+        return {db_name: pool.stats() for db_name, pool in _pools.items()}
+
+
+# db 연결
+def run_query(query: str, db_name: str = DB_NAME_LOGS, args: tuple = None) -> list[dict]:
+    """
+    db_name 파라미터에 따라 log / ads DB의 커넥션 풀에서 연결을 빌려 실행
+    args를 넘기면 query의 %s 자리에 바인딩
+    """
+    with get_pool(db_name).connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute(query)
+            cursor.execute(query, args)
             return cursor.fetchall()
-    finally:
-        conn.close()
+
+_SELECT_PATTERN = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+# LIMIT n / LIMIT offset, n / LIMIT n OFFSET m (쿼리 맨 끝에 있는 경우만)
+_LIMIT_PATTERN = re.compile(
+    r"\blimit\s+(?:(?P<offset>\d+)\s*,\s*)?(?P<count>\d+)(?P<tail>\s+offset\s+\d+)?\s*$",
+    re.IGNORECASE,
+)
+
+
+def apply_row_limit(query: str, max_rows: int) -> str:
+    """
+    SELECT 쿼리가 최대 max_rows 행만 반환하도록 LIMIT을 붙이거나 더 큰 LIMIT을 줄임
+    (끝에 붙은 주석은 LIMIT 인식을 막으므로 먼저 제거)
+    """
+    query = strip_trailing_comments(query)
+    if not _SELECT_PATTERN.match(query):
+        return query
+
+    match = _LIMIT_PATTERN.search(query)
+    if match is None:
+        return f"{query}\nLIMIT {max_rows}"
+    if int(match.group("count")) <= max_rows:
+        return query
+
+    offset = f"{match.group('offset')}, " if match.group("offset") else ""
+    return f"{query[:match.start()]}LIMIT {offset}{max_rows}{match.group('tail') or ''}"
+
+
+result_cache = ResultCache(
+    table_rules=RESULT_CACHE_TABLE_RULES,
+    default_ttl=RESULT_CACHE_DEFAULT_TTL,
+    max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024,
+    cache_dir=RESULT_CACHE_DIR or None,
+    max_disk_bytes=RESULT_CACHE_DISK_MAX_MB * 1024 * 1024,
+)
+
+
+def run_query_df(query: str, db_name: str = DB_NAME_LOGS, max_rows: int = MAX_RESULT_ROWS,
+                 use_cache: bool = RESULT_CACHE_ENABLED) -> pd.DataFrame:
+    """
+    서버 사이드 커서(SSCursor)로 FETCH_CHUNK_SIZE 행씩 받아 DataFrame 생성.
+    행을 dict 대신 튜플로 받고, max_rows 를 넘으면 잘라낸 뒤 df.attrs['truncated'] = True 로 표시.
+    use_cache 이면 같은 쿼리(정규화 기준)의 결과를 result_cache 에서 재사용.
+    """
+    with span("run_query", db_name=db_name, max_rows=max_rows) as s:
+        if use_cache:
+            cached = result_cache.get(query, db_name, max_rows)
+            if cached is not None:
+                s.set(cache_hit=True, rows=len(cached), bytes=int(cached.memory_usage(deep=True).sum()))
+                return cached
+
+        df = None
+        if ROLLUP_ENABLED:
+            df = _fetch_local(rollup_store, "rollup", "로컬 집계 테이블", query, max_rows)
+        if df is None and WAREHOUSE_ENABLED:
+            df = _fetch_local(warehouse, "warehouse", "로컬 동기화 테이블", query, max_rows)
+        if df is None:
+            df = _fetch_df(query, db_name, max_rows)
+        s.set(cache_hit=False, rows=len(df), bytes=int(df.memory_usage(deep=True).sum()),
+              truncated=df.attrs["truncated"])
+        if use_cache:
+            result_cache.put(query, db_name, df, max_rows)
+        return df
+
+
+def _fetch_local(store, span_name: str, label: str, query: str, max_rows: int) -> pd.DataFrame | None:
+    """
+    store(rollup_store / warehouse) 로 로컬에서 답할 수 있으면 DataFrame, 아니면 None (원본 DB 로)
+    """
+    with span(span_name) as s:
+        result = store.query(apply_row_limit(query, max_rows + 1))
+        s.set(hit=result is not None)
+        if result is None:
+            return None
+        name, df = result
+        s.set(source=name, rows=len(df))
+
+    truncated = len(df) > max_rows
+    df = df.iloc[:max_rows]
+    df.attrs["truncated"] = truncated
+    df.attrs["max_rows"] = max_rows
+    df.attrs["guard_notes"] = [f"{label}({name})에서 조회"]
+    df.attrs["executed_sql"] = query
+    return df
+
+
+def _fetch_df(query: str, db_name: str, max_rows: int) -> pd.DataFrame:
+    notes = []
+    if QUERY_GUARD_ENABLED:
+        query, notes = query_guard.prepare(query, db_name)
+    limited_query = apply_row_limit(query, max_rows + 1)  # 1행 더 받아서 잘림 여부 판단
+
+    pool = get_pool(db_name)
+    with span("db_fetch") as s:
+        conn = pool.acquire()
+        broken = True  # 중간에 실패하면 읽다 만 결과가 남아있으므로 커넥션 폐기
+        try:
+            with conn.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(limited_query)
+                columns = [d[0] for d in cursor.description or []]
+
+                rows = []
+                while len(rows) <= max_rows:
+                    chunk = cursor.fetchmany(min(FETCH_CHUNK_SIZE, max_rows + 1 - len(rows)))
+                    if not chunk:
+                        break
+                    rows.extend(chunk)
+            broken = False
+        finally:
+            pool.release(conn, broken=broken)
+        s.set(rows=len(rows), columns=len(columns))
+
+    truncated = len(rows) > max_rows
+    with span("dataframe_build"):
+        df = pd.DataFrame.from_records(rows[:max_rows], columns=columns)
+    df.attrs["truncated"] = truncated
+    df.attrs["max_rows"] = max_rows
+    df.attrs["guard_notes"] = notes
+    df.attrs["executed_sql"] = query
+    return df
+
+# 사용하는 테이블은 첫 조회 때 한 번의 쿼리로 같이 로드됨
+schema_registry = SchemaRegistry(
+    run_query,
+    tables=[
+        (DB_NAME_LOGS, 'adn_daily_agency_statics_2025'),
+        (DB_NAME_LOGS, 'adn_daily_users_modes_report_statics_2025'),
+    ],
+    ttl=SCHEMA_CACHE_TTL,
+    cache_path=SCHEMA_CACHE_PATH,
+)
 
 def get_table_schema(table_name: str, db_name: str = DB_NAME_LOGS) -> str:
     """
-    INFORMATION_SCHEMA에서 table_name의 컬럼 스키마를 조회.
+    INFORMATION_SCHEMA에서 조회한 table_name의 컬럼 스키마를 반환 (schema_registry 캐시 사용).
     db_name 인자에 따라 스키마 조회 대상 DB 변경.
     """
-    sql = f"""
-        SELECT COLUMN_NAME, DATA_TYPE
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_SCHEMA = '{db_name}'
-        AND TABLE_NAME = '{table_name}';
-    """
-    cols = run_query(sql, db_name)
-    return ", ".join(f"{r['COLUMN_NAME']}({r['DATA_TYPE']})" for r in cols)
+    return schema_registry.get(table_name, db_name)
+
+
+def explain(query: str, db_name: str = DB_NAME_LOGS) -> list[dict]:
+    return run_query(f"EXPLAIN {query}", db_name)
+
+
+query_guard = QueryGuard(
+    explain,
+    columns=schema_registry.columns,
+    max_scan_rows=QUERY_MAX_SCAN_ROWS,
+    full_scan_rows=QUERY_FULL_SCAN_ROWS,
+    max_execution_ms=QUERY_MAX_EXECUTION_MS,
+    default_days=QUERY_DEFAULT_DAYS,
+    projections=QUERY_PROJECTIONS,
+)
+
+
+rollup_store = RollupStore(
+    run_query,
+    root=ROLLUP_DIR,
+    table_rules=RESULT_CACHE_TABLE_RULES,
+    default_ttl=RESULT_CACHE_DEFAULT_TTL,
+    backfill_days=ROLLUP_BACKFILL_DAYS,
+    auto_refresh=ROLLUP_AUTO_REFRESH,
+)
+
+warehouse = LocalWarehouse(
+    get_pool,
+    root=WAREHOUSE_DIR,
+    tables=WAREHOUSE_TABLES,
+    snapshots=WAREHOUSE_SNAPSHOTS,
+    table_rules=RESULT_CACHE_TABLE_RULES,
+    default_ttl=RESULT_CACHE_DEFAULT_TTL,
+    backfill_days=WAREHOUSE_BACKFILL_DAYS,
+    fetch_chunk=FETCH_CHUNK_SIZE,
+    auto_refresh=WAREHOUSE_AUTO_REFRESH,
+)
@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import secrets
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+# 지정하면 끝난 trace의 span을 OpenTelemetry(OTLP JSON) 형식으로 한 줄씩 기록
+TRACE_LOG_PATH = os.getenv('TRACE_LOG_PATH')
+
+_current_trace = ContextVar("current_trace", default=None)
+_current_span = ContextVar("current_span", default=None)
+_write_lock = threading.Lock()
+_exporters = []
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.status = "OK"
+        self.message = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._start = time.perf_counter()
+        self.duration_ms = None
+
+    def set(self, **attributes):
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def add(self, **counters):
+        # 토큰 수처럼 같은 span 안에서 여러 번 더해지는 값
+        for key, value in counters.items():
+            if value is not None:
+                self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def fail(self, error: Exception):
+        self.status = "ERROR"
+        self.message = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.duration_ms = round((time.perf_counter() - self._start) * 1000, 2)
+
+    def to_otel(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": k, "value": _otel_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": f"STATUS_CODE_{self.status}", **({"message": self.message} if self.message else {})},
+        }
+
+
+def _otel_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+    def add(self, **counters):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+# 질문 하나를 처리하는 동안의 span 모음
+class Trace:
+    def __init__(self, name: str, **attributes):
+        self.trace_id = secrets.token_hex(16)
+        self.root = Span(name, self.trace_id, attributes=attributes)
+        self.spans = [self.root]
+        self._lock = threading.Lock()
+        self._tokens = None
+
+    def start_span(self, name: str, parent: Span = None, **attributes) -> Span:
+        parent = parent or self.root
+        span = Span(name, self.trace_id, parent.span_id, attributes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def finish(self, error: Exception = None):
+        if self.root.end_ns is not None:
+            return
+        if error is not None:
+            self.root.fail(error)
+        self.root.end()
+        if self._tokens is not None:
+            try:
+                _current_span.reset(self._tokens[1])
+                _current_trace.reset(self._tokens[0])
+            except ValueError:
+                # 다른 context 에서 끝나는 경우 (스트림을 다른 스레드에서 소비 등)
+                pass
+            self._tokens = None
+        for exporter in list(_exporters):
+            exporter(self)
+
+    def rows(self) -> list[dict]:
+        """
+        디버그 패널 표시용 (단계, 소요 시간, 속성)
+        """
+        depth = {self.root.span_id: 0}
+        rows = []
+        for span in sorted(self.spans, key=lambda s: s.start_ns):
+            level = depth.get(span.parent_id, -1) + 1 if span.parent_id else 0
+            depth[span.span_id] = level
+            rows.append({
+                "단계": "　" * level + span.name,
+                "ms": span.duration_ms,
+                "상태": span.status,
+                "속성": ", ".join(f"{k}={v}" for k, v in span.attributes.items()),
+            })
+        return rows
+
+
+def begin_trace(name: str, **attributes) -> Trace:
+    """
+    현재 context 의 trace 를 시작. 이후 span() 은 이 trace 에 기록되고 trace.finish() 로 끝남
+    """
+    trace = Trace(name, **attributes)
+    trace._tokens = (_current_trace.set(trace), _current_span.set(trace.root))
+    return trace
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def current_span():
+    return _current_span.get() or _NOOP
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    with span("nl_to_sql", table=...) as s: ... s.set(rows=...)
+    진행 중인 trace 가 없으면 아무것도 기록하지 않음
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NOOP
+        return
+    current = trace.start_span(name, _current_span.get(), **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.fail(e)
+        raise
+    finally:
+        current.end()
+        _current_span.reset(token)
+
+
+def traced_stream(stream, name: str, trace: Trace = None, finish_trace: bool = False, **attributes):
+    """
+    텍스트 조각 generator 를 감싸서 소비되는 동안을 span 으로 기록 (조각 수 / 글자 수).
+    finish_trace 이면 스트림이 끝날 때 trace 도 끝냄
+    """
+    trace = trace or _current_trace.get()
+    if trace is None:
+        yield from stream
+        return
+    current = trace.start_span(name, trace.root, **attributes)
+    token = _current_span.set(current)
+    chunks = chars = 0
+    error = None
+    try:
+        for text in stream:
+            chunks += 1
+            chars += len(text)
+            yield text
+    except Exception as e:
+        error = e
+        current.fail(e)
+        raise
+    finally:
+        current.set(chunks=chunks, chars=chars)
+        current.end()
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            pass
+        if finish_trace:
+            trace.finish(error)
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """
+    현재 context 를 복사해서 executor 에 제출 (스레드 풀에서 실행돼도 span 이 같은 trace 에 기록됨)
+    """
+    context = copy_context()
+    return executor.submit(context.run, fn, *args, **kwargs)
+
+
+def record_usage(res):
+    """
+    OpenAI 응답의 토큰 사용량을 현재 span 에 더함
+    """
+    usage = getattr(res, "usage", None)
+    if usage is not None:
+        current_span().add(
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None),
+        )
+
+
+def add_exporter(exporter):
+    """
+    끝난 trace 를 받는 함수 등록 (exporter(trace))
+    """
+    _exporters.append(exporter)
+
+
+def remove_exporter(exporter):
+    if exporter in _exporters:
+        _exporters.remove(exporter)
+
+
+def export_jsonl(trace: Trace, path: str):
+    lines = [json.dumps(s.to_otel(), ensure_ascii=False) for s in trace.spans]
+    with _write_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+if TRACE_LOG_PATH:
+    add_exporter(lambda trace: export_jsonl(trace, TRACE_LOG_PATH))
@@ -0,0 +1,312 @@
+"""
+로그 테이블 로컬 동기화 (wdate_str 일자별 Parquet) + DuckDB 로컬 실행
+- <기준>_<YYYY> 연도별 테이블을 일자 단위로 받아 root/<기준>/<YYYY-MM-DD>.parquet 에 저장
+- 일자 하나를 받을 때마다 high water 를 기록하므로 중단돼도 그 일자부터 이어서 받음
+- 생성된 SQL 이 동기화된 테이블만 참조하면 같은 SQL 을 DuckDB 로 로컬에서 실행 (<기준> 은 모든 연도를 합친 view)
+- 처음 동기화는 CLI 로 하고, 이후 만료되면 조회 시 백그라운드에서 증분 동기화 (auto_refresh)
+
+chatBot 디렉토리에서 동기화:
+    python -m functions.warehouse
+    python -m functions.warehouse --name adn_daily_agency_statics --since 2025-01-01
+"""
+import os
+import re
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, date, timedelta
+
+import pandas as pd
+import pymysql
+
+from .local_sql import duckdb, mask_literals, collation_sensitive, date_range, day_files, replace_tables, run_local
+from .result_cache import referenced_tables, rule_expires_at
+from .tracing import current_span
+
+try:
+    import pyarrow  # (DataFrame.to_parquet 엔진)
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class LocalWarehouse:
+    """
+    - get_pool(db_name) 의 커넥션으로 원본 DB 에서 받아옴 (서버 사이드 커서로 fetch_chunk 행씩)
+    - tables: {기준 테이블명(연도 접미사 제외): db_name}. INFORMATION_SCHEMA 에서 <기준>_<YYYY> 테이블을 찾아 일자별로 동기화
+    - snapshots: {테이블명: db_name}. 일자 컬럼이 없는 작은 기준 정보 테이블은 통째로 받음
+    - table_rules: {테이블명: TTL(초) 또는 ('daily', 적재 시각(시))}. 마지막 동기화 후 이 규칙으로 만료되면 로컬 실행하지 않음
+    - backfill_days: 처음 동기화할 기간 (0 이면 가장 오래된 일자부터)
+    - auto_refresh: 한 번 이상 동기화된 테이블이 만료되면 조회 시 백그라운드 스레드에서 증분 동기화
+      (그 동안의 쿼리는 원본 DB 로. 처음 동기화는 CLI 로)
+    문자열 비교 / 정렬 결과가 MySQL collation 과 달라질 수 있는 쿼리(local_sql.collation_sensitive)는 원본 DB 로 넘김.
+    duckdb / pyarrow 가 없으면 항상 원본 DB 로 넘김
+    """
+
+    def __init__(self, get_pool, root: str, tables: dict, snapshots: dict = None, table_rules: dict = None,
+                 default_ttl: float = 300.0, backfill_days: int = 0, fetch_chunk: int = 5000, auto_refresh: bool = False):
+        self._get_pool = get_pool
+        self.root = root
+        self.tables = {k.lower(): v for k, v in tables.items()}
+        self.snapshots = {k.lower(): v for k, v in (snapshots or {}).items()}
+        self.table_rules = {k.lower(): v for k, v in (table_rules or {}).items()}
+        self.default_ttl = default_ttl
+        self.backfill_days = backfill_days
+        self.fetch_chunk = fetch_chunk
+        self.auto_refresh = auto_refresh
+        self.available = duckdb is not None and pyarrow is not None
+
+        self._states = {}
+        self._refreshing = set()
+        self._refresh_errors = {}  # 이름 -> 마지막 자동 동기화 오류
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "errors": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def _dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def state(self, name: str) -> dict | None:
+        with self._lock:
+            if name not in self._states:
+                try:
+                    with open(os.path.join(self._dir(name), "_state.json"), encoding="utf-8") as f:
+                        self._states[name] = json.load(f)
+                except (OSError, ValueError):
+                    return None
+            return self._states[name]
+
+    def _save_state(self, name: str, state: dict):
+        os.makedirs(self._dir(name), exist_ok=True)
+        path = os.path.join(self._dir(name), "_state.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(f"{path}.tmp", path)
+        with self._lock:
+            self._states[name] = dict(state)
+
+    def _fetch(self, query: str, db_name: str, args: tuple = None) -> pd.DataFrame:
+        with self._get_pool(db_name).connection() as conn:
+            with conn.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(query, args)
+                columns = [d[0] for d in cursor.description or []]
+                rows = []
+                while True:
+                    chunk = cursor.fetchmany(self.fetch_chunk)
+                    if not chunk:
+                        break
+                    rows.extend(chunk)
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    @staticmethod
+    def _write(df: pd.DataFrame, path: str):
+        # 원자적으로 교체 (동기화 중에도 읽는 쪽은 이전 파일 또는 새 파일만 봄)
+        df.to_parquet(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+
+    def year_tables(self, name: str) -> dict:
+        """
+        {연도: 테이블명} (예: {2024: 'adn_daily_agency_statics_2024', 2025: 'adn_daily_agency_statics_2025'})
+        """
+        df = self._fetch(
+            "SELECT DISTINCT TABLE_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = %s AND TABLE_NAME LIKE %s",
+            self.tables[name], (self.tables[name], f"{name}_%"),
+        )
+        pattern = re.compile(rf"{re.escape(name)}_(\d{{4}})", re.IGNORECASE)
+        return {int(m.group(1)): t for t in df.iloc[:, 0] if (m := pattern.fullmatch(t))} if len(df) else {}
+
+    def sync(self, name: str, since: str = None, until: str = None) -> dict:
+        """
+        since(없으면 high water, 처음이면 backfill_days 전 또는 가장 오래된 일자) 부터 until(기본 오늘)까지 일자별로 다시 받아 덮어씀
+        """
+        if not self.available:
+            raise RuntimeError("로컬 동기화에는 duckdb 와 pyarrow 가 필요합니다")
+        if name in self.snapshots:
+            return self._sync_snapshot(name)
+
+        db_name = self.tables[name]
+        years = self.year_tables(name)
+        state = dict(self.state(name) or {})
+        first = not state
+        if since is None:
+            since = state.get("high_water")
+        if since is None and self.backfill_days:
+            since = (date.today() - timedelta(days=self.backfill_days)).isoformat()
+        low_water = since
+        if since is None:
+            # 가장 오래된 일자부터 받으면 전체 기간을 가진 것으로 봄 (low water 없음)
+            oldest = [self._fetch(f"SELECT MIN(wdate_str) FROM {years[y]}", db_name).iloc[0, 0] for y in sorted(years)]
+            since = next((d for d in oldest if d), date.today().isoformat())
+        if first:
+            state["low_water"] = low_water
+        elif state.get("low_water") and (low_water is None or low_water < state["low_water"]):
+            state["low_water"] = low_water
+
+        started = time.time()
+        os.makedirs(self._dir(name), exist_ok=True)
+        day = date.fromisoformat(since)
+        until = date.fromisoformat(until) if until else date.today()
+        rows = days = 0
+        while day <= until:
+            table = years.get(day.year)
+            if table is None:
+                day = date(day.year + 1, 1, 1)
+                continue
+            df = self._fetch(f"SELECT * FROM {table} WHERE wdate_str = %s", db_name, (day.isoformat(),))
+            path = os.path.join(self._dir(name), f"{day.isoformat()}.parquet")
+            if len(df):
+                self._write(df, path)
+            elif os.path.exists(path):
+                os.remove(path)
+            rows += len(df)
+            days += 1
+            state["high_water"] = day.isoformat()
+            self._save_state(name, state)
+            day += timedelta(days=1)
+
+        state["synced_at"] = started
+        self._save_state(name, state)
+        return {"name": name, "rows": rows, "days": days, "tables": sorted(years.values()), **state}
+
+    def _sync_snapshot(self, name: str) -> dict:
+        started = time.time()
+        df = self._fetch(f"SELECT * FROM {name}", self.snapshots[name])
+        os.makedirs(self._dir(name), exist_ok=True)
+        self._write(df, os.path.join(self._dir(name), "snapshot.parquet"))
+        state = {"synced_at": started}
+        self._save_state(name, state)
+        return {"name": name, "rows": len(df), "days": 0, "tables": [name], **state}
+
+    def fresh(self, name: str, now: float = None) -> bool:
+        state = self.state(name)
+        if not state or not state.get("synced_at"):
+            return False
+        # 규칙은 연도별 테이블 이름(adn_daily_agency_statics_2025)으로도 찾음
+        rule = self.table_rules.get(name)
+        if rule is None:
+            rule = next((v for k, v in self.table_rules.items() if re.fullmatch(rf"{re.escape(name)}_\d{{4}}", k)),
+                        self.default_ttl)
+        return rule_expires_at(rule, datetime.fromtimestamp(state["synced_at"])) > (now or time.time())
+
+    def refresh_in_background(self, name: str) -> bool:
+        """
+        name 을 백그라운드 스레드에서 증분 동기화 (이미 진행 중이면 False)
+        """
+        with self._lock:
+            if name in self._refreshing:
+                return False
+            self._refreshing.add(name)
+        threading.Thread(target=self._refresh, args=(name,), daemon=True).start()
+        return True
+
+    def _refresh(self, name: str):
+        try:
+            self.sync(name)
+            counter = "refreshes"
+        except Exception as e:
+            counter = "refresh_errors"
+            with self._lock:
+                self._refresh_errors[name] = f"{type(e).__name__}: {e}"
+        with self._lock:
+            self._counters[counter] += 1
+            self._refreshing.discard(name)
+
+    def _resolve(self, table: str) -> tuple[str, str] | None:
+        # 테이블명 -> (동기화 이름, 일자 파일 접두사)
+        if table in self.tables or table in self.snapshots:
+            return table, ""
+        m = re.fullmatch(r"(\w+)_(\d{4})", table)
+        if m and m.group(1) in self.tables:
+            return m.group(1), f"{m.group(2)}-"
+        return None
+
+    def views(self, query: str) -> dict | None:
+        """
+        query 가 참조하는 테이블별 Parquet 파일 목록. 로컬로 실행할 수 없으면 None
+        """
+        tables = referenced_tables(mask_literals(query))
+        resolved = {t: self._resolve(t) for t in tables}
+        if not tables or any(r is None for r in resolved.values()):
+            return None
+        stale = {name for name, _ in resolved.values() if not self.fresh(name)}
+        if stale:
+            if self.auto_refresh:
+                for name in stale:
+                    if self.state(name):
+                        self.refresh_in_background(name)
+            return None
+
+        # 일자별 테이블이 하나일 때만 조회 기간으로 파일을 고름 (여럿이면 조건이 어느 테이블 것인지 모름)
+        partitioned = [t for t, (name, _) in resolved.items() if name in self.tables]
+        low, high = date_range(query) if len(partitioned) == 1 else (None, None)
+
+        views = {}
+        for table, (name, prefix) in resolved.items():
+            if name in self.snapshots:
+                views[table] = [os.path.join(self._dir(name), "snapshot.parquet")]
+                continue
+            # 동기화 시작일 이전이나 마지막으로 받은 일자 이후를 조회하면 로컬 결과가 모자람
+            # (종료일 조건이 없으면 오늘까지 받았어야 함. 동기화가 중간에 멈춘 경우 등)
+            state = self.state(name)
+            low_water, high_water = state.get("low_water"), state.get("high_water")
+            if low_water and (low is None or low < low_water):
+                return None
+            if not high_water or (high or date.today().isoformat()) > high_water:
+                return None
+            files = day_files(self._dir(name), low, high, prefix)
+            if not files:
+                return None
+            views[table] = files
+
+        # 문자열 컬럼은 Parquet 스키마에서 (테이블 파일은 모두 같은 원본에서 받았으므로 마지막 파일 기준)
+        text_columns = set()
+        for files in views.values():
+            schema = pyarrow.parquet.read_schema(files[-1])
+            text_columns |= {f.name for f in schema if pyarrow.types.is_string(f.type) or pyarrow.types.is_large_string(f.type)}
+        if collation_sensitive(query, text_columns):
+            return None
+        return views
+
+    def query(self, query: str) -> tuple[str, pd.DataFrame] | None:
+        """
+        로컬로 실행 가능하면 (참조 테이블, 결과), 아니면 None
+        """
+        views = self.views(query) if self.available else None
+        if views is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+        try:
+            df = run_local(replace_tables(query, {t: t for t in views}), views)
+        except Exception as e:
+            # DuckDB 와 문법이 다른 쿼리 등은 원본 DB 로 (실패 내역은 현재 span 에 기록)
+            current_span().set(local_error=f"{type(e).__name__}: {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+            return None
+        with self._lock:
+            self._counters["hits"] += 1
+        return ", ".join(sorted(views)), df
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, **({"last_refresh_errors": dict(self._refresh_errors)} if self._refresh_errors else {})}
+
+
+def main():
+    from .run_query import warehouse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--name", nargs="+", default=[*warehouse.tables, *warehouse.snapshots], help="동기화할 테이블")
+    parser.add_argument("--since", help="이 일자(YYYY-MM-DD)부터 다시 받음 (기본: high water)")
+    args = parser.parse_args()
+
+    for name in args.name:
+        start = time.perf_counter()
+        result = warehouse.sync(name, since=args.since)
+        print(f"{name}: {', '.join(result['tables'])} {result['rows']:,}행 / {result['days']}일, "
+              f"high water {result.get('high_water') or '-'}, {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
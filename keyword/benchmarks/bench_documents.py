@@ -0,0 +1,94 @@
+"""
+Document 생성 방식 비교 (기존 iterrows + 전체 리스트 vs 컬럼 zip generator + chunk 읽기)
+합성 로그 CSV(기본 1M 행)에서 소요 시간과 최대 메모리(tracemalloc)를 측정합니다.
+
+저장소 루트에서 실행:
+    python keyword/benchmarks/bench_documents.py --rows 1000000
+"""
+import os
+import sys
+
+# keyword/keyword.py 가 표준 라이브러리 keyword 모듈을 가리지 않도록 먼저 로드한 뒤 keyword 디렉토리 추가
+import collections  # noqa: F401
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from langchain.schema import Document
+
+from ingest import KEYWORD_COLUMNS, row_id, iter_documents
+
+
+# 기존 구현 (비교용)
+def legacy_documents(csv_path: str) -> list:
+    df = pd.read_csv(csv_path)
+    filtered_list = df[KEYWORD_COLUMNS].dropna()
+    docs = []
+    for _, row in filtered_list.iterrows():
+        doc_id = row_id(row['ui'], row['ad_ids'], row['k'])
+        text = f"ui: {row['ui']}\nad_ids: {row['ad_ids']}\nk: {row['k']}"
+        docs.append(Document(page_content=text, metadata={**row.to_dict(), "id": doc_id}))
+    return docs
+
+
+def write_synthetic_log(path: str, rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "date": "2025-03-07",
+        "time": "10:59:51",
+        "requestip": "127.0.0.1",
+        "uri": "/kd",
+        "uc": rng.integers(100000, 110000, rows),
+        "ui": np.char.add("advertiser_", rng.integers(0, 2000, rows).astype(str)),
+        "ad_ids": np.char.add("rb-adn-1-", rng.integers(0, 10**9, rows).astype(str)),
+        "k": np.char.add("키워드 상품명 ", rng.integers(0, 50000, rows).astype(str)),
+    }).to_csv(path, index=False)
+
+
+def measure(fn, trace_memory: bool) -> tuple[float, float, int]:
+    """
+    소요 시간은 tracemalloc 없이 측정하고 (추적 오버헤드가 커서), 최대 메모리는 별도 실행에서 측정
+    """
+    start = time.perf_counter()
+    count = fn()
+    seconds = time.perf_counter() - start
+
+    peak = float("nan")
+    if trace_memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+    return seconds, peak, count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    parser.add_argument("--skip-memory", action="store_true", help="tracemalloc 측정 생략 (오래 걸림)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "log_keyword.csv")
+        write_synthetic_log(csv_path, args.rows)
+
+        results = {
+            "iterrows + list": measure(lambda: len(legacy_documents(csv_path)), not args.skip_memory),
+            "zip generator (streaming)": measure(
+                lambda: sum(1 for _ in iter_documents(csv_path, chunksize=args.chunksize)), not args.skip_memory
+            ),
+        }
+
+    print(f"{'builder':<28} | {'docs':>9} | {'seconds':>8} | {'peak MB':>8}")
+    for name, (seconds, peak, count) in results.items():
+        print(f"{name:<28} | {count:>9} | {seconds:>8.2f} | {peak:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+로컬 벡터 저장소 검색 방식 비교 (flat 전수 탐색 vs ivf vs hnsw(faiss 설치 시))
+합성 임베딩(클러스터 구조의 float32 벡터)에서 질의 지연시간(p50 / p95)과 flat 대비 recall@k 를 측정합니다.
+
+저장소 루트에서 실행:
+    python keyword/benchmarks/bench_vector_store.py --vectors 100000 --dim 1536
+"""
+import os
+import sys
+
+# keyword/keyword.py 가 표준 라이브러리 keyword 모듈을 가리지 않도록 먼저 로드한 뒤 keyword 디렉토리 추가
+import collections  # noqa: F401
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from local_store import LocalVectorStore, faiss
+from pipeline import FakeEmbeddings
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    # 실제 임베딩처럼 몇 개의 주제(클러스터) 주변에 모인 벡터
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    return centers[labels] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def fill_store(store: LocalVectorStore, vectors: np.ndarray, batch: int = 10_000):
+    for i in range(0, len(vectors), batch):
+        store.upsert(vectors=[
+            (f"doc-{row}", vectors[row], {"text": f"k: 키워드 {row}", "id": f"doc-{row}"})
+            for row in range(i, min(i + batch, len(vectors)))
+        ])
+    store.save()
+
+
+def run(store: LocalVectorStore, queries: np.ndarray, k: int) -> tuple[list, float, list]:
+    start = time.perf_counter()
+    store.search_by_vector(queries[0], k)  # 인덱스 생성 (ivf 학습 / hnsw 구성)
+    build = time.perf_counter() - start
+
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows = store.search_by_vector(query, k)
+        latencies.append(time.perf_counter() - start)
+        results.append({row for row, _ in rows})
+    return results, build, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.vectors, args.dim)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+    queries = queries + 0.3 * rng.normal(size=queries.shape).astype(np.float32)
+
+    configs = [("flat", {}), ("ivf", {"nprobe": 4}), ("ivf", {"nprobe": 16})]
+    if faiss is not None:
+        configs += [("hnsw", {"ef_search": 64}), ("hnsw", {"ef_search": 256})]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "local_vectors")
+        start = time.perf_counter()
+        fill_store(LocalVectorStore(FakeEmbeddings(args.dim), path=path), vectors)
+        print(f"{args.vectors} x {args.dim} 벡터 저장: {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(os.path.join(path, 'vectors.f32')) / 1024 / 1024:.0f} MB)")
+
+        exact = None
+        print(f"{'index':<22} | {'build s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | recall@{args.k}")
+        for index_type, options in configs:
+            store = LocalVectorStore(FakeEmbeddings(args.dim), path=path, index_type=index_type, **options)
+            results, build, latencies = run(store, queries, args.k)
+            if exact is None:
+                exact = results
+            recall = np.mean([len(got & truth) / len(truth) for got, truth in zip(results, exact)])
+            name = index_type + "".join(f" {key}={value}" for key, value in options.items())
+            p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+            print(f"{name:<22} | {build:>8.2f} | {p50:>8.2f} | {p95:>8.2f} | {recall:.3f}")
+            del store
+
+
+if __name__ == "__main__":
+    main()
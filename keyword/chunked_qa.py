@@ -0,0 +1,99 @@
+import re
+
+from langchain_core.documents import Document
+from langchain_core.prompts import PromptTemplate
+
+from pipeline import estimate_tokens
+
+
+# chunk 별로 관련 문서 번호만 고르게 함 (ui / ad_ids / k 값은 LLM이 다시 쓰지 않고 원본 metadata 에서 가져옴)
+EXTRACT_PROMPT = PromptTemplate(
+    input_variables=["context", "question"],
+    template="""
+        아래 번호가 붙은 문서들 중에서, '{question}'와 관련된 키워드('k')를 가진 문서를 모두 골라줘.
+
+        문서:
+        {context}
+
+        관련된 문서의 번호만 JSON 배열로 답해줘. 예: [1, 4, 7]
+        관련된 문서가 없으면 [] 로 답해줘.
+    """
+)
+_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+def chunk_documents(docs: list[Document], max_tokens: int = 3000) -> list[list[Document]]:
+    """
+    검색 순서를 유지하면서 chunk 당 추정 토큰 수가 max_tokens 를 넘지 않게 나눔
+    """
+    chunks, current, used = [], [], 0
+    for doc in docs:
+        tokens = estimate_tokens(doc.page_content)
+        if current and used + tokens > max_tokens:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(doc)
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _context(chunk: list[Document]) -> str:
+    return "\n\n".join(f"[{i}]\n{doc.page_content}" for i, doc in enumerate(chunk, start=1))
+
+
+def _selected(answer: str, chunk: list[Document]) -> list[Document]:
+    numbers = (int(n) for n in _NUMBER_PATTERN.findall(answer))
+    return [chunk[n - 1] for n in dict.fromkeys(numbers) if 1 <= n <= len(chunk)]
+
+
+def merge_documents(selected: list[list[Document]]) -> list[Document]:
+    """
+    chunk 별 결과를 chunk 순서(= 검색 순위)대로 합치고 (ui, ad_ids, k) 가 같은 문서는 하나만 남김
+    """
+    merged = {}
+    for docs in selected:
+        for doc in docs:
+            key = tuple(str(doc.metadata.get(col, "")) for col in ("ui", "ad_ids", "k"))
+            merged.setdefault(key, doc)
+    return list(merged.values())
+
+
+def format_documents(docs: list[Document]) -> str:
+    # 기존 stuff 체인 답변과 같은 형식
+    return "\n\n".join(
+        f"ui: {doc.metadata.get('ui')}\nad_ids: {doc.metadata.get('ad_ids')}\nk: {doc.metadata.get('k')}"
+        for doc in docs
+    )
+
+
+# 검색된 문서를 토큰 상한 chunk로 나눠 동시에 추출하고, 결과는 로컬에서 합치는 QA
+class ChunkedKeywordQA:
+    """
+    RetrievalQA "stuff" 체인처럼 run(query) 로 답변 문자열을 반환.
+    전체 지연시간은 문서 전체가 아니라 가장 느린 chunk 하나에 비례.
+    """
+
+    def __init__(self, retriever, llm, max_chunk_tokens: int = 3000, max_concurrency: int = 8):
+        self.retriever = retriever
+        self.llm = llm
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_concurrency = max_concurrency
+
+    def extract(self, query: str, docs: list[Document]) -> list[Document]:
+        chunks = chunk_documents(docs, self.max_chunk_tokens)
+        if not chunks:
+            return []
+        prompts = [EXTRACT_PROMPT.format(context=_context(chunk), question=query) for chunk in chunks]
+        answers = self.llm.batch(prompts, config={"max_concurrency": self.max_concurrency})
+        return merge_documents([
+            _selected(getattr(answer, "content", answer), chunk) for answer, chunk in zip(answers, chunks)
+        ])
+
+    def run(self, query: str) -> str:
+        docs = self.retriever.invoke(query)
+        matched = self.extract(query, docs)
+        if not matched:
+            return "관련된 키워드를 찾지 못했습니다."
+        return format_documents(matched)
@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EMBEDDING_CACHE_PATH = os.path.join(BASE_DIR, "data", "embedding_cache.sqlite")
+
+
+# 임베딩 로컬 캐시 (내용 해시 -> float32 벡터, SQLite BLOB)
+class CachedEmbeddings(Embeddings):
+    """
+    OpenAIEmbeddings 등을 감싸서, 한 번 임베딩한 텍스트는 API 호출 없이 캐시에서 반환.
+    Pinecone 인덱스를 리셋하고 다시 업서트해도 이미 본 텍스트는 비용이 들지 않음.
+    """
+
+    def __init__(self, underlying: Embeddings, path: str = EMBEDDING_CACHE_PATH, namespace: str = None):
+        self.underlying = underlying
+        # 모델이 바뀌면 다른 벡터가 나오므로 모델명을 키에 포함
+        self.namespace = namespace or getattr(underlying, "model", type(underlying).__name__)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                vec BLOB NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: list) -> dict:
+        found = {}
+        with self._lock:
+            # SQLite 변수 개수 제한을 넘지 않도록 나눠서 조회
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(f"SELECT key, vec FROM embeddings WHERE key IN ({placeholders})", chunk)
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def _store(self, items: list):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                [(key, len(vec), array("f", vec).tobytes()) for key, vec in items],
+            )
+            self._db.commit()
+
+    def uncached(self, texts: list[str]) -> list[str]:
+        """
+        캐시에 없어서 embed_documents 가 API로 보낼 텍스트 (중복 제거). rate limiter 토큰 계산용
+        """
+        keys = {self._key(t): t for t in texts}
+        cached = self._lookup(list(keys))
+        return [text for key, text in keys.items() if key not in cached]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self._key(t) for t in texts]
+        cached = self._lookup(list(set(keys)))
+
+        # 캐시에 없는 텍스트만 (중복 제거 후) 한 번에 임베딩
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), vectors))
+            self._store(new_items)
+            cached.update(new_items)
+
+        with self._lock:
+            self._misses += len(missing)
+            self._hits += len(texts) - len(missing)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        cached = self._lookup([key])
+        if key in cached:
+            with self._lock:
+                self._hits += 1
+            return cached[key]
+
+        vector = self.underlying.embed_query(text)
+        self._store([(key, vector)])
+        with self._lock:
+            self._misses += 1
+        return vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, bytes_stored = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vec)), 0) FROM embeddings"
+            ).fetchone()
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 3) if total else 0.0,
+                "entries": entries,
+                "bytes_stored": bytes_stored,
+            }
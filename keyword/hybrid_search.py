@@ -0,0 +1,171 @@
+import re
+from collections import defaultdict, Counter
+from typing import Any
+
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from pydantic import PrivateAttr
+
+from ingest import KEYWORD_COLUMNS, row_id
+
+
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def normalize(text) -> str:
+    # html 태그(<br> 등) 제거, 소문자, 공백 정리
+    text = _TAG_PATTERN.sub(" ", str(text)).lower()
+    return " ".join(text.split())
+
+
+def tokenize(text) -> list[str]:
+    return _TOKEN_PATTERN.findall(normalize(text))
+
+
+def trigrams(text) -> set:
+    # 공백을 빼고 3글자 단위로 자름 (3글자 미만이면 그대로 하나)
+    compact = "".join(tokenize(text))
+    if len(compact) < 3:
+        return {compact} if compact else set()
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+
+# 로컬 키워드 인덱스 (CSV 행 -> 토큰 역색인 + k 컬럼 trigram 색인)
+class KeywordIndex:
+    """
+    - 정확 일치: 질문 전체가 k / ui / ad_ids 값과 같은 행
+    - 토큰 일치: 질문의 모든 토큰이 들어있는 행 (k, ui, ad_ids 토큰 대상)
+    - 유사 일치: k 컬럼 trigram Jaccard 유사도가 min_similarity 이상인 행 (오타, 띄어쓰기 차이)
+    같은 내용의 행(같은 row_id)은 하나로 합쳐서 색인
+    """
+
+    def __init__(self, df: pd.DataFrame, min_similarity: float = 0.3):
+        self.min_similarity = min_similarity
+        self._rows = []                     # (ui, ad_ids, k, id)
+        self._exact = defaultdict(list)     # 정규화된 값 -> 행 번호
+        self._tokens = defaultdict(set)     # 토큰 -> 행 번호
+        self._grams = defaultdict(list)     # trigram -> 행 번호
+        self._gram_counts = []              # 행별 trigram 개수
+
+        seen = set()
+        columns = [df[col].tolist() for col in KEYWORD_COLUMNS]
+        for ui, ad_ids, k in zip(*columns):
+            doc_id = row_id(ui, ad_ids, k)
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            pos = len(self._rows)
+            self._rows.append((ui, ad_ids, k, doc_id))
+
+            for value in (ui, ad_ids, k):
+                self._exact[normalize(value)].append(pos)
+                for token in tokenize(value):
+                    self._tokens[token].add(pos)
+            grams = trigrams(k)
+            for gram in grams:
+                self._grams[gram].append(pos)
+            self._gram_counts.append(len(grams))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def document(self, pos: int) -> Document:
+        # ingest.build_documents / Pinecone 검색 결과와 같은 형태
+        ui, ad_ids, k, doc_id = self._rows[pos]
+        return Document(
+            page_content=f"ui: {ui}\nad_ids: {ad_ids}\nk: {k}",
+            metadata={"ui": ui, "ad_ids": ad_ids, "k": k, "id": doc_id}
+        )
+
+    def exact_matches(self, query: str) -> list[int]:
+        return list(dict.fromkeys(self._exact.get(normalize(query), [])))
+
+    def token_matches(self, query: str) -> list[int]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # 가장 희귀한 토큰부터 교집합
+        postings = sorted((self._tokens.get(t, set()) for t in set(tokens)), key=len)
+        matched = set(postings[0])
+        for posting in postings[1:]:
+            matched &= posting
+            if not matched:
+                break
+        # 값이 짧을수록 (질문과 더 가까울수록) 앞에
+        return sorted(matched, key=lambda pos: (len(str(self._rows[pos][2])), pos))
+
+    def fuzzy_matches(self, query: str, limit: int = 200) -> list[tuple[int, float]]:
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._grams.get(gram, ()))
+        scored = []
+        for pos, count in shared.items():
+            score = count / (len(query_grams) + self._gram_counts[pos] - count)
+            if score >= self.min_similarity:
+                scored.append((pos, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def search(self, query: str, limit: int = 200) -> tuple[list[Document], int]:
+        """
+        정확 일치 -> 토큰 일치 -> 유사 일치 순으로 중복 없이 최대 limit 개 반환
+
+        Returns:
+            tuple: (문서 목록, 정확 / 토큰 일치 개수)
+        """
+        ranked = list(dict.fromkeys(self.exact_matches(query) + self.token_matches(query)))
+        strong = len(ranked)
+        if len(ranked) < limit:
+            found = set(ranked)
+            ranked += [pos for pos, _ in self.fuzzy_matches(query, limit) if pos not in found]
+        return [self.document(pos) for pos in ranked[:limit]], min(strong, limit)
+
+
+def reciprocal_rank_fusion(rankings: list[list[Document]], k: int = 60) -> list[Document]:
+    """
+    여러 검색 결과 순위를 RRF 점수(sum 1 / (k + rank))로 합침. 문서는 metadata['id'] 로 구분
+    """
+    scores = defaultdict(float)
+    docs = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            doc_id = doc.metadata.get("id") or doc.page_content
+            scores[doc_id] += 1.0 / (k + rank)
+            docs.setdefault(doc_id, doc)
+    return [docs[doc_id] for doc_id in sorted(scores, key=lambda d: -scores[d])]
+
+
+# 로컬 인덱스 우선, 부족하면 벡터 검색 결과와 RRF로 합치는 retriever
+class HybridRetriever(BaseRetriever):
+    """
+    질문 전체와 값이 같은 행(정확 일치)이 있거나, 정확 / 토큰 일치가 min_local 개(기본 k) 이상이면
+    Pinecone을 호출하지 않고 로컬 결과만 반환 (우연히 토큰 하나가 겹친 행 몇 개로는 벡터 검색을 건너뛰지 않음).
+    그렇지 않으면 로컬(유사 일치 포함) 결과와 벡터 검색 결과를 reciprocal rank fusion으로 합침.
+    """
+
+    keyword_index: Any
+    vectorstore: Any
+    k: int = 200
+    min_local: int | None = None
+    rrf_k: int = 60
+
+    _stats: dict = PrivateAttr(default_factory=lambda: {"local_only": 0, "fused": 0})
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        local_docs, strong = self.keyword_index.search(query, limit=self.k)
+        if self.keyword_index.exact_matches(query) or strong >= (self.min_local or self.k):
+            self._stats["local_only"] += 1
+            return local_docs
+
+        self._stats["fused"] += 1
+        vector_docs = self.vectorstore.similarity_search(query, k=self.k)
+        return reciprocal_rank_fusion([local_docs, vector_docs], k=self.rrf_k)[:self.k]
+
+    def stats(self) -> dict:
+        return dict(self._stats)
@@ -0,0 +1,172 @@
+import os
+import sys
+
+# 스크립트로 실행하면 이 디렉토리의 keyword.py 가 표준 라이브러리 keyword 모듈을 가리므로
+# 이 디렉토리를 잠시 빼고 collections(-> keyword)를 먼저 로드
+_sys_path = sys.path[:]
+sys.path[:] = [p for p in sys.path if os.path.abspath(p or ".") != os.path.dirname(os.path.abspath(__file__))]
+import collections  # noqa: E402,F401
+sys.path[:] = _sys_path
+
+import json
+import hashlib
+import argparse
+import pandas as pd
+
+from langchain.schema import Document
+from langchain_community.embeddings import OpenAIEmbeddings
+from dotenv import load_dotenv
+from pinecone import Pinecone, ServerlessSpec
+import pinecone
+
+from embedding_cache import CachedEmbeddings
+from pipeline import RateLimiter, run_pipeline
+from local_store import LocalVectorStore
+
+
+# Pinecone 버전 이슈
+pinecone.Index = pinecone.data.index.Index
+
+# 환경변수 로드
+load_dotenv()
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+PINECONE_API_KEY = os.getenv('PINECONE_API_KEY')
+INDEX_NAME = os.getenv('INDEX_NAME')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(BASE_DIR, "data", "log_keyword.csv")
+# 이미 업서트된 문서 id(내용 해시) 목록. 없는 상태로 비어있지 않은 Pinecone 인덱스에 실행하면
+# (uuid id 로 올리던 이전 방식의 벡터가 남아있을 수 있어서) --reset 을 요구함
+MANIFEST_PATH = os.path.join(BASE_DIR, "data", "ingest_manifest.json")
+KEYWORD_COLUMNS = ['ui', 'ad_ids', 'k']
+# 벡터 저장소: pinecone / local (data/local_vectors 의 memmap 저장소)
+VECTOR_STORE = os.getenv('VECTOR_STORE', 'pinecone')
+
+# 파이프라인 설정
+CSV_CHUNK_SIZE = int(os.getenv('INGEST_CSV_CHUNK_SIZE', '10000'))
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '100'))
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '4'))
+EMBEDDING_RPM = int(os.getenv('EMBEDDING_RPM', '3000'))
+EMBEDDING_TPM = int(os.getenv('EMBEDDING_TPM', '1000000'))
+
+
+def row_id(ui, ad_ids, k) -> str:
+    """
+    행 내용(ui, ad_ids, k)의 해시를 문서 id로 사용 (같은 내용이면 항상 같은 id)
+    """
+    raw = "\x1f".join(str(v) for v in (ui, ad_ids, k))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def load_keywords(csv_path: str = CSV_PATH) -> pd.DataFrame:
+    df = pd.read_csv(csv_path, usecols=KEYWORD_COLUMNS)
+    return df[KEYWORD_COLUMNS].dropna()
+
+
+# CSV를 chunk 단위로 읽어서 Document를 하나씩 반환 (전체 파일을 메모리에 올리지 않음)
+def iter_documents(csv_path: str = CSV_PATH, chunksize: int = CSV_CHUNK_SIZE):
+    for chunk in pd.read_csv(csv_path, usecols=KEYWORD_COLUMNS, chunksize=chunksize):
+        yield from build_documents(chunk.dropna())
+
+
+# CSV 데이터 각 행을 Document로 변환 (행마다 Series를 만드는 iterrows 대신 컬럼 값 리스트를 zip)
+# 중복 행은 같은 id를 가지므로 업서트 단계에서 하나로 합쳐짐
+def build_documents(filtered_list: pd.DataFrame):
+    columns = [filtered_list[col].tolist() for col in KEYWORD_COLUMNS]
+    for ui, ad_ids, k in zip(*columns):
+        doc_id = row_id(ui, ad_ids, k)
+        yield Document(
+            page_content=f"ui: {ui}\nad_ids: {ad_ids}\nk: {k}",
+            metadata={"ui": ui, "ad_ids": ad_ids, "k": k, "id": doc_id}
+        )
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return set(json.load(f)["ids"])
+
+
+def save_manifest(ids: set, path: str = MANIFEST_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"index": INDEX_NAME, "ids": sorted(ids)}, f)
+    os.replace(tmp_path, path)
+
+
+def clear_manifest(path: str = MANIFEST_PATH):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+# Pinecone 인덱스가 없으면 생성
+def ensure_index(pc: Pinecone):
+    existing_indexes = pc.list_indexes().names()
+    if INDEX_NAME not in existing_indexes:
+        pc.create_index(
+            name=INDEX_NAME,
+            dimension=1536,
+            metric='euclidean',
+            spec=ServerlessSpec(
+                cloud='aws',
+                region='us-east-1'
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="log_keyword.csv -> 벡터 저장소 증분 업서트")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--backend", choices=["pinecone", "local"], default=VECTOR_STORE)
+    parser.add_argument("--reset", action="store_true", help="저장소의 모든 레코드와 manifest를 지우고 처음부터 업서트")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--rpm", type=int, default=EMBEDDING_RPM)
+    parser.add_argument("--tpm", type=int, default=EMBEDDING_TPM)
+    args = parser.parse_args()
+
+    # 한 번 임베딩한 텍스트는 로컬 캐시에서 재사용
+    embeddings = CachedEmbeddings(OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY))
+
+    if args.backend == "local":
+        # 로컬 저장소는 저장된 문서 id 자체가 manifest
+        index = LocalVectorStore(embeddings)
+        if args.reset:
+            index.clear()
+        manifest = index.ids()
+        on_checkpoint = lambda _: index.save()  # noqa: E731
+    else:
+        pc = Pinecone(api_key=PINECONE_API_KEY)
+        ensure_index(pc)
+        index = pc.Index(INDEX_NAME)
+        if args.reset:
+            index.delete(delete_all=True)
+            clear_manifest()
+        elif not os.path.exists(MANIFEST_PATH) and index.describe_index_stats().total_vector_count:
+            # manifest 없이 레코드가 있으면 이전 방식(uuid id)으로 올린 벡터일 수 있음.
+            # 내용 해시 id 로 다시 올리면 옛 벡터가 지워지지 않고 중복되므로 처음 한 번은 --reset 필요
+            parser.error("manifest 가 없는데 인덱스에 레코드가 있습니다. 처음 한 번은 --reset 으로 실행하세요 "
+                         "(또는 pinecone_reset.py)")
+        manifest = load_manifest()
+        on_checkpoint = save_manifest
+
+    # manifest 에 없는 문서만 임베딩 / 업서트, 배치가 끝날 때마다 manifest 저장 (중단 후 재실행 시 이어서 진행)
+    stats = run_pipeline(
+        iter_documents(args.csv),
+        embeddings,
+        index,
+        manifest=manifest,
+        on_checkpoint=on_checkpoint,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        limiter=RateLimiter(rpm=args.rpm, tpm=args.tpm),
+    )
+    if args.backend == "local" and stats["deleted"]:
+        index.compact()
+    print(f"문서 {stats['total']}개 중 {stats['upserted']}개 추가, {stats['deleted']}개 삭제 ({stats['seconds']}초)")
+    print("임베딩 캐시:", embeddings.stats())
+
+
+if __name__ == "__main__":
+    main()
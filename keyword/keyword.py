@@ -1,19 +1,12 @@
 import os
-import time
-import pandas as pd
-from pprint import pprint
 import streamlit as st
 
-from langchain.chat_models import ChatOpenAI
-from langchain.schema import Document
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import Pinecone as PineconeVectorStore
-from langchain.prompts import PromptTemplate
-from langchain.chains import RetrievalQA
 from dotenv import load_dotenv
-from pinecone import Pinecone, ServerlessSpec
 import pinecone
 
+from ingest import CSV_PATH, VECTOR_STORE
+from resources import cached_keywords, cached_qa, file_mtime, local_store_mtime
+
 
 # Pinecone 버전 이슈
 pinecone.Index = pinecone.data.index.Index
@@ -23,79 +16,28 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 PINECONE_API_KEY = os.getenv('PINECONE_API_KEY')
 INDEX_NAME = os.getenv('INDEX_NAME')
+# 답변 생성 방식: chunked (문서를 토큰 상한 chunk로 나눠 동시에 추출 후 로컬에서 병합) / stuff (문서 전체를 한 프롬프트에)
+QA_MODE = os.getenv('QA_MODE', 'chunked')
+QA_CHUNK_TOKENS = int(os.getenv('QA_CHUNK_TOKENS', '3000'))
+QA_MAX_CONCURRENCY = int(os.getenv('QA_MAX_CONCURRENCY', '8'))
 
 # Streamlit UI 설정
 st.title("ADN Keyword Matching")
 query = st.text_input("질문을 입력하세요", value="")
 
-# dataframe 로드 및 전처리
+# dataframe 로드 및 전처리 (CSV 가 바뀌지 않으면 rerun 때 다시 읽지 않음)
 # df = pd.read_csv('./data/log_keyword.csv')
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-csv_path = os.path.join(BASE_DIR, "data", "log_keyword.csv")
-df = pd.read_csv(csv_path)
-filtered_list = df[['ui', 'ad_ids', 'k']].dropna()
+csv_mtime = file_mtime(CSV_PATH)
+filtered_list = cached_keywords(CSV_PATH, csv_mtime)
 st.write(filtered_list.head(100))
 
-# Pinecone 초기화 및 인덱스 생성
-pc = Pinecone(api_key=PINECONE_API_KEY)
-existing_indexes = pc.list_indexes().names()
-if INDEX_NAME not in existing_indexes:
-    pc.create_index(
-        name=INDEX_NAME,
-        dimension=1536,
-        metric='euclidean',
-        spec=ServerlessSpec(
-            cloud='aws',
-            region='us-east-1'
-        )
-    )
-
-# CSV 데이터 각 행을 Document로 변환
-docs = []
-for i, (_, row) in enumerate(filtered_list.iterrows()):
-    text = f"ui: {row['ui']}\nad_ids: {row['ad_ids']}\nk: {row['k']}"
-    doc = Document(
-        page_content=text,
-        metadata={**row.to_dict(), "id": f"doc_{i}"}
-    )
-    docs.append(doc)
-
-# embedding 생성
-embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-
-# PineconeVectorStore를 통해 Document 업서트
-vectorstore = PineconeVectorStore.from_documents(
-    docs,
-    embedding=embeddings,
-    index_name=INDEX_NAME
-)
-
-# Prompt Template
-prompt_template = PromptTemplate(
-    input_variables=["context", "question"],
-    template="""
-        아래 문서들을 참고하여, '{question}'와 관련되어 보이는 모든 키워드를 추출해줘.
-        각 키워드에 대해, 해당 키워드가 등장한 문서의 'ui', 'ad_ids', 그리고 원래 키워드('k') 정보를 함께 나열해줘.
-
-        문서:
-        {context}
-
-        답변은 다음 형식으로 작성해줘:
-        ui: <ui 정보>
-        ad_ids: <ad_ids 정보>
-        k: <키워드>
-
-        모든 관련 키워드를 누락 없이 출력해줘.
-    """
-)
-
-# Retrieval QA 체인 구성 및 쿼리 실행
-retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 200})
-qa = RetrievalQA.from_chain_type(
-    llm=ChatOpenAI(openai_api_key=OPENAI_API_KEY),
-    chain_type="stuff",
-    retriever=retriever,
-    chain_type_kwargs={"prompt": prompt_template}
+# 임베딩 / 벡터 저장소 / 키워드 인덱스 / QA 체인은 resources.py 에서 캐싱 (텍스트 입력으로 rerun 될 때 다시 만들지 않음)
+# - 로컬 키워드 인덱스(정확 / 토큰 / trigram 일치)를 먼저 보고, 일치하는 키워드가 없을 때만 벡터 검색 결과와 합침
+# - VECTOR_STORE=local 이면 Pinecone 대신 data/local_vectors 의 로컬 저장소 사용 (문서 업서트는 ingest.py 에서 증분으로 수행)
+qa = cached_qa(
+    QA_MODE, VECTOR_STORE, INDEX_NAME, OPENAI_API_KEY, CSV_PATH, csv_mtime,
+    local_store_mtime() if VECTOR_STORE == "local" else 0.0,
+    QA_CHUNK_TOKENS, QA_MAX_CONCURRENCY,
 )
 
 if st.button("질문하기"):
@@ -0,0 +1,336 @@
+import os
+import json
+import threading
+from typing import Any, Iterable
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCAL_STORE_DIR = os.path.join(BASE_DIR, "data", "local_vectors")
+# 검색 방식: flat (전수 탐색, 정확) / ivf (k-means 클러스터 일부만 탐색) / hnsw (faiss 필요)
+LOCAL_INDEX_TYPE = os.getenv('LOCAL_INDEX_TYPE', 'flat')
+SEARCH_CHUNK_ROWS = 65536
+
+
+def _top_k(distances: np.ndarray, rows: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    if len(distances) > k:
+        part = np.argpartition(distances, k - 1)[:k]
+        distances, rows = distances[part], rows[part]
+    order = np.argsort(distances, kind="stable")
+    return distances[order], rows[order]
+
+
+def _kmeans(sample: np.ndarray, n_clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), n_clusters, replace=False)].copy()
+    sample_norms = np.einsum("ij,ij->i", sample, sample)
+    for _ in range(iterations):
+        dist = sample_norms[:, None] - 2 * sample @ centroids.T + np.einsum("ij,ij->i", centroids, centroids)
+        labels = dist.argmin(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=n_clusters)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+# Pinecone 대신 쓰는 로컬 벡터 저장소 (float32 행렬 memmap + JSON 메타데이터)
+class LocalVectorStore(VectorStore):
+    """
+    Pinecone 인덱스와 같은 euclidean 거리(제곱 L2)로 검색하는 로컬 벡터 저장소.
+    - vectors.f32: float32 행렬 (행 = 문서), memmap 으로 읽어서 전체를 메모리에 올리지 않음
+    - meta.json: 차원, 행별 문서 id / metadata (page_content는 metadata['text'])
+    Pinecone Index 처럼 upsert(vectors=[(id, values, metadata)]) / delete(ids=[...]) 를 제공하므로
+    pipeline.run_pipeline 의 업서트 대상으로 그대로 사용 가능. 변경 내용은 save() 시 메타데이터에 반영.
+    """
+
+    def __init__(self, embedding: Embeddings, path: str = LOCAL_STORE_DIR, index_type: str = LOCAL_INDEX_TYPE,
+                 nlist: int = None, nprobe: int = 8, hnsw_m: int = 32, ef_search: int = 128):
+        if index_type not in ("flat", "ivf", "hnsw"):
+            raise ValueError(f"지원하지 않는 index_type: {index_type}")
+        if index_type == "hnsw" and faiss is None:
+            raise ImportError("index_type='hnsw' 는 faiss-cpu 패키지가 필요합니다")
+        self.embedding = embedding
+        self.path = path
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._meta_path = os.path.join(path, "meta.json")
+        self._lock = threading.RLock()
+        self._dim = None
+        self._ids = []         # 행 번호 -> 문서 id (삭제된 행은 None)
+        self._metadata = []
+        self._rows = {}        # 문서 id -> 행 번호
+        self._search_state = None
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def _load(self):
+        os.makedirs(self.path, exist_ok=True)
+        if not os.path.exists(self._meta_path):
+            open(self._vectors_path, "wb").close()
+            return
+        with open(self._meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        self._dim = meta["dim"]
+        self._ids = meta["ids"]
+        self._metadata = meta["metadata"]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids) if doc_id is not None}
+        # compact() 가 중간에 중단된 경우: 메타데이터가 이미 바뀌었으면 벡터 파일 교체를 마저 하고, 아니면 버림
+        tmp_path = f"{self._vectors_path}.tmp"
+        if os.path.exists(tmp_path):
+            if self._dim and os.path.getsize(tmp_path) == len(self._ids) * self._dim * 4:
+                os.replace(tmp_path, self._vectors_path)
+            else:
+                os.remove(tmp_path)
+        # save() 이전에 중단되어 메타데이터에 없는 행은 버림
+        if self._dim:
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(len(self._ids) * self._dim * 4)
+
+    def save(self):
+        with self._lock:
+            self._write_meta(self._ids, self._metadata)
+
+    def _write_meta(self, ids: list, metadata: list):
+        tmp_path = f"{self._meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self._dim, "ids": ids, "metadata": metadata}, f, ensure_ascii=False)
+        os.replace(tmp_path, self._meta_path)
+
+    def clear(self):
+        with self._lock:
+            self._dim = None
+            self._ids, self._metadata, self._rows = [], [], {}
+            self._search_state = None
+            open(self._vectors_path, "wb").close()
+            if os.path.exists(self._meta_path):
+                os.remove(self._meta_path)
+
+    def ids(self) -> set:
+        with self._lock:
+            return set(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # Pinecone Index 와 같은 인터페이스
+    def upsert(self, vectors: list):
+        with self._lock:
+            if not vectors:
+                return {"upserted_count": 0}
+            if self._dim is None:
+                self._dim = len(vectors[0][1])
+
+            for _, values, _ in vectors:
+                if len(values) != self._dim:
+                    raise ValueError(f"벡터 차원이 다릅니다: {len(values)} != {self._dim}")
+
+            new_values = []
+            updates = {}  # 이미 있는 문서의 행 번호 -> 새 벡터
+            for doc_id, values, metadata in vectors:
+                row = self._rows.get(doc_id)
+                if row is None:
+                    self._rows[doc_id] = len(self._ids)
+                    self._ids.append(doc_id)
+                    self._metadata.append(metadata)
+                    new_values.append(values)
+                else:
+                    self._metadata[row] = metadata
+                    updates[row] = values
+
+            # 새 행을 먼저 붙여서 파일 크기를 전체 행 수에 맞춘 뒤 기존 행을 덮어씀
+            # (같은 배치에서 새로 추가된 id 가 다시 나오면 그 행도 덮어씀)
+            if new_values:
+                with open(self._vectors_path, "ab") as f:
+                    f.write(np.asarray(new_values, dtype=np.float32).tobytes())
+            if updates:
+                matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(len(self._ids), self._dim))
+                matrix[list(updates)] = np.asarray(list(updates.values()), dtype=np.float32)
+                matrix.flush()
+                del matrix
+            self._search_state = None
+            return {"upserted_count": len(vectors)}
+
+    def delete(self, ids: list = None, delete_all: bool = False, **kwargs):
+        with self._lock:
+            if delete_all:
+                self.clear()
+                return {}
+            for doc_id in ids or []:
+                row = self._rows.pop(doc_id, None)
+                if row is not None:
+                    self._ids[row] = None
+                    self._metadata[row] = None
+            self._search_state = None
+            return {}
+
+    def compact(self):
+        """
+        삭제된 행을 제거하고 파일을 다시 씀.
+        두 파일을 임시 경로에 쓴 뒤 메타데이터 -> 벡터 순서로 교체 (그 사이에 중단되면 _load 가 벡터 교체를 마저 함)
+        """
+        with self._lock:
+            live = [row for row, doc_id in enumerate(self._ids) if doc_id is not None]
+            if len(live) == len(self._ids):
+                return
+            matrix = self._matrix()
+            tmp_path = f"{self._vectors_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                for i in range(0, len(live), SEARCH_CHUNK_ROWS):
+                    f.write(np.ascontiguousarray(matrix[live[i:i + SEARCH_CHUNK_ROWS]]).tobytes())
+            del matrix
+            ids = [self._ids[row] for row in live]
+            metadata = [self._metadata[row] for row in live]
+            self._write_meta(ids, metadata)
+            os.replace(tmp_path, self._vectors_path)
+            self._ids, self._metadata = ids, metadata
+            self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            self._search_state = None
+
+    def _matrix(self) -> np.ndarray:
+        if not self._ids:
+            return np.empty((0, self._dim or 0), dtype=np.float32)
+        return np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(self._ids), self._dim))
+
+    def _state(self) -> dict:
+        """
+        검색에 필요한 값 (행렬, 행별 제곱 norm, 살아있는 행, ivf / hnsw 인덱스). 데이터가 바뀌면 다시 만듦
+        """
+        with self._lock:
+            if self._search_state is not None:
+                return self._search_state
+            matrix = self._matrix()
+            live = np.array([doc_id is not None for doc_id in self._ids], dtype=bool)
+            norms = np.empty(len(matrix), dtype=np.float32)
+            for i in range(0, len(matrix), SEARCH_CHUNK_ROWS):
+                block = np.asarray(matrix[i:i + SEARCH_CHUNK_ROWS])
+                norms[i:i + len(block)] = np.einsum("ij,ij->i", block, block)
+            state = {"matrix": matrix, "norms": norms, "live": live}
+
+            live_rows = np.flatnonzero(live)
+            if self.index_type == "ivf" and len(live_rows):
+                nlist = min(self.nlist or max(1, int(np.sqrt(len(live_rows)))), len(live_rows))
+                rng = np.random.default_rng(0)
+                sample_rows = np.sort(rng.choice(live_rows, min(len(live_rows), nlist * 32), replace=False))
+                centroids = _kmeans(np.asarray(matrix[sample_rows]), nlist)
+                labels = np.empty(len(live_rows), dtype=np.int64)
+                centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+                for i in range(0, len(live_rows), SEARCH_CHUNK_ROWS):
+                    rows = live_rows[i:i + SEARCH_CHUNK_ROWS]
+                    dist = centroid_norms[None, :] - 2 * np.asarray(matrix[rows]) @ centroids.T
+                    labels[i:i + len(rows)] = dist.argmin(axis=1)
+                order = np.argsort(labels, kind="stable")
+                bounds = np.searchsorted(labels[order], np.arange(nlist + 1))
+                state["centroids"] = centroids
+                state["lists"] = [live_rows[order[bounds[c]:bounds[c + 1]]] for c in range(nlist)]
+            elif self.index_type == "hnsw" and len(live_rows):
+                index = faiss.IndexHNSWFlat(self._dim, self.hnsw_m)  # 기본 metric = 제곱 L2
+                for i in range(0, len(live_rows), SEARCH_CHUNK_ROWS):
+                    index.add(np.ascontiguousarray(matrix[live_rows[i:i + SEARCH_CHUNK_ROWS]]))
+                index.hnsw.efSearch = self.ef_search
+                state["hnsw"] = (index, live_rows)
+
+            self._search_state = state
+            return state
+
+    def search_by_vector(self, vector: list[float], k: int = 4) -> list[tuple[int, float]]:
+        """
+        Returns:
+            list: 거리(제곱 L2)가 가까운 순서의 (행 번호, 거리)
+        """
+        state = self._state()
+        if not self._rows:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query_norm = float(query @ query)
+        matrix, norms = state["matrix"], state["norms"]
+
+        if "hnsw" in state:
+            index, live_rows = state["hnsw"]
+            distances, positions = index.search(query[None, :], min(k, len(live_rows)))
+            keep = positions[0] >= 0
+            return list(zip(live_rows[positions[0][keep]].tolist(), distances[0][keep].tolist()))
+
+        if "centroids" in state:
+            centroids = state["centroids"]
+            probe = np.argsort(np.einsum("ij,ij->i", centroids, centroids) - 2 * centroids @ query)[:self.nprobe]
+            rows = np.concatenate([state["lists"][c] for c in probe])
+            blocks = [(rows, lambda rows=rows: matrix[rows], None)]
+        else:
+            # 전수 탐색은 연속된 행 블록 단위로 읽음 (fancy indexing 복사 없음), 삭제된 행은 거리 계산 후 제외
+            blocks = [
+                (np.arange(i, min(i + SEARCH_CHUNK_ROWS, len(matrix))),
+                 lambda i=i: matrix[i:i + SEARCH_CHUNK_ROWS],
+                 state["live"][i:i + SEARCH_CHUNK_ROWS])
+                for i in range(0, len(matrix), SEARCH_CHUNK_ROWS)
+            ]
+
+        best_dist = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        for rows, read_block, live in blocks:
+            if not len(rows):
+                continue
+            # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2
+            dist = norms[rows] - 2 * (np.asarray(read_block()) @ query) + query_norm
+            if live is not None and not live.all():
+                dist, rows = dist[live], rows[live]
+            best_dist, best_rows = _top_k(np.concatenate([best_dist, dist]), np.concatenate([best_rows, rows]), k)
+        return list(zip(best_rows.tolist(), np.maximum(best_dist, 0).tolist()))
+
+    def _document(self, row: int) -> Document:
+        metadata = dict(self._metadata[row])
+        text = metadata.pop("text", "")
+        return Document(page_content=text, metadata=metadata)
+
+    def similarity_search_by_vector_with_score(self, embedding: list[float], k: int = 4) -> list[tuple[Document, float]]:
+        return [(self._document(row), dist) for row, dist in self.search_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> list[tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self.embedding.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return self._euclidean_relevance_score_fn
+
+    def add_texts(self, texts: Iterable[str], metadatas: list[dict] = None, ids: list[str] = None,
+                  **kwargs: Any) -> list[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [m.get("id") or str(len(self._ids) + i) for i, m in enumerate(metadatas)]
+        vectors = self.embedding.embed_documents(texts)
+        self.upsert(vectors=[
+            (doc_id, vector, {**metadata, "text": text})
+            for doc_id, vector, metadata, text in zip(ids, vectors, metadatas, texts)
+        ])
+        self.save()
+        return ids
+
+    @classmethod
+    def from_texts(cls, texts: list[str], embedding: Embeddings, metadatas: list[dict] = None,
+                   ids: list[str] = None, **kwargs: Any) -> "LocalVectorStore":
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids)
+        return store
@@ -1,8 +1,19 @@
 import os
+import sys
+
+# 스크립트로 실행하면 이 디렉토리의 keyword.py 가 표준 라이브러리 keyword 모듈을 가리므로
+# 이 디렉토리를 잠시 빼고 collections(-> keyword)를 먼저 로드
+_sys_path = sys.path[:]
+sys.path[:] = [p for p in sys.path if os.path.abspath(p or ".") != os.path.dirname(os.path.abspath(__file__))]
+import collections  # noqa: E402,F401
+sys.path[:] = _sys_path
+
 import pinecone
 from dotenv import load_dotenv
 from pinecone import Pinecone, ServerlessSpec
 
+from ingest import clear_manifest
+
 load_dotenv()
 PINECONE_API_KEY= os.getenv('PINECONE_API_KEY')
 PINECONE_HOST= os.getenv('PINECONE_HOST')
@@ -11,4 +22,7 @@ PINECONE_HOST= os.getenv('PINECONE_HOST')
 # Pinecone record Reset
 pc = Pinecone(api_key=PINECONE_API_KEY)
 index = pc.Index(host=PINECONE_HOST)
-index.delete(delete_all=True)
\ No newline at end of file
+index.delete(delete_all=True)
+
+# 업서트 기록도 같이 초기화 (다음 ingest.py 실행 때 전체 재업서트)
+clear_manifest()
@@ -0,0 +1,247 @@
+import time
+import random
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from langchain_core.embeddings import Embeddings
+
+
+# 분당 요청 수(RPM) / 토큰 수(TPM) 제한을 지키는 rate limiter
+class RateLimiter:
+    """
+    최근 60초 동안의 요청 / 토큰 사용량을 기록해서 한도를 넘지 않게 대기.
+    429를 받으면 backoff()로 지수 대기 + 허용 속도를 줄이고, 성공이 이어지면 천천히 원래 속도로 회복.
+    """
+
+    def __init__(self, rpm: int = 3000, tpm: int = 1_000_000, window: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self._events = deque()  # (시각, 토큰 수)
+        self._tokens = 0
+        self._scale = 1.0       # 429 이후 줄어든 허용 비율
+        self._blocked_until = 0.0
+        self._failures = 0
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self._events and now - self._events[0][0] > self.window:
+            self._tokens -= self._events.popleft()[1]
+
+    def acquire(self, tokens: int):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                rpm = max(1, int(self.rpm * self._scale))
+                tpm = max(tokens, int(self.tpm * self._scale))
+                if now >= self._blocked_until and len(self._events) < rpm and self._tokens + tokens <= tpm:
+                    self._events.append((now, tokens))
+                    self._tokens += tokens
+                    return
+                wait_for = max(self._blocked_until - now, 0.05)
+                if self._events and now >= self._blocked_until:
+                    wait_for = max(wait_for, self.window - (now - self._events[0][0]))
+            time.sleep(min(wait_for, 1.0))
+
+    def wait(self):
+        """
+        backoff() 대기 시간이 끝날 때까지만 기다림 (요청 수 / 토큰을 쓰지 않음)
+        """
+        while True:
+            with self._lock:
+                wait_for = self._blocked_until - time.monotonic()
+            if wait_for <= 0:
+                return
+            time.sleep(min(wait_for, 1.0))
+
+    def backoff(self):
+        with self._lock:
+            self._failures += 1
+            self._scale = max(0.1, self._scale * 0.5)
+            delay = min(60.0, 2 ** self._failures) * (0.5 + random.random() / 2)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._scale = min(1.0, self._scale * 1.1)
+
+
+def is_rate_limit_error(e: Exception) -> bool:
+    status = getattr(e, "status_code", None) or getattr(e, "status", None)
+    return status == 429 or "RateLimit" in type(e).__name__ or "429" in str(e)
+
+
+def estimate_tokens(text: str) -> int:
+    # 한글은 글자당 약 1토큰, 영문은 약 4글자당 1토큰 -> utf-8 바이트 / 3 으로 대략 추정
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def _batched(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _call_with_retry(fn, limiter: RateLimiter, max_retries: int):
+    for attempt in range(max_retries + 1):
+        try:
+            result = fn()
+            limiter.success()
+            return result
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == max_retries:
+                raise
+            limiter.backoff()
+            limiter.wait()
+
+
+def run_pipeline(documents, embedder: Embeddings, index, manifest: set, on_checkpoint=None,
+                 batch_size: int = 100, workers: int = 4, limiter: RateLimiter = None,
+                 index_limiter: RateLimiter = None, max_retries: int = 6, delete_removed: bool = True,
+                 checkpoint_interval: float = 5.0) -> dict:
+    """
+    Document 스트림을 batch_size 단위로 임베딩 -> 인덱스 업서트 (workers 개 스레드에서 병렬 처리).
+    - documents: metadata['id'] 가 있는 Document iterable (generator 가능)
+    - index: Pinecone Index 처럼 upsert(vectors=[(id, values, metadata)]) / delete(ids=[...]) 를 제공하는 객체
+    - manifest: 이미 업서트된 id 집합 (체크포인트). 완료된 배치 id가 추가되고
+      최대 checkpoint_interval 초마다 (그리고 마지막에) on_checkpoint(manifest)가 호출됨
+    - 진행 중인 배치 수는 workers * 2 로 제한 (입력을 너무 앞서 읽지 않도록)
+    - delete_removed: 입력에 없는 manifest id는 인덱스에서 삭제
+    - limiter 는 임베딩 API, index_limiter 는 인덱스 요청용 (한쪽의 429가 다른 쪽 속도를 줄이지 않도록 따로 둠)
+
+    Returns:
+        dict: 처리 통계 (total, skipped, upserted, deleted, batches, seconds)
+    """
+    limiter = limiter or RateLimiter()
+    index_limiter = index_limiter or RateLimiter()
+    stats = {"total": 0, "skipped": 0, "upserted": 0, "deleted": 0, "batches": 0}
+    seen = set()
+    start = time.perf_counter()
+    last_checkpoint = [start]
+
+    def save(force: bool = False):
+        now = time.perf_counter()
+        if on_checkpoint is not None and (force or now - last_checkpoint[0] >= checkpoint_interval):
+            on_checkpoint(manifest)
+            last_checkpoint[0] = now
+
+    def pending_documents():
+        for doc in documents:
+            doc_id = doc.metadata["id"]
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            stats["total"] += 1
+            if doc_id in manifest:
+                stats["skipped"] += 1
+                continue
+            yield doc
+
+    def process(batch: list) -> list:
+        texts = [doc.page_content for doc in batch]
+        # 임베딩 캐시(CachedEmbeddings)가 있으면 API로 나갈 텍스트만 토큰 / 요청 수에 포함 (전부 캐시면 대기 없음)
+        billed = embedder.uncached(texts) if hasattr(embedder, "uncached") else texts
+        if billed:
+            limiter.acquire(sum(estimate_tokens(t) for t in billed))
+        vectors = _call_with_retry(lambda: embedder.embed_documents(texts), limiter, max_retries)
+        records = [
+            (doc.metadata["id"], vector, {**doc.metadata, "text": doc.page_content})
+            for doc, vector in zip(batch, vectors)
+        ]
+        _call_with_retry(lambda: index.upsert(vectors=records), index_limiter, max_retries)
+        return [doc.metadata["id"] for doc in batch]
+
+    def checkpoint(done_ids: list):
+        manifest.update(done_ids)
+        stats["upserted"] += len(done_ids)
+        stats["batches"] += 1
+        save()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        try:
+            for batch in _batched(pending_documents(), batch_size):
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        checkpoint(future.result())
+                in_flight.add(executor.submit(process, batch))
+            for future in in_flight:
+                checkpoint(future.result())
+        finally:
+            # 실패한 경우에도 이미 끝난 배치는 체크포인트에 남김
+            for future in in_flight:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    ids = future.result()
+                    if not manifest.issuperset(ids):
+                        checkpoint(ids)
+                else:
+                    future.cancel()
+            save(force=True)
+
+    if delete_removed:
+        removed = sorted(manifest - seen)
+        for batch in _batched(removed, batch_size):
+            _call_with_retry(lambda: index.delete(ids=batch), index_limiter, max_retries)
+            manifest.difference_update(batch)
+            stats["deleted"] += len(batch)
+            save()
+        save(force=True)
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+# 테스트 / 로컬 실행용 가짜 임베딩 (텍스트 해시 기반, 항상 같은 벡터)
+class FakeEmbeddings(Embeddings):
+    def __init__(self, dimension: int = 1536, latency: float = 0.0, fail_every: int = 0):
+        self.dimension = dimension
+        self.latency = latency
+        self.fail_every = fail_every  # n번째 호출마다 429 흉내
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> list[float]:
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        return [rng.uniform(-1, 1) for _ in range(self.dimension)]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and calls % self.fail_every == 0:
+            raise RuntimeError("429 Too Many Requests (fake)")
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._vector(text)
+
+
+# 테스트 / 로컬 실행용 메모리 인덱스 (Pinecone Index 의 upsert / delete 만 흉내)
+class InMemoryIndex:
+    def __init__(self):
+        self.vectors = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors: list):
+        with self._lock:
+            for vector_id, values, metadata in vectors:
+                self.vectors[vector_id] = (values, metadata)
+        return {"upserted_count": len(vectors)}
+
+    def delete(self, ids: list):
+        with self._lock:
+            for vector_id in ids:
+                self.vectors.pop(vector_id, None)
+        return {}
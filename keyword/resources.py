@@ -0,0 +1,98 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from langchain.chat_models import ChatOpenAI
+from langchain_community.embeddings import OpenAIEmbeddings
+from langchain_community.vectorstores import Pinecone as PineconeVectorStore
+from langchain.prompts import PromptTemplate
+from langchain.chains import RetrievalQA
+
+from ingest import load_keywords
+from embedding_cache import CachedEmbeddings
+from hybrid_search import KeywordIndex, HybridRetriever
+from local_store import LocalVectorStore, LOCAL_STORE_DIR
+from chunked_qa import ChunkedKeywordQA
+
+
+# Streamlit 재실행(rerun) 사이에 공유하는 리소스
+# - 파일에서 만드는 값은 파일 수정 시각(mtime)을 키에 포함해서, 파일이 바뀌었을 때만 다시 만듦
+# - 클라이언트 / 체인은 설정값이 키라서 설정이 같으면 프로세스 안에서 한 번만 생성 (네트워크 호출 없음)
+
+# stuff 모드 Prompt Template
+STUFF_PROMPT = PromptTemplate(
+    input_variables=["context", "question"],
+    template="""
+        아래 문서들을 참고하여, '{question}'와 관련되어 보이는 모든 키워드를 추출해줘.
+        각 키워드에 대해, 해당 키워드가 등장한 문서의 'ui', 'ad_ids', 그리고 원래 키워드('k') 정보를 함께 나열해줘.
+
+        문서:
+        {context}
+
+        답변은 다음 형식으로 작성해줘:
+        ui: <ui 정보>
+        ad_ids: <ad_ids 정보>
+        k: <키워드>
+
+        모든 관련 키워드를 누락 없이 출력해줘.
+    """
+)
+
+
+def file_mtime(path: str) -> float:
+    return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+
+def local_store_mtime(path: str = LOCAL_STORE_DIR) -> float:
+    # 로컬 벡터 저장소는 save() 때마다 meta.json 이 바뀜
+    return file_mtime(os.path.join(path, "meta.json"))
+
+
+@st.cache_data(show_spinner=False)
+def cached_keywords(csv_path: str, mtime: float) -> pd.DataFrame:
+    return load_keywords(csv_path)
+
+
+@st.cache_resource(show_spinner=False)
+def cached_keyword_index(csv_path: str, mtime: float) -> KeywordIndex:
+    return KeywordIndex(load_keywords(csv_path))
+
+
+@st.cache_resource(show_spinner=False)
+def cached_embeddings(api_key: str) -> CachedEmbeddings:
+    # 질문 임베딩도 로컬 캐시 사용
+    return CachedEmbeddings(OpenAIEmbeddings(openai_api_key=api_key))
+
+
+@st.cache_resource(show_spinner=False)
+def cached_vectorstore(backend: str, index_name: str, api_key: str, store_mtime: float):
+    """
+    backend=local 이면 data/local_vectors 의 로컬 저장소, 아니면 기존 Pinecone 인덱스에 연결
+    """
+    embeddings = cached_embeddings(api_key)
+    if backend == "local":
+        return LocalVectorStore(embeddings)
+    return PineconeVectorStore.from_existing_index(index_name=index_name, embedding=embeddings)
+
+
+@st.cache_resource(show_spinner=False)
+def cached_qa(mode: str, backend: str, index_name: str, api_key: str, csv_path: str, csv_mtime: float,
+              store_mtime: float, chunk_tokens: int, max_concurrency: int, k: int = 200):
+    """
+    로컬 키워드 인덱스 + 벡터 저장소 retriever 와 QA 체인 (mode: chunked / stuff)
+    """
+    retriever = HybridRetriever(
+        keyword_index=cached_keyword_index(csv_path, csv_mtime),
+        vectorstore=cached_vectorstore(backend, index_name, api_key, store_mtime),
+        k=k,
+    )
+    llm = ChatOpenAI(openai_api_key=api_key)
+    if mode == "stuff":
+        return RetrievalQA.from_chain_type(
+            llm=llm,
+            chain_type="stuff",
+            retriever=retriever,
+            chain_type_kwargs={"prompt": STUFF_PROMPT}
+        )
+    return ChunkedKeywordQA(retriever, llm, max_chunk_tokens=chunk_tokens, max_concurrency=max_concurrency)
@@ -0,0 +1,15 @@
+import os
+import sys
+
+# collections(-> 표준 라이브러리 keyword)를 먼저 로드한 뒤 앱 디렉토리 추가
+# (keyword/keyword.py 가 표준 라이브러리 keyword 모듈을 가리지 않도록)
+import collections  # noqa: F401
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ("chatBot", "keyword"):
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault("DB_NAME_LOGS", "adn_logs")
+os.environ.setdefault("DB_NAME_ADS", "adn_ads")
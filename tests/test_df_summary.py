@@ -0,0 +1,24 @@
+import pandas as pd
+
+from functions import df_summary
+from functions.df_summary import count_tokens, summarize_df
+
+
+def test_fallback_count_is_conservative_for_korean(monkeypatch):
+    # tiktoken 을 쓸 수 없는 환경
+    monkeypatch.setattr(df_summary, "_encoding", False)
+    assert count_tokens("abcd") == 4
+    assert count_tokens("대행사별 클릭수") == 11  # 한글 7자(21바이트) + 공백, 글자 수(8)보다 크게
+    assert count_tokens("") == 0
+
+
+def test_summary_fits_token_budget(monkeypatch):
+    monkeypatch.setattr(df_summary, "_encoding", False)
+    df = pd.DataFrame({
+        "wdate_str": [f"2025-03-{d % 28 + 1:02d}" for d in range(3000)],
+        "agency": [f"대행사{i % 40}" for i in range(3000)],
+        "click_cnt": range(3000),
+    })
+    summary = summarize_df(df, token_budget=1500)
+    assert summary.startswith("### 개요")
+    assert count_tokens(summary) <= 1500
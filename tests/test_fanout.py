@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from functions import chat_handler
+
+TARGETS = {"2024": ("t_2024", "logs"), "2025": ("t_2025", "logs")}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {"route": 0, "nl_to_sql": []}
+
+    def route_question(nl_question, history, table, db_name):
+        calls["route"] += 1
+        return ("DB", f"SELECT 1 FROM {table}") if "노출" in nl_question else ("일반", "답변")
+
+    def nl_to_sql(nl_question, history, table, db_name):
+        calls["nl_to_sql"].append(table)
+        return f"SELECT 1 FROM {table}"
+
+    monkeypatch.setattr(chat_handler, "ROUTING_MODE", "single")
+    monkeypatch.setattr(chat_handler, "PRE_CLASSIFY_ENABLED", False)
+    monkeypatch.setattr(chat_handler, "route_question", route_question)
+    monkeypatch.setattr(chat_handler, "nl_to_sql", nl_to_sql)
+    monkeypatch.setattr(chat_handler, "run_query_df", lambda sql, db_name: pd.DataFrame({"v": [1]}))
+    return calls
+
+
+def test_general_question_routes_once_without_fan_out(calls):
+    assert chat_handler._fan_out("안녕", None, TARGETS) == (None, None, None, "답변")
+    assert calls == {"route": 1, "nl_to_sql": []}
+
+
+def test_db_question_reuses_routed_sql_for_first_table(calls):
+    sql, original_df, _, answer = chat_handler._fan_out("노출수", None, TARGETS)
+    assert calls == {"route": 1, "nl_to_sql": ["t_2025"]}
+    assert sql == "-- 2024\nSELECT 1 FROM t_2024\n\n-- 2025\nSELECT 1 FROM t_2025"
+    assert list(original_df["구분"]) == ["2024", "2025"] and answer is None
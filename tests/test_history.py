@@ -0,0 +1,49 @@
+from functions.history import HistoryManager, strip_result_tables
+
+
+def turns(n):
+    history = []
+    for i in range(n):
+        history.append({"role": "user", "content": f"질문 {i}"})
+        history.append({"role": "assistant", "content": f"답변 {i}"})
+    return history
+
+
+def test_keeps_recent_turns_and_summarizes_older_ones():
+    calls = []
+
+    def summarize(previous, messages):
+        calls.append([m["content"] for m in messages])
+        return "\n".join(filter(None, [previous, *(m["content"] for m in messages)]))
+
+    manager = HistoryManager(keep_turns=2, summarize=summarize)
+    window = manager.window(turns(4))
+    assert window[0]["role"] == "system" and "질문 1" in window[0]["content"]
+    assert [m["content"] for m in window[1:]] == ["질문 2", "답변 2", "질문 3", "답변 3"]
+
+    # 한 턴이 더 밀려나면 새로 밀려난 턴만 요약에 추가
+    manager.window(turns(5))
+    assert calls == [["질문 0", "답변 0", "질문 1", "답변 1"], ["질문 2", "답변 2"]]
+
+
+def test_drops_duplicated_current_question():
+    manager = HistoryManager(keep_turns=3)
+    history = turns(1) + [{"role": "user", "content": "새 질문"}]
+    assert manager.window(history, "새 질문") == turns(1)
+
+
+def test_falls_back_to_question_list_without_summarize():
+    window = HistoryManager(keep_turns=1).window(turns(3))
+    assert window[0]["content"] == "이전 대화 요약:\n- 이전 질문: 질문 0\n- 이전 질문: 질문 1"
+
+
+def test_token_budget_moves_recent_turns_into_summary():
+    history = turns(2)
+    history[1]["content"] = "긴 답변 " * 500
+    window = HistoryManager(keep_turns=3, token_budget=200).window(history)
+    assert [m["content"] for m in window[1:]] == ["질문 1", "답변 1"]
+
+
+def test_strip_result_tables():
+    content = "**📊 결과 테이블:**\n| a |\n|---|\n| 1 |\n| 2 |\n\n**🔍 해석:** 끝"
+    assert strip_result_tables(content) == "**📊 결과 테이블:** (2행, 생략)\n\n**🔍 해석:** 끝"
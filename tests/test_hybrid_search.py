@@ -0,0 +1,45 @@
+import pandas as pd
+from langchain_core.documents import Document
+
+from hybrid_search import KeywordIndex, HybridRetriever
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.calls = 0
+
+    def similarity_search(self, query, k=4):
+        self.calls += 1
+        return [Document(page_content="vector", metadata={"id": "vector-1"})]
+
+
+def make_retriever(**kwargs):
+    df = pd.DataFrame({
+        "ui": ["u1", "u2", "u3"],
+        "ad_ids": ["a1", "a2", "a3"],
+        "k": ["여름 원피스", "원피스 세일", "남성 운동화"],
+    })
+    store = FakeVectorStore()
+    return HybridRetriever(keyword_index=KeywordIndex(df), vectorstore=store, **kwargs), store
+
+
+def test_exact_match_skips_vector_search():
+    retriever, store = make_retriever(k=10)
+    docs = retriever.invoke("남성 운동화")
+    assert store.calls == 0
+    assert docs[0].metadata["k"] == "남성 운동화"
+
+
+def test_few_token_matches_still_use_vector_search():
+    # '원피스' 토큰이 두 행에 있지만 k 개에 못 미치므로 벡터 검색 결과와 합침
+    retriever, store = make_retriever(k=10)
+    docs = retriever.invoke("원피스")
+    assert store.calls == 1
+    assert "vector-1" in [d.metadata["id"] for d in docs]
+    assert retriever.stats() == {"local_only": 0, "fused": 1}
+
+
+def test_min_local_overrides_k():
+    retriever, store = make_retriever(k=10, min_local=2)
+    retriever.invoke("원피스")
+    assert store.calls == 0
@@ -0,0 +1,38 @@
+import os
+import sys
+import importlib
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+chat_handler = importlib.import_module("2_chatBot.functions.chat_handler")
+
+
+@pytest.fixture
+def collations(monkeypatch):
+    values = {}
+    monkeypatch.setattr(chat_handler, "get_column_collation", lambda table, column, db_name: values[table])
+    monkeypatch.setattr(chat_handler, "_join_collations_match", None)
+    monkeypatch.setattr(chat_handler, "JOIN_COLLATION", None)
+    return values
+
+
+def test_matching_collations_use_plain_equality(collations):
+    collations.update(adn_clicks_2025="utf8mb4_general_ci", adn_paper_info="utf8mb4_general_ci")
+    assert chat_handler._join_condition() == "p.paper_code = a.paper_code"
+
+
+def test_different_collations_keep_default_collate(collations):
+    collations.update(adn_clicks_2025="utf8mb4_general_ci", adn_paper_info="utf8mb4_unicode_ci")
+    assert chat_handler._join_condition() == chat_handler.DEFAULT_JOIN_CONDITION
+
+
+def test_lookup_failure_keeps_default_collate(collations):
+    # collations 가 비어 있어 조회가 KeyError 로 실패
+    assert chat_handler._join_condition() == chat_handler.DEFAULT_JOIN_CONDITION
+    assert chat_handler._join_collations_match is None
+
+
+def test_join_collation_setting(collations, monkeypatch):
+    monkeypatch.setattr(chat_handler, "JOIN_COLLATION", "utf8mb4_unicode_ci")
+    assert chat_handler._join_condition() == "p.paper_code = a.paper_code COLLATE utf8mb4_unicode_ci"
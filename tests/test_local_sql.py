@@ -0,0 +1,50 @@
+import pytest
+
+from functions.local_sql import mask_literals, to_duckdb_sql, collation_sensitive, date_range, replace_tables
+
+TEXT = {"agency", "paper_code", "wdate_str"}
+
+
+def test_mask_literals_keeps_positions():
+    sql = "SELECT 'a -- b' FROM t -- 주석"
+    masked = mask_literals(sql)
+    assert len(masked) == len(sql)
+    assert "--" not in masked and masked.startswith("SELECT ")
+
+
+def test_to_duckdb_sql():
+    assert to_duckdb_sql('SELECT `a` FROM t WHERE b = "x" COLLATE utf8mb4_unicode_ci LIMIT 5, 10;') == \
+        "SELECT \"a\" FROM t WHERE b = 'x' LIMIT 10 OFFSET 5"
+
+
+def test_date_range():
+    assert date_range("SELECT * FROM t WHERE wdate_str BETWEEN '2025-01-01' AND '2025-01-31'") == ("2025-01-01", "2025-01-31")
+    assert date_range("SELECT * FROM t WHERE wdate_str >= '2025-01-01' AND wdate_str < '2025-02-01'") == ("2025-01-01", "2025-02-01")
+    assert date_range("SELECT * FROM t WHERE wdate_str = '2025-01-01' OR id = 1") == (None, None)
+
+
+def test_replace_tables():
+    sql = "SELECT * FROM adn_logs.adn_clicks_2025 AS a WHERE a.x = 'adn_clicks_2025'"
+    assert replace_tables(sql, {"adn_clicks_2025": "v"}) == "SELECT * FROM v AS a WHERE a.x = 'adn_clicks_2025'"
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM t WHERE agency = 'Agency_1'",
+    "SELECT * FROM t WHERE id IN ('가', '나')",
+    "SELECT * FROM t WHERE id = '1 '",
+    "SELECT * FROM t WHERE `agency` LIKE '1%'",
+    "SELECT * FROM t WHERE a.agency <> b.agency",
+    "SELECT * FROM a JOIN p ON p.paper_code = a.paper_code",
+    "SELECT * FROM t ORDER BY view_cnt DESC, agency",
+])
+def test_collation_sensitive(sql):
+    assert collation_sensitive(sql, TEXT)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT agency, SUM(click_cnt) AS c FROM t WHERE wdate_str BETWEEN '2025-01-01' AND '2025-01-31' GROUP BY agency ORDER BY c DESC",
+    "SELECT * FROM t WHERE wdate_str LIKE '2025-01%' ORDER BY wdate_str",
+    "SELECT * FROM t WHERE click_cnt > 10 ORDER BY view_cnt",
+])
+def test_collation_safe(sql):
+    assert not collation_sensitive(sql, TEXT)
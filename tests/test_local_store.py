@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+from local_store import LocalVectorStore
+from pipeline import FakeEmbeddings
+
+
+def vector(value: float, dim: int = 4) -> list[float]:
+    return [value] * dim
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalVectorStore(FakeEmbeddings(4), path=str(tmp_path))
+
+
+def test_upsert_search_round_trip(store, tmp_path):
+    store.upsert(vectors=[("a", vector(0.0), {"text": "A"}), ("b", vector(1.0), {"text": "B"})])
+    store.save()
+
+    reopened = LocalVectorStore(FakeEmbeddings(4), path=str(tmp_path))
+    assert reopened.ids() == {"a", "b"}
+    (doc, dist), = reopened.similarity_search_by_vector_with_score(vector(0.9), k=1)
+    assert doc.page_content == "B"
+    assert dist == pytest.approx(0.04, abs=1e-5)
+
+
+def test_upsert_mixing_existing_and_new_ids(store, tmp_path):
+    store.upsert(vectors=[("a", vector(0.0), {"text": "A"})])
+    # 새 id 가 기존 id 보다 먼저 나와도 행 수에 맞게 파일이 늘어난 뒤 덮어씀
+    store.upsert(vectors=[("b", vector(1.0), {"text": "B"}), ("a", vector(5.0), {"text": "A2"})])
+    assert len(store) == 2
+    assert os.path.getsize(tmp_path / "vectors.f32") == 2 * 4 * 4
+    results = dict((doc.page_content, dist) for doc, dist in store.similarity_search_by_vector_with_score(vector(5.0), k=2))
+    assert results == {"A2": pytest.approx(0.0), "B": pytest.approx(64.0)}
+
+    # 같은 배치에서 새로 추가된 id 가 다시 나오면 마지막 값으로 덮어씀
+    store.upsert(vectors=[("c", vector(1.0), {"text": "C"}), ("c", vector(3.0), {"text": "C2"})])
+    (doc, dist), = store.similarity_search_by_vector_with_score(vector(3.0), k=1)
+    assert (doc.page_content, dist) == ("C2", pytest.approx(0.0))
+
+
+def test_compact_drops_deleted_rows(store, tmp_path):
+    store.upsert(vectors=[(doc_id, vector(i), {"text": doc_id}) for i, doc_id in enumerate("abcd")])
+    store.delete(ids=["a", "c"])
+    store.compact()
+    assert os.path.getsize(tmp_path / "vectors.f32") == 2 * 4 * 4
+    assert not os.path.exists(tmp_path / "vectors.f32.tmp")
+
+    reopened = LocalVectorStore(FakeEmbeddings(4), path=str(tmp_path))
+    assert [doc.page_content for doc in reopened.similarity_search_by_vector(vector(3.0), k=2)] == ["d", "b"]
+
+
+def test_load_finishes_interrupted_compact(store, tmp_path):
+    store.upsert(vectors=[(doc_id, vector(i), {"text": doc_id}) for i, doc_id in enumerate("abc")])
+    store.save()
+    # 메타데이터는 교체됐지만 벡터 파일은 교체 전에 중단된 상태
+    store._write_meta(["b", "c"], [{"text": "b"}, {"text": "c"}])
+    np.asarray([vector(1.0), vector(2.0)], dtype=np.float32).tofile(tmp_path / "vectors.f32.tmp")
+
+    reopened = LocalVectorStore(FakeEmbeddings(4), path=str(tmp_path))
+    assert not os.path.exists(tmp_path / "vectors.f32.tmp")
+    assert [doc.page_content for doc in reopened.similarity_search_by_vector(vector(2.0), k=2)] == ["c", "b"]
+
+
+def test_load_discards_compact_interrupted_before_meta(store, tmp_path):
+    store.upsert(vectors=[(doc_id, vector(i), {"text": doc_id}) for i, doc_id in enumerate("abc")])
+    store.save()
+    np.asarray([vector(1.0)], dtype=np.float32).tofile(tmp_path / "vectors.f32.tmp")
+
+    reopened = LocalVectorStore(FakeEmbeddings(4), path=str(tmp_path))
+    assert not os.path.exists(tmp_path / "vectors.f32.tmp")
+    assert reopened.ids() == {"a", "b", "c"}
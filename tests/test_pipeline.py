@@ -0,0 +1,89 @@
+from langchain_core.documents import Document
+
+from embedding_cache import CachedEmbeddings
+from pipeline import RateLimiter, FakeEmbeddings, InMemoryIndex, run_pipeline, estimate_tokens
+
+
+class RecordingLimiter(RateLimiter):
+    # backoff 를 기록만 하고 기다리지 않음
+    def __init__(self):
+        super().__init__()
+        self.backoffs = 0
+
+    def backoff(self):
+        self.backoffs += 1
+
+
+class FlakyIndex(InMemoryIndex):
+    # 처음 fail_first 번의 upsert 는 429
+    def __init__(self, fail_first: int):
+        super().__init__()
+        self.fail_first = fail_first
+        self.upserts = 0
+
+    def upsert(self, vectors: list):
+        self.upserts += 1
+        if self.upserts <= self.fail_first:
+            raise RuntimeError("429 Too Many Requests (fake)")
+        return super().upsert(vectors)
+
+
+def documents(ids):
+    return [Document(page_content=f"문서 {i}", metadata={"id": f"doc-{i}"}) for i in ids]
+
+
+def test_batches_retries_and_manifest():
+    embedder = FakeEmbeddings(dimension=8, fail_every=2)
+    index = FlakyIndex(fail_first=1)
+    limiter, index_limiter = RecordingLimiter(), RecordingLimiter()
+    manifest = set()
+    checkpoints = []
+
+    stats = run_pipeline(documents(range(25)), embedder, index, manifest,
+                         on_checkpoint=lambda ids: checkpoints.append(set(ids)),
+                         batch_size=10, workers=1, limiter=limiter, index_limiter=index_limiter)
+
+    assert stats["batches"] == 3 and stats["upserted"] == 25
+    assert manifest == {f"doc-{i}" for i in range(25)} == set(index.vectors)
+    assert checkpoints[-1] == manifest
+    # 임베딩 429 는 임베딩 limiter 에, 인덱스 429 는 인덱스 limiter 에만 반영
+    assert limiter.backoffs == embedder.calls - 3
+    assert index_limiter.backoffs == 1
+
+
+def test_skips_manifest_and_deletes_removed():
+    index = InMemoryIndex()
+    manifest = set()
+    run_pipeline(documents(range(5)), FakeEmbeddings(dimension=8), index, manifest, batch_size=2)
+
+    embedder = FakeEmbeddings(dimension=8)
+    stats = run_pipeline(documents(range(1, 7)), embedder, index, manifest, batch_size=2)
+    assert (stats["skipped"], stats["upserted"], stats["deleted"]) == (4, 2, 1)
+    assert embedder.calls == 1
+    assert manifest == set(index.vectors) == {f"doc-{i}" for i in range(1, 7)}
+
+
+def test_retry_wait_does_not_use_request_slots():
+    limiter = RateLimiter(rpm=1)
+    limiter.acquire(10)
+    limiter.wait()
+    assert len(limiter._events) == 1
+
+
+class CountingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__()
+        self.acquired = []
+
+    def acquire(self, tokens: int):
+        self.acquired.append(tokens)
+
+
+def test_cached_texts_are_not_charged(tmp_path):
+    embedder = CachedEmbeddings(FakeEmbeddings(dimension=8), path=str(tmp_path / "cache.sqlite"))
+    embedder.embed_documents([doc.page_content for doc in documents(range(5))])
+    limiter = CountingLimiter()
+
+    run_pipeline(documents(range(10)), embedder, InMemoryIndex(), set(), batch_size=5, workers=1, limiter=limiter)
+    # 첫 배치는 전부 캐시라 대기 없음, 두 번째 배치만 토큰 계산
+    assert limiter.acquired == [sum(estimate_tokens(doc.page_content) for doc in documents(range(5, 10)))]
@@ -0,0 +1,38 @@
+import pytest
+
+from functions import chat_handler
+from functions.chat_handler import pre_classify
+
+
+@pytest.mark.parametrize("question", [
+    "어제 대행사별 노출수 알려줘",
+    "이번 달 광고주별 클릭수 상위 10개",
+    "지난주 일별 전환수 추이",
+    "2025-03 매출 합계",
+])
+def test_metric_with_period_or_grouping_is_db(question):
+    assert pre_classify(question) == "DB"
+
+
+@pytest.mark.parametrize("question", [
+    "광고비 총액을 줄이려면 어떻게 해야 해?",
+    "전환율을 높이는 방법 top 5 알려줘",
+    "클릭률 평균이 보통 몇 %야?",
+    "CTR이 뭐야? 보통 몇 % 정도면 좋아?",
+    "최근 클릭수 추이",            # 기간이 구체적이지 않음
+    "지난주 전환이 왜 줄었어?",     # 조언 / 원인 질문
+    "어제 CTR이 뭐야?",
+])
+def test_conceptual_questions_are_never_db(question):
+    assert pre_classify(question) != "DB"
+
+
+def test_greetings_and_definitions_are_general():
+    assert pre_classify("안녕") == "일반"
+    assert pre_classify("CTR이 뭐야?") == "일반"
+
+
+def test_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(chat_handler, "PRE_CLASSIFY_ENABLED", False)
+    assert pre_classify("어제 대행사별 노출수 알려줘") is None
+    assert pre_classify("안녕") is None
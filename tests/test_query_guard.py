@@ -0,0 +1,124 @@
+import os
+import importlib.util
+from datetime import date, timedelta
+
+import pytest
+
+from functions import query_guard
+
+# 2_chatBot 의 같은 모듈 (functions 패키지 이름이 겹쳐서 파일 경로로 로드)
+_spec = importlib.util.spec_from_file_location(
+    "query_guard_2", os.path.join(os.path.dirname(__file__), "..", "2_chatBot", "functions", "query_guard.py")
+)
+query_guard_2 = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(query_guard_2)
+
+COLUMNS = ["id", "agency", "wdate_str", "bonus_click_sales"]
+SINCE = (date.today() - timedelta(days=31)).isoformat()
+
+
+@pytest.fixture(params=[query_guard, query_guard_2], ids=["chatBot", "2_chatBot"])
+def module(request):
+    return request.param
+
+
+def make_guard(module, rows=10_000_000, full_scan=True, max_scan_rows=5_000_000):
+    # 날짜 조건이 붙으면 추정 행 수가 줄어드는 EXPLAIN 대체물
+    def explain(query, db_name):
+        scanned = 1_000 if "WHERE wdate_str" in query or "wdate_str >=" in query else rows
+        return [{"rows": scanned, "filtered": 100, "type": "ALL" if full_scan else "range"}]
+
+    return module.QueryGuard(explain, columns=lambda table, db_name: COLUMNS, max_scan_rows=max_scan_rows,
+                             projections={"t": ["bonus_click_sales"]})
+
+
+def test_estimate_scan_multiplies_join_fanout(module):
+    plan = [{"rows": 100, "filtered": 10, "type": "ALL"}, {"rows": 5, "filtered": 100, "type": "ref"}]
+    assert module.estimate_scan(plan) == (100 + 10 * 5, True)
+    assert module.estimate_scan([{"id": 1}]) == (None, False)
+
+
+def test_single_table_projection_and_date_range(module):
+    query, notes = make_guard(module).prepare("SELECT * FROM t WHERE agency = 'a' ORDER BY id;", "db")
+    assert query == (
+        "SELECT /*+ MAX_EXECUTION_TIME(30000) */ `id`, `agency`, `wdate_str` FROM t "
+        f"WHERE wdate_str >= '{SINCE}' AND (agency = 'a') ORDER BY id"
+    )
+    assert len(notes) == 2
+
+
+def test_alias_qualifies_date_column(module):
+    query, _ = make_guard(module).prepare("SELECT a.id FROM t AS a GROUP BY a.id", "db")
+    assert f"FROM t AS a WHERE a.wdate_str >= '{SINCE}' GROUP BY a.id" in query
+
+
+def test_existing_date_condition_is_kept(module):
+    query, notes = make_guard(module).prepare("SELECT id FROM t WHERE wdate_str = '2025-01-01'", "db")
+    assert query == "SELECT /*+ MAX_EXECUTION_TIME(30000) */ id FROM t WHERE wdate_str = '2025-01-01'"
+    assert notes == []
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM t JOIN u ON t.id = u.id",
+    "SELECT * FROM t AS a LEFT JOIN u AS b ON a.id = b.id",
+    "SELECT * FROM t a INNER JOIN u b USING (id)",
+    "SELECT * FROM t STRAIGHT_JOIN u ON t.id = u.id",
+    "SELECT * FROM t, u WHERE t.id = u.id",
+    "SELECT * FROM t a, u b WHERE a.id = b.id",
+])
+def test_joins_are_not_rewritten(module, sql):
+    # 조인은 컬럼 축소 / 날짜 조건 추가 대상이 아니므로 힌트만 붙고, 추정치가 너무 크면 거부
+    guard = make_guard(module, rows=200_000)
+    query, notes = guard.prepare(sql, "db")
+    assert query == sql.replace("SELECT", "SELECT /*+ MAX_EXECUTION_TIME(30000) */", 1)
+    assert notes == []
+    with pytest.raises(module.QueryRejected):
+        make_guard(module).prepare(sql, "db")
+
+
+def test_group_by_commas_are_not_joins(module):
+    query, _ = make_guard(module).prepare("SELECT agency, id FROM t GROUP BY agency, id", "db")
+    assert f"FROM t WHERE wdate_str >= '{SINCE}' GROUP BY agency, id" in query
+
+
+def test_literals_are_not_parsed(module):
+    sql = "SELECT id FROM t WHERE agency = 'x join y, z' LIMIT 10"
+    query, _ = make_guard(module).prepare(sql, "db")
+    assert f"WHERE wdate_str >= '{SINCE}' AND (agency = 'x join y, z') LIMIT 10" in query
+
+
+def test_trailing_comment_is_stripped_before_rewrite(module):
+    guard = make_guard(module)
+    query, _ = guard.prepare("SELECT id FROM t WHERE agency = 'a' -- note", "db")
+    assert query.endswith(f"WHERE wdate_str >= '{SINCE}' AND (agency = 'a')")
+    query, notes = guard.prepare("SELECT id FROM t -- all time", "db")
+    assert query.endswith(f"FROM t WHERE wdate_str >= '{SINCE}'")
+    assert "--" not in query and len(notes) == 1
+
+
+def test_inline_comment_does_not_swallow_rewrite(module):
+    query, _ = make_guard(module).prepare("SELECT id FROM t WHERE agency = 'a' -- note\nORDER BY id", "db")
+    assert query.endswith(f"WHERE wdate_str >= '{SINCE}' AND (agency = 'a' -- note\n) ORDER BY id")
+    query, _ = make_guard(module).prepare("SELECT id FROM t # 전체\nORDER BY id", "db")
+    assert query.endswith(f"FROM t # 전체\nWHERE wdate_str >= '{SINCE}' ORDER BY id")
+
+
+def test_explain_failure_only_adds_hint(module):
+    def explain(query, db_name):
+        raise RuntimeError("no explain")
+
+    guard = module.QueryGuard(explain, max_execution_ms=0)
+    assert guard.prepare("SELECT * FROM t", "db") == ("SELECT * FROM t", ["EXPLAIN 실패로 스캔 검사 생략"])
+
+
+def test_explain_failure_is_recorded_on_trace():
+    from functions import tracing
+
+    def explain(query, db_name):
+        raise RuntimeError("no explain")
+
+    trace = tracing.begin_trace("test")
+    query_guard.QueryGuard(explain).prepare("SELECT * FROM t", "db")
+    trace.finish()
+    guard_span, = [s for s in trace.spans if s.name == "query_guard"]
+    assert guard_span.attributes["explain_error"] == "RuntimeError: no explain"
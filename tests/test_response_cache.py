@@ -0,0 +1,63 @@
+from functions.response_cache import ResponseCache, normalize_question
+
+SCHEMA = "wdate_str varchar, agency varchar"
+HISTORY = [
+    {"role": "user", "content": "지난주 대행사별 클릭수"},
+    {"role": "assistant", "content": "**💡 실행된 SQL:**\n```sql\nSELECT agency, SUM(click_cnt) FROM t\nGROUP BY agency\n```\n\n대행사별 클릭수입니다."},
+]
+
+
+def test_normalize_question():
+    assert normalize_question("  어제   노출수 알려줘?! ") == "어제 노출수 알려줘"
+    assert normalize_question("CTR 이 뭐야") == normalize_question("ctr 이 뭐야?")
+
+
+def test_key_includes_table_schema_and_date():
+    cache = ResponseCache()
+    cache.put("어제 노출수", "t", SCHEMA, "SELECT 1", date="2025-03-01")
+    assert cache.get("어제 노출수?", "t", SCHEMA, date="2025-03-01") == "SELECT 1"
+    assert cache.get("어제 노출수", "u", SCHEMA, date="2025-03-01") is None
+    assert cache.get("어제 노출수", "t", SCHEMA + ", id varchar", date="2025-03-01") is None
+    assert cache.get("어제 노출수", "t", SCHEMA, date="2025-03-02") is None
+
+
+def test_follow_up_is_cached_per_conversation():
+    cache = ResponseCache()
+    cache.put("그럼 어제는?", "t", SCHEMA, "SELECT agency", date="2025-03-01", history=HISTORY)
+    assert cache.get("그럼 어제는?", "t", SCHEMA, date="2025-03-01", history=HISTORY) == "SELECT agency"
+    # 대화가 없거나 다르면 같은 문장이어도 다른 키
+    assert cache.get("그럼 어제는?", "t", SCHEMA, date="2025-03-01") is None
+    other = [HISTORY[0], {"role": "assistant", "content": "```sql\nSELECT id, SUM(order_cnt) FROM t GROUP BY id\n```"}]
+    assert cache.get("그럼 어제는?", "t", SCHEMA, date="2025-03-01", history=other) is None
+
+
+def test_follow_up_ignores_answer_text_and_older_turns():
+    cache = ResponseCache()
+    cache.put("그럼 어제는?", "t", SCHEMA, "SELECT agency", date="2025-03-01", history=HISTORY)
+    # 해석 문장이 다르거나 앞에 다른 대화가 있어도 직전 SQL 이 같으면 재사용
+    same_sql = [
+        {"role": "system", "content": "이전 대화 요약:\n- 이전 질문: 안녕"},
+        HISTORY[0],
+        {"role": "assistant", "content": HISTORY[1]["content"].replace("대행사별 클릭수입니다.", "다른 해석")},
+    ]
+    assert cache.get("그럼 어제는?", "t", SCHEMA, date="2025-03-01", history=same_sql) == "SELECT agency"
+    # SQL 이 없는 대화(일반 답변)만 있으면 첫 질문과 같은 키
+    cache.put("어제 노출수", "t", SCHEMA, "SELECT 1", date="2025-03-01")
+    general = [{"role": "user", "content": "안녕"}, {"role": "assistant", "content": "안녕하세요"}]
+    assert cache.get("어제 노출수", "t", SCHEMA, date="2025-03-01", history=general) == "SELECT 1"
+
+
+def test_semantic_lookup_is_scoped_by_history(tmp_path):
+    # 모든 질문을 같은 벡터로 임베딩해서 유사도는 항상 1
+    cache = ResponseCache(db_path=str(tmp_path / "cache.sqlite"), embed=lambda text: [1.0, 0.0])
+    cache.put("그 중 상위 5개", "t", SCHEMA, "SELECT top5", date="2025-03-01", history=HISTORY)
+    assert cache.get("그 중에 상위 5개만", "t", SCHEMA, date="2025-03-01", history=HISTORY) == "SELECT top5"
+    assert cache.get("그 중에 상위 5개만", "t", SCHEMA, date="2025-03-01") is None
+
+
+def test_disk_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache(db_path=path).put("어제 노출수", "t", SCHEMA, "SELECT 1", date="2025-03-01")
+    cache = ResponseCache(db_path=path)
+    assert cache.get("어제 노출수", "t", SCHEMA, date="2025-03-01") == "SELECT 1"
+    assert cache.stats()["disk_hits"] == 1
@@ -0,0 +1,83 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from functions.result_cache import ResultCache, sql_fingerprint, referenced_tables, rule_expires_at
+
+
+def test_fingerprint_normalizes_sql_outside_literals():
+    a = "SELECT  agency, SUM(click_cnt)\n FROM t -- 주석\nWHERE wdate_str = '2025-03-01' ;"
+    b = "select agency,sum( click_cnt ) from t /* 다른 주석 */ where wdate_str='2025-03-01'"
+    assert sql_fingerprint(a) == sql_fingerprint(b)
+
+
+def test_fingerprint_keeps_literals_verbatim():
+    assert sql_fingerprint("SELECT * FROM t WHERE agency = 'A  B'") != sql_fingerprint("SELECT * FROM t WHERE agency = 'A B'")
+    assert sql_fingerprint("SELECT * FROM t WHERE agency = 'a , b'") != sql_fingerprint("SELECT * FROM t WHERE agency = 'a,b'")
+    assert sql_fingerprint("SELECT * FROM t WHERE agency = 'Abc'") != sql_fingerprint("SELECT * FROM t WHERE agency = 'abc'")
+    assert sql_fingerprint("SELECT '-- x' FROM t") == "select '-- x' from t"
+
+
+def test_fingerprint_keeps_optimizer_hints():
+    assert "/*+" in sql_fingerprint("SELECT /*+ MAX_EXECUTION_TIME(1000) */ * FROM t")
+
+
+def test_referenced_tables():
+    sql = ("SELECT * FROM adn_logs.`adn_clicks_2025` AS a "
+           "LEFT JOIN adn_ads.adn_paper_info p ON p.paper_code = a.paper_code")
+    assert referenced_tables(sql) == {"adn_clicks_2025", "adn_paper_info"}
+
+
+def test_rule_expires_at():
+    now = datetime(2025, 3, 1, 9, 30)
+    assert rule_expires_at(300, now) == now.timestamp() + 300
+    # 적재 시각 전이면 오늘, 지났으면 내일 적재 시각까지
+    assert rule_expires_at(("daily", 10), now) == datetime(2025, 3, 1, 10).timestamp()
+    assert rule_expires_at(("daily", 6), now) == datetime(2025, 3, 2, 6).timestamp()
+
+
+def test_expires_at_uses_earliest_table_rule():
+    cache = ResultCache(table_rules={"a": 60, "b": ("daily", 6)}, default_ttl=600)
+    now = datetime(2025, 3, 1, 9, 30)
+    assert cache.expires_at("SELECT * FROM a JOIN b ON a.id = b.id", now) == now.timestamp() + 60
+    assert cache.expires_at("SELECT * FROM c", now) == now.timestamp() + 600
+    assert cache.expires_at("SELECT * FROM b WHERE d = CURDATE()", now) == datetime(2025, 3, 2).timestamp()
+
+
+def test_cache_round_trip_and_key():
+    cache = ResultCache()
+    df = pd.DataFrame({"agency": ["a"], "click_cnt": [1]})
+    cache.put("SELECT * FROM t", "db", df)
+    assert cache.get("select *  from t;", "db").equals(df)
+    assert cache.get("SELECT * FROM t", "other_db") is None
+    assert ResultCache.key("SELECT 1", "db", 10) != ResultCache.key("SELECT 1", "db", 20)
+
+
+def test_disk_cache_is_capped_by_least_recently_read(tmp_path):
+    frames = {name: pd.DataFrame({"agency": [name] * 200, "click_cnt": range(200)}) for name in "abc"}
+    cache = ResultCache(cache_dir=str(tmp_path), max_bytes=0)
+    cache.put("SELECT * FROM a", "db", frames["a"])
+    entry_bytes = cache.stats()["disk_bytes"]
+
+    cache = ResultCache(cache_dir=str(tmp_path), max_bytes=0, max_disk_bytes=int(entry_bytes * 2.5))
+    cache.put("SELECT * FROM b", "db", frames["b"])
+    # a 를 다시 읽으면 b 가 가장 오래 안 읽힌 결과가 됨
+    os.utime(tmp_path / f"{ResultCache.key('SELECT * FROM b', 'db')}.parquet", (0, 0))
+    os.utime(tmp_path / f"{ResultCache.key('SELECT * FROM b', 'db')}.json", (0, 0))
+    assert cache.get("SELECT * FROM a", "db") is not None
+    cache.put("SELECT * FROM c", "db", frames["c"])
+
+    assert cache.stats()["disk_evictions"] == 1
+    assert cache.stats()["disk_bytes"] <= entry_bytes * 2.5
+    assert cache.get("SELECT * FROM b", "db") is None
+    assert cache.get("SELECT * FROM a", "db") is not None
+    assert cache.get("SELECT * FROM c", "db") is not None
+
+
+def test_disk_usage_is_recounted_on_start(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path))
+    cache.put("SELECT * FROM a", "db", pd.DataFrame({"agency": ["a"]}))
+    cache.put("SELECT * FROM a", "db", pd.DataFrame({"agency": ["b"]}))  # 같은 키는 한 번만 셈
+    assert ResultCache(cache_dir=str(tmp_path)).stats()["disk_bytes"] == cache.stats()["disk_bytes"]
+    assert ResultCache(cache_dir=str(tmp_path), max_disk_bytes=0).stats()["disk_bytes"] == 0
@@ -0,0 +1,44 @@
+import json
+import time
+import threading
+
+import pytest
+
+from functions.rollup import RollupStore
+
+AGG = ("SELECT agency, SUM(click_cnt) AS click_cnt FROM adn_daily_agency_statics_2025 "
+       "WHERE wdate_str BETWEEN '2025-03-01' AND '2025-03-02' GROUP BY agency ORDER BY click_cnt DESC")
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "agency_daily").mkdir()
+    (tmp_path / "agency_daily" / "_state.json").write_text(json.dumps(
+        {"table": "adn_daily_agency_statics_2025", "low_water": "2025-03-01", "high_water": "2025-03-02",
+         "refreshed_at": time.time() - 7200}))
+    return RollupStore(None, str(tmp_path), table_rules={"adn_daily_agency_statics_2025": 3600})
+
+
+def test_match_aggregate_on_dimensions(store):
+    assert store.match(AGG) == "agency_daily"
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT agency, COUNT(*) FROM adn_daily_agency_statics_2025 WHERE wdate_str >= '2025-03-01' GROUP BY agency",
+    "SELECT agency, SUM(click_cnt) FROM adn_daily_agency_statics_2025 WHERE click_cnt > 0 AND wdate_str >= '2025-03-01' GROUP BY agency",
+    "SELECT agency, SUM(click_cnt) FROM adn_daily_agency_statics_2025 WHERE wdate_str >= '2025-02-01' GROUP BY agency",
+    # 문자열 비교 / 정렬은 collation 에 따라 결과가 달라짐
+    "SELECT agency, SUM(click_cnt) FROM adn_daily_agency_statics_2025 WHERE wdate_str >= '2025-03-01' AND agency = 'a' GROUP BY agency",
+    "SELECT agency, SUM(click_cnt) FROM adn_daily_agency_statics_2025 WHERE wdate_str >= '2025-03-01' GROUP BY agency ORDER BY agency",
+])
+def test_match_rejects(store, sql):
+    assert store.match(sql) is None
+
+
+def test_expired_rollup_is_refreshed_in_background(store):
+    refreshed = threading.Event()
+    store.available = True
+    store.refresh = lambda name: refreshed.set()
+    store.auto_refresh = True
+    assert store.query(AGG) is None
+    assert refreshed.wait(5)
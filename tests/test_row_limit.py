@@ -0,0 +1,45 @@
+import os
+import sys
+import importlib
+
+import pytest
+
+from functions import run_query
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+run_query_2 = importlib.import_module("2_chatBot.functions.run_query")
+
+
+@pytest.fixture(params=[run_query, run_query_2], ids=["chatBot", "2_chatBot"])
+def apply_row_limit(request):
+    return request.param.apply_row_limit
+
+
+def test_appends_limit(apply_row_limit):
+    assert apply_row_limit("SELECT * FROM t;", 100) == "SELECT * FROM t\nLIMIT 100"
+
+
+def test_keeps_smaller_limit(apply_row_limit):
+    assert apply_row_limit("SELECT * FROM t LIMIT 10", 100) == "SELECT * FROM t LIMIT 10"
+    assert apply_row_limit("SELECT * FROM t LIMIT 5, 10", 100) == "SELECT * FROM t LIMIT 5, 10"
+
+
+def test_shrinks_larger_limit(apply_row_limit):
+    assert apply_row_limit("SELECT * FROM t LIMIT 500", 100) == "SELECT * FROM t LIMIT 100"
+    assert apply_row_limit("SELECT * FROM t LIMIT 5, 500", 100) == "SELECT * FROM t LIMIT 5, 100"
+    assert apply_row_limit("SELECT * FROM t LIMIT 500 OFFSET 20", 100) == "SELECT * FROM t LIMIT 100 OFFSET 20"
+
+
+def test_recognizes_limit_before_trailing_comment(apply_row_limit):
+    assert apply_row_limit("SELECT * FROM t LIMIT 10 -- 상위 10개", 100) == "SELECT * FROM t LIMIT 10"
+    assert apply_row_limit("SELECT * FROM t LIMIT 10 /* 상위 */;", 100) == "SELECT * FROM t LIMIT 10"
+    assert apply_row_limit("SELECT * FROM t LIMIT 500; # 끝", 100) == "SELECT * FROM t LIMIT 100"
+
+
+def test_keeps_comment_markers_inside_literals(apply_row_limit):
+    query = "SELECT * FROM t WHERE memo = 'a -- b'"
+    assert apply_row_limit(query, 100) == f"{query}\nLIMIT 100"
+
+
+def test_leaves_non_select_alone(apply_row_limit):
+    assert apply_row_limit("SHOW TABLES", 100) == "SHOW TABLES"
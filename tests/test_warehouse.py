@@ -0,0 +1,101 @@
+import json
+import time
+import threading
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from functions.warehouse import LocalWarehouse
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def warehouse(tmp_path):
+    # 2025-03-01 ~ 03-03 을 받은 상태 (원본 DB 없이 파일과 state 만 만듦)
+    store = LocalWarehouse(None, str(tmp_path), tables={"adn_clicks": "logs"}, snapshots={"adn_paper_info": "ads"},
+                           table_rules={"adn_clicks_2025": 3600, "adn_paper_info": 3600})
+    (tmp_path / "adn_clicks").mkdir()
+    for day in ("2025-03-01", "2025-03-02", "2025-03-03"):
+        pd.DataFrame({"wdate_str": [day, day], "paper_code": ["P1", "P2"], "click_cnt": [1, 2]}).to_parquet(
+            tmp_path / "adn_clicks" / f"{day}.parquet", index=False)
+    (tmp_path / "adn_clicks" / "_state.json").write_text(json.dumps(
+        {"low_water": "2025-03-01", "high_water": "2025-03-03", "synced_at": time.time()}))
+    (tmp_path / "adn_paper_info").mkdir()
+    pd.DataFrame({"paper_code": ["P1", "P2"], "category": ["뉴스", "쇼핑"]}).to_parquet(
+        tmp_path / "adn_paper_info" / "snapshot.parquet", index=False)
+    (tmp_path / "adn_paper_info" / "_state.json").write_text(json.dumps({"synced_at": time.time()}))
+    return store
+
+
+def test_query_inside_synced_range(warehouse):
+    name, df = warehouse.query("SELECT SUM(click_cnt) AS click_cnt FROM adn_clicks_2025 "
+                               "WHERE wdate_str BETWEEN '2025-03-01' AND '2025-03-02'")
+    assert name == "adn_clicks_2025"
+    assert df["click_cnt"].tolist() == [6]
+
+
+@pytest.mark.parametrize("where", [
+    "wdate_str BETWEEN '2025-02-28' AND '2025-03-02'",  # low water 이전
+    "wdate_str BETWEEN '2025-03-02' AND '2025-03-04'",  # high water 이후
+    "wdate_str >= '2025-03-02'",  # 종료일이 없는데 오늘까지 받지 않음
+])
+def test_query_outside_synced_range_goes_to_source(warehouse, where):
+    assert warehouse.query(f"SELECT SUM(click_cnt) FROM adn_clicks_2025 WHERE {where}") is None
+
+
+def test_open_range_runs_locally_when_synced_up_to_today(warehouse, tmp_path):
+    today = date.today().isoformat()
+    (tmp_path / "adn_clicks" / "_state.json").write_text(json.dumps(
+        {"low_water": "2025-03-01", "high_water": today, "synced_at": time.time()}))
+    warehouse._states.clear()
+    assert warehouse.query("SELECT SUM(click_cnt) FROM adn_clicks_2025 WHERE wdate_str >= '2025-03-02'") is not None
+
+
+def test_stale_sync_goes_to_source(warehouse, tmp_path):
+    (tmp_path / "adn_clicks" / "_state.json").write_text(json.dumps(
+        {"low_water": "2025-03-01", "high_water": "2025-03-03", "synced_at": time.time() - 7200}))
+    warehouse._states.clear()
+    assert warehouse.query("SELECT SUM(click_cnt) FROM adn_clicks_2025 WHERE wdate_str = '2025-03-01'") is None
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT SUM(click_cnt) FROM adn_clicks_2025 WHERE wdate_str = '2025-03-01' AND paper_code = 'p1'",
+    "SELECT paper_code FROM adn_clicks_2025 WHERE wdate_str = '2025-03-01' ORDER BY paper_code",
+    "SELECT p.category, SUM(a.click_cnt) FROM adn_clicks_2025 a JOIN adn_paper_info p ON p.paper_code = a.paper_code "
+    "WHERE a.wdate_str = '2025-03-01' GROUP BY p.category",
+])
+def test_collation_sensitive_query_goes_to_source(warehouse, sql):
+    # MySQL _ci collation 은 'p1' = 'P1' 이지만 DuckDB 는 아님
+    assert warehouse.query(sql) is None
+
+
+def test_group_by_text_column_runs_locally(warehouse):
+    name, df = warehouse.query("SELECT paper_code, SUM(click_cnt) AS click_cnt FROM adn_clicks_2025 "
+                               "WHERE wdate_str = '2025-03-01' GROUP BY paper_code ORDER BY click_cnt")
+    assert df["paper_code"].tolist() == ["P1", "P2"]
+
+
+def test_duckdb_error_is_counted(warehouse):
+    # DuckDB 에 없는 함수 -> 원본 DB 로 넘기고 errors 로 셈
+    assert warehouse.query("SELECT NO_SUCH_FUNCTION(click_cnt) FROM adn_clicks_2025 WHERE wdate_str = '2025-03-01'") is None
+    assert warehouse.stats()["errors"] == 1
+
+
+def test_stale_table_is_refreshed_in_background(warehouse, tmp_path):
+    (tmp_path / "adn_clicks" / "_state.json").write_text(json.dumps(
+        {"low_water": "2025-03-01", "high_water": "2025-03-03", "synced_at": time.time() - 7200}))
+    warehouse._states.clear()
+    synced = threading.Event()
+    warehouse.sync = lambda name: synced.set()
+    warehouse.auto_refresh = True
+
+    assert warehouse.query("SELECT SUM(click_cnt) FROM adn_clicks_2025 WHERE wdate_str = '2025-03-01'") is None
+    assert synced.wait(5)
+    for _ in range(50):
+        if warehouse.stats()["refreshes"]:
+            break
+        time.sleep(0.01)
+    assert warehouse.stats()["refreshes"] == 1